@@ -0,0 +1,98 @@
+"""Benchmark: frequency counting in one process vs ``--workers`` map-reduce.
+
+Writes a synthetic scrape of ``--posts`` posts (scraper-shaped: projected from
+a realistic ``itemStruct``, with varied authors, labels and hashtags) as both the
+scraper's indented ``post_data.json`` and a ``post_data.jsonl`` log, then times
+the streamed single-process count against ``count_frequencies_parallel`` at each
+worker count. Checks every variant produces the same tables before reporting.
+
+    python -m benchmarks.bench_counting
+    python -m benchmarks.bench_counting --posts 200000 --workers 1 2 4 8
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+from collections import Counter
+from collections.abc import Callable
+from functools import partial
+from pathlib import Path
+from typing import Any
+
+from benchmarks.bench_projection import synthetic_item
+from post_processing.post_data_collection import (
+    count_frequencies,
+    count_frequencies_parallel,
+    iter_posts,
+)
+from scraping.projection import coerce_post, compile_projection
+from tiktok_post_scraper import _POST_QUERY
+
+
+def synthetic_posts(count: int, seed: int = 0) -> list[dict[str, Any]]:
+    """``count`` scraped posts with Zipf-ish authors and hashtags."""
+    rng = random.Random(seed)  # noqa: S311 -- reproducible, not secret
+    project = compile_projection(_POST_QUERY)
+    template = coerce_post(project(synthetic_item(hashtags=0)))
+    posts = []
+    for n in range(count):
+        post = json.loads(json.dumps(template))
+        post["id"] = str(7400000000000000000 + n)
+        post["author"]["uniqueId"] = f"author{int(rng.paretovariate(1.2)) % 20000}"
+        post["author"]["verified"] = rng.random() < 0.1
+        post["diversificationLabels"] = rng.sample(["Food", "Pets", "Comedy", "Music"], 2)
+        tags = [f"tag{int(rng.paretovariate(0.8)) % 50000}" for _ in range(rng.randint(0, 12))]
+        post["contents"] = [{"textExtra": [{"hashtagName": tag} for tag in tags]}]
+        posts.append(post)
+    return posts
+
+
+def timed(count: Callable[[], dict[str, Counter]]) -> tuple[float, dict[str, Counter]]:
+    started = time.perf_counter()
+    result = count()
+    return time.perf_counter() - started, result
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--posts", type=int, default=100000, help="synthetic posts to count")
+    parser.add_argument(
+        "--workers", type=int, nargs="+", default=sorted({1, 2, 4, os.cpu_count() or 1})
+    )
+    args = parser.parse_args(argv)
+
+    posts = synthetic_posts(args.posts)
+    with tempfile.TemporaryDirectory() as tmp:
+        sources = {
+            "json": Path(tmp) / "post_data.json",
+            "jsonl": Path(tmp) / "post_data.jsonl",
+        }
+        sources["json"].write_text(json.dumps(posts, indent=2, ensure_ascii=False), "utf-8")
+        with sources["jsonl"].open("w", encoding="utf-8") as file:
+            for post in posts:
+                file.write(json.dumps(post, ensure_ascii=False) + "\n")
+        del posts
+        print(f"{args.posts} posts, {os.cpu_count()} CPUs")
+
+        for layout, path in sources.items():
+            size = path.stat().st_size / 1e6
+            baseline, expected = timed(partial(count_frequencies, iter_posts(str(path))))
+            expected_tables = {key: counter.most_common() for key, counter in expected.items()}
+            print(f"{layout:<6} {size:7.1f} MB  streamed    {args.posts / baseline:9.0f} posts/s")
+            for workers in args.workers:
+                seconds, counted = timed(partial(count_frequencies_parallel, str(path), workers))
+                tables = {key: counter.most_common() for key, counter in counted.items()}
+                assert tables == expected_tables, f"{layout} x{workers} tables differ"
+                print(
+                    f"{layout:<6} {size:7.1f} MB  {workers:2d} workers  "
+                    f"{args.posts / seconds:9.0f} posts/s  {baseline / seconds:5.2f}x"
+                )
+
+
+if __name__ == "__main__":
+    main()
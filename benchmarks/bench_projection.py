@@ -0,0 +1,91 @@
+"""Micro-benchmark: projecting a post with jmespath vs the compiled projection.
+
+Compares the old per-call ``jmespath.search(_POST_QUERY, ...)``, jmespath's own
+pre-compiled expression, and ``scraping.projection.compile_projection``, on a
+synthetic ``itemStruct`` shaped like a real one (extra keys included, since the
+projection has to skip them). Checks all three agree before timing.
+
+    python -m benchmarks.bench_projection
+    python -m benchmarks.bench_projection --number 20000 --hashtags 30
+"""
+
+from __future__ import annotations
+
+import argparse
+import timeit
+from typing import Any
+
+import jmespath
+
+from scraping.projection import compile_projection
+from tiktok_post_scraper import _POST_QUERY
+
+
+def synthetic_item(hashtags: int) -> dict[str, Any]:
+    """An itemStruct with the fields _POST_QUERY reads plus typical noise."""
+    return {
+        "id": "7400543367504858373",
+        "desc": "Cream Cheese Stuffed Everything Bagel " * 4,
+        "createTime": "1723073280",
+        "video": {"duration": 50, "ratio": "540p", "cover": "https://x/" * 20, "bitrate": 1},
+        "author": {
+            "id": "106392206474711040",
+            "uniqueId": "genericauthor",
+            "nickname": "Alice Bob",
+            "verified": True,
+            "avatarLarger": "https://x/" * 20,
+            "signature": "bio " * 30,
+        },
+        "music": {"id": "1", "title": "original sound", "playUrl": "https://x/" * 20},
+        "stats": {
+            "diggCount": 6917,
+            "shareCount": 1127,
+            "commentCount": 72,
+            "playCount": 87200,
+            "collectCount": "700",
+        },
+        "locationCreated": "US",
+        "diversificationLabels": ["Cooking", "Food & Drink", "Lifestyle"],
+        "suggestedWords": ["cream cheese", "Cream Cheese Bagel", "bagel"],
+        "contents": [
+            {
+                "desc": "part",
+                "textExtra": [
+                    {"hashtagName": f"tag{n}", "start": n, "end": n + 4, "type": 1}
+                    for n in range(hashtags)
+                ],
+            }
+            for _ in range(2)
+        ],
+    }
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--number", type=int, default=10000, help="projections per variant")
+    parser.add_argument("--hashtags", type=int, default=10, help="hashtags per contents entry")
+    args = parser.parse_args(argv)
+
+    item = synthetic_item(args.hashtags)
+    precompiled = jmespath.compile(_POST_QUERY)
+    compiled = compile_projection(_POST_QUERY)
+    variants = {
+        "jmespath.search": lambda: jmespath.search(_POST_QUERY, item),
+        "jmespath.compile": lambda: precompiled.search(item),
+        "compile_projection": lambda: compiled(item),
+    }
+
+    expected = jmespath.search(_POST_QUERY, item)
+    for name, variant in variants.items():
+        assert variant() == expected, f"{name} output differs from jmespath.search"
+
+    baseline = None
+    for name, variant in variants.items():
+        seconds = min(timeit.repeat(variant, number=args.number, repeat=3))
+        per_call = seconds / args.number * 1e6
+        baseline = baseline or per_call
+        print(f"{name:<20} {per_call:8.2f} us/post  {baseline / per_call:5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
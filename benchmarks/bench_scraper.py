@@ -0,0 +1,139 @@
+"""Scraper throughput benchmark against the offline mock (``benchmarks.mock_tiktok``).
+
+Runs ``scrape_posts`` once per scraping mode -- the default fast extractor, the
+xpath extractor, ``--stream``, ``--parse-workers`` and ``--adaptive`` -- each
+against a fresh mock with the same seed, so every mode sees the same latency
+draws, throttling and injected errors. Reports posts/sec, fetch latency p50/p99
+(from ``ScrapeMetrics``, interpolated within its buckets), MB read, and the
+retry overhead: extra requests per scraped post.
+
+    python -m benchmarks.bench_scraper
+    python -m benchmarks.bench_scraper --posts 1000 --concurrency 20 --page-kb 600
+    python -m benchmarks.bench_scraper --throttle-rate 30 --error-rate 0.02 --modes default adaptive
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any
+
+import httpx
+from loguru import logger as log
+
+from benchmarks.mock_tiktok import MockTikTok, TokenBucket, lognormal
+from scraping.metrics import ScrapeMetrics
+from scraping.rate_control import RateController
+from tiktok_post_scraper import JsonlStore, build_parse_pool, scrape_posts
+
+MODES = ("default", "xpath", "stream", "parse-workers", "adaptive")
+
+
+def synthetic_urls(count: int) -> list[str]:
+    return [f"https://www.tiktokv.com/share/video/{7400000000000000000 + n}/" for n in range(count)]
+
+
+async def run_mode(mode: str, args: argparse.Namespace) -> dict[str, Any]:
+    """Scrape ``args.posts`` mock posts in ``mode``; returns the metrics snapshot."""
+    mock = MockTikTok(
+        page_kb=args.page_kb,
+        latency=lognormal(args.latency_ms / 1000, args.sigma),
+        throttle=TokenBucket(args.throttle_rate, args.throttle_burst)
+        if args.throttle_rate
+        else None,
+        throttle_rate=args.random_throttle,
+        error_rate=args.error_rate,
+        server_error_rate=args.server_error_rate,
+        gone_rate=args.gone_rate,
+        seed=args.seed,
+    )
+    metrics = ScrapeMetrics()
+    rate = (
+        RateController(args.initial_rate, max_rate=1000.0, cooldown=args.backoff * 4)
+        if mode == "adaptive"
+        else None
+    )
+    parse_pool = (
+        build_parse_pool(args.parse_workers, [], "fast") if mode == "parse-workers" else None
+    )
+    client = httpx.AsyncClient(transport=mock.transport())
+    with tempfile.TemporaryDirectory() as tmp:
+        store = JsonlStore(Path(tmp) / "post_data.jsonl", resume=False)
+        started = time.perf_counter()
+        try:
+            await scrape_posts(
+                client,
+                synthetic_urls(args.posts),
+                [],
+                store,
+                concurrency=args.concurrency,
+                delay=0.0,
+                retries=args.retries,
+                rate=rate,
+                extractor="xpath" if mode == "xpath" else "fast",
+                stream=mode == "stream",
+                parse_pool=parse_pool,
+                backoff=lambda attempt: args.backoff * 2 ** (attempt - 1),
+                metrics=metrics,
+            )
+        finally:
+            await client.aclose()
+            if parse_pool is not None:
+                parse_pool.shutdown()
+        elapsed = time.perf_counter() - started
+    snapshot = metrics.snapshot()
+    snapshot["elapsed_seconds"] = elapsed
+    snapshot["posts_per_second"] = metrics.scraped / elapsed
+    return snapshot
+
+
+def report(mode: str, snapshot: dict[str, Any]) -> str:
+    latency = snapshot["fetch_latency_seconds"]
+    scraped = snapshot["scraped"]
+    overhead = (snapshot["requests"] - scraped) / scraped if scraped else float("nan")
+    return (
+        f"{mode:<14} {snapshot['posts_per_second']:8.1f} posts/s"
+        f"  p50 {(latency['p50'] or 0) * 1000:7.1f} ms  p99 {(latency['p99'] or 0) * 1000:7.1f} ms"
+        f"  {snapshot['bytes_received'] / 1e6:7.1f} MB"
+        f"  {snapshot['requests']:6d} req  {snapshot['retries']:5d} retries"
+        f"  {overhead:6.1%} overhead  {snapshot['failed']:4d} failed"
+    )
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--posts", type=int, default=300, help="posts to scrape per mode")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--retries", type=int, default=3)
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES))
+    parser.add_argument("--parse-workers", type=int, default=2)
+    parser.add_argument("--initial-rate", type=float, default=20.0, help="adaptive mode's start")
+    parser.add_argument("--page-kb", type=int, default=300, help="size of each mock page")
+    parser.add_argument("--latency-ms", type=float, default=80.0, help="median response time")
+    parser.add_argument("--sigma", type=float, default=0.5, help="log-normal latency spread")
+    parser.add_argument(
+        "--throttle-rate", type=float, default=0.0, help="429 above this many req/s (0: off)"
+    )
+    parser.add_argument("--throttle-burst", type=float, default=10.0)
+    parser.add_argument("--random-throttle", type=float, default=0.0, help="chance of a 429")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="chance of a network error")
+    parser.add_argument("--server-error-rate", type=float, default=0.0, help="chance of a 503")
+    parser.add_argument("--gone-rate", type=float, default=0.0, help="share of 404 videos")
+    parser.add_argument("--backoff", type=float, default=0.1, help="first retry delay, seconds")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--verbose", action="store_true", help="keep the scraper's logging")
+    args = parser.parse_args(argv)
+
+    if not args.verbose:
+        log.remove()
+        log.add(sys.stderr, level="ERROR")
+    for mode in args.modes:
+        print(report(mode, asyncio.run(run_mode(mode, args))), flush=True)
+
+
+if __name__ == "__main__":
+    main()
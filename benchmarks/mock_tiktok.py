@@ -0,0 +1,152 @@
+"""A stand-in for TikTok's post pages, for benchmarking the scraper offline.
+
+``MockTikTok`` is an ``httpx`` transport that answers any ``/video/<id>`` URL
+with a synthetic page of realistic size: the rehydration script (holding an
+``itemStruct`` shaped like a real one) sits between blocks of filler markup, so
+``--stream`` has a tail to skip and the extractors have a haystack to search.
+Every response is delayed by a draw from a latency distribution, and the mock
+can throttle (a token-bucket rate limit and/or random 403/429s), inject network
+errors and 5xx responses, and answer 404 for "deleted" videos. Everything random
+comes from one seeded ``random.Random``, so a run is reproducible.
+
+    mock = MockTikTok(latency=lognormal(0.08, 0.5), throttle=TokenBucket(20, 10))
+    client = httpx.AsyncClient(transport=mock.transport())
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import math
+import random
+import re
+import time
+from collections import Counter
+from collections.abc import AsyncIterator, Callable
+
+import httpx
+
+from benchmarks.bench_projection import synthetic_item
+
+Latency = Callable[[random.Random], float]
+
+_VIDEO_ID = re.compile(r"/video/(\d+)")
+CHUNK_BYTES = 16 * 1024  # bodies arrive in pieces, as off a socket, so --stream can stop early
+_FILLER = '<div class="css-1x2y3z4 e1abc2d3"><span data-e2e="filler">lorem ipsum</span></div>\n'
+
+
+def fixed(seconds: float) -> Latency:
+    """Always ``seconds``."""
+    return lambda _rng: seconds
+
+
+def lognormal(median: float, sigma: float) -> Latency:
+    """Log-normal around ``median`` seconds: mostly quick, with a long slow tail."""
+    mu = math.log(median)
+    return lambda rng: rng.lognormvariate(mu, sigma)
+
+
+class TokenBucket:
+    """Answer 429 once more than ``rate`` requests/second (plus ``burst``) arrive."""
+
+    def __init__(
+        self, rate: float, burst: float, *, clock: Callable[[], float] = time.monotonic
+    ) -> None:
+        self.rate = rate
+        self.burst = burst
+        self._clock = clock
+        self._tokens = burst
+        self._updated = clock()
+
+    def allow(self) -> bool:
+        now = self._clock()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return True
+        return False
+
+
+def synthetic_page(video_id: str, page_kb: int, hashtags: int = 8) -> bytes:
+    """A post page of about ``page_kb`` KiB with the rehydration script in the middle."""
+    item = synthetic_item(hashtags)
+    item["id"] = video_id
+    payload = {"__DEFAULT_SCOPE__": {"webapp.video-detail": {"itemInfo": {"itemStruct": item}}}}
+    script = (
+        '<script id="__UNIVERSAL_DATA_FOR_REHYDRATION__" type="application/json">'
+        + json.dumps(payload)
+        + "</script>\n"
+    )
+    filler_lines = max(0, page_kb * 1024 - len(script)) // len(_FILLER)
+    head = _FILLER * (filler_lines // 2)
+    tail = _FILLER * (filler_lines - filler_lines // 2)
+    return f"<html><head></head><body>\n{head}{script}{tail}</body></html>".encode()
+
+
+class MockTikTok:
+    """Configurable fake of TikTok's post pages; see the module docstring.
+
+    ``throttle_rate`` is the chance any request is answered ``throttle_status``
+    regardless of rate; ``error_rate`` raises a connect error, ``server_error_rate``
+    answers 503, and ``gone_rate`` answers 404 (decided once per video ID).
+    """
+
+    def __init__(
+        self,
+        *,
+        page_kb: int = 300,
+        latency: Latency | None = None,
+        throttle: TokenBucket | None = None,
+        throttle_rate: float = 0.0,
+        throttle_status: int = 429,
+        error_rate: float = 0.0,
+        server_error_rate: float = 0.0,
+        gone_rate: float = 0.0,
+        seed: int = 0,
+    ) -> None:
+        self.page_kb = page_kb
+        self.latency = latency or fixed(0.0)
+        self.throttle = throttle
+        self.throttle_rate = throttle_rate
+        self.throttle_status = throttle_status
+        self.error_rate = error_rate
+        self.server_error_rate = server_error_rate
+        self.gone_rate = gone_rate
+        self.rng = random.Random(seed)  # noqa: S311 -- reproducible, not secret
+        self.responses: Counter[str] = Counter()
+        self._pages: dict[str, bytes] = {}
+        self._gone: dict[str, bool] = {}
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(self.latency(self.rng))
+        match = _VIDEO_ID.search(request.url.path)
+        if match is None:
+            return self._answer(404)
+        video_id = match.group(1)
+        if self.rng.random() < self.error_rate:
+            self.responses["network"] += 1
+            raise httpx.ConnectError("injected", request=request)
+        if self.throttle is not None and not self.throttle.allow():
+            return self._answer(429)
+        if self.rng.random() < self.throttle_rate:
+            return self._answer(self.throttle_status)
+        if self.rng.random() < self.server_error_rate:
+            return self._answer(503)
+        if self._gone.setdefault(video_id, self.rng.random() < self.gone_rate):
+            return self._answer(404)
+        if video_id not in self._pages:
+            self._pages[video_id] = synthetic_page(video_id, self.page_kb)
+        return self._answer(200, self._pages[video_id])
+
+    def _answer(self, status: int, content: bytes = b"") -> httpx.Response:
+        self.responses[str(status)] += 1
+
+        async def chunks() -> AsyncIterator[bytes]:
+            for start in range(0, len(content), CHUNK_BYTES):
+                yield content[start : start + CHUNK_BYTES]
+
+        return httpx.Response(status, content=chunks(), headers={"Content-Type": "text/html"})
+
+    def transport(self) -> httpx.MockTransport:
+        return httpx.MockTransport(self.handle)
@@ -5,10 +5,13 @@ tags and anything below a frequency threshold, looks up a WordNet synset for
 each remaining hashtag (plus a hand-curated ``custom_synsets.json`` for slang and
 names WordNet doesn't know), and merges hashtags that share a synset so ``#cats``
 and ``#kitten`` land in the same bucket. Writes JSON and plain-text reports under
-``processed_data/``.
+``processed_data/``. With ``--db`` the hashtag counts and post total come
+straight from the scraper's SQLite store (``--storage sqlite``) as indexed
+``GROUP BY`` queries, skipping the frequency-table step.
 
     python post_processing/data_processor.py
     python post_processing/data_processor.py --min-percentage 0.25 --verbose
+    python post_processing/data_processor.py --db scraper_data/scraper_output/post_data.db
 """
 
 from __future__ import annotations
@@ -16,6 +19,7 @@ from __future__ import annotations
 import argparse
 import json
 import re
+import sqlite3
 import sys
 from collections import defaultdict
 from functools import cache
@@ -157,6 +161,26 @@ def read_verified_count(path: Path) -> int:
         return sum(int(line.strip().split(": ")[1]) for line in file)
 
 
+def load_hashtags_from_db(db_path: Path) -> tuple[list[Hashtag], int]:
+    """(hashtag counts, total post count) from the scraper's SQLite store.
+
+    Counts every hashtag occurrence, like the hashtagName table does; ties come
+    out in name order.
+    """
+    connection = sqlite3.connect(f"file:{db_path.as_posix()}?mode=ro", uri=True)
+    try:
+        rows = connection.execute(
+            "SELECT hashtags.name, COUNT(*) AS uses FROM post_hashtags "
+            "JOIN hashtags ON hashtags.id = post_hashtags.hashtag_id "
+            "GROUP BY post_hashtags.hashtag_id ORDER BY uses DESC, hashtags.name"
+        )
+        hashtags = [Hashtag(name, uses) for name, uses in rows if name]
+        (total_posts,) = connection.execute("SELECT COUNT(*) FROM posts").fetchone()
+    finally:
+        connection.close()
+    return hashtags, total_posts
+
+
 def filter_and_score(
     hashtags: list[Hashtag], total_posts: int, min_percentage: float
 ) -> list[Hashtag]:
@@ -327,10 +351,14 @@ def process(
     custom_synsets_path: Path,
     output_dir: Path,
     min_percentage: float,
+    db_path: Path | None = None,
 ) -> None:
     custom_synsets = load_custom_synsets(custom_synsets_path)
-    hashtags = load_hashtags(hashtags_path)
-    total_posts = read_verified_count(verified_path)
+    if db_path is not None:
+        hashtags, total_posts = load_hashtags_from_db(db_path)
+    else:
+        hashtags = load_hashtags(hashtags_path)
+        total_posts = read_verified_count(verified_path)
 
     filtered = filter_and_score(hashtags, total_posts, min_percentage)
     for ht in tqdm(filtered, desc="matching synsets", unit="tag"):
@@ -344,6 +372,7 @@ def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
     parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
     parser.add_argument("--input", default=str(DEFAULT_HASHTAGS), help="hashtagName.json")
     parser.add_argument("--verified", default=str(DEFAULT_VERIFIED), help="verified.txt")
+    parser.add_argument("--db", help="count hashtags in the scraper's post_data.db instead")
     parser.add_argument(
         "--custom-synsets", default=str(DEFAULT_CUSTOM_SYNSETS), help="custom_synsets.json"
     )
@@ -368,6 +397,7 @@ def main(argv: list[str] | None = None) -> None:
         Path(args.custom_synsets),
         Path(args.output_dir),
         args.min_percentage,
+        Path(args.db) if args.db else None,
     )
 
 
@@ -0,0 +1,360 @@
+"""Engagement analytics over the scraped posts' numbers.
+
+``post_data_collection.py`` counts the categorical fields; this stage looks at
+the numeric ones -- the ``stats`` (plays, likes, comments, shares, saves),
+``video.duration`` and ``createTime``. The posts are streamed once into typed
+NumPy columns (hashtags and labels as CSR-style offset/ID arrays, since a post
+has any number of them), and every aggregate is then computed vectorized over
+whole columns rather than per post:
+
+* ``engagement_<field>.json`` for ``hashtagName``, ``uniqueId`` and
+  ``diversificationLabels``: per value, the number of posts and the 25th/50th/
+  75th/90th percentiles of plays and of engagement rate ((likes + comments +
+  shares + saves) / plays), for values on at least ``--min-posts`` posts.
+* ``posts_by_week.json``: the liked posts bucketed by the week they were posted
+  (Monday-based, UTC), with median plays and engagement rate per week.
+* ``duration_distribution.json``: post length percentiles, and a histogram of
+  lengths with the median engagement rate per bin.
+
+They're written next to the frequency tables, under
+``scraper_data/post_processing/json_output_directory/``.
+
+    python post_processing/engagement_analytics.py
+    python post_processing/engagement_analytics.py --input path/to/post_data.jsonl --min-posts 5
+    python post_processing/engagement_analytics.py --db scraper_data/scraper_output/post_data.db
+"""
+
+from __future__ import annotations
+
+import argparse
+import datetime
+import json
+from array import array
+from collections.abc import Iterable, Sequence
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+from loguru import logger as log
+
+try:
+    from post_processing.post_data_collection import (
+        DEFAULT_INPUT,
+        DEFAULT_OUTPUT_DIR,
+        diversification_labels,
+        hashtag_names,
+        iter_posts,
+        load_db,
+    )
+except ModuleNotFoundError:  # run as a script: post_processing/ itself is on sys.path
+    from post_data_collection import (  # type: ignore[no-redef]
+        DEFAULT_INPUT,
+        DEFAULT_OUTPUT_DIR,
+        diversification_labels,
+        hashtag_names,
+        iter_posts,
+        load_db,
+    )
+
+STAT_FIELDS = ("playCount", "diggCount", "commentCount", "shareCount", "collectCount")
+PERCENTILES = (25, 50, 75, 90)
+# Upper edges in seconds; the last bin is open-ended.
+DURATION_BINS = (15, 30, 60, 90, 180, 600)
+DEFAULT_MIN_POSTS = 3
+_DAY = 86400
+# 1970-01-01 was a Thursday; shifting by 3 days makes weeks start on Monday.
+_MONDAY_SHIFT = 3
+
+
+def _number(value: Any) -> float:
+    """A stat as a float: ints and digit strings alike; NaN when missing or garbled."""
+    if isinstance(value, bool):
+        return float("nan")
+    if isinstance(value, int | float):
+        return float(value)
+    if isinstance(value, str) and value.strip().isdigit():
+        return float(value)
+    return float("nan")
+
+
+class Vocabulary:
+    """Strings to dense integer IDs, in first-seen order."""
+
+    def __init__(self) -> None:
+        self.ids: dict[str, int] = {}
+        self.names: list[str] = []
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def id(self, name: str) -> int:
+        number = self.ids.get(name)
+        if number is None:
+            number = self.ids[name] = len(self.names)
+            self.names.append(name)
+        return number
+
+
+@dataclass
+class Columns:
+    """The scrape as columns: one row per post, multi-valued fields in CSR form.
+
+    Post ``i``'s hashtags are ``hashtag_ids[hashtag_ptr[i]:hashtag_ptr[i + 1]]``
+    (IDs into ``hashtags.names``); the same goes for labels. Missing numbers are
+    NaN.
+    """
+
+    stats: np.ndarray  # (posts, len(STAT_FIELDS)) float64
+    duration: np.ndarray  # (posts,) float64, seconds
+    created: np.ndarray  # (posts,) float64, unix seconds
+    author_ids: np.ndarray  # (posts,) int64, into authors.names
+    authors: Vocabulary
+    hashtag_ptr: np.ndarray  # (posts + 1,) int64
+    hashtag_ids: np.ndarray  # int64, into hashtags.names
+    hashtags: Vocabulary
+    label_ptr: np.ndarray
+    label_ids: np.ndarray
+    labels: Vocabulary
+
+    def __len__(self) -> int:
+        return len(self.duration)
+
+
+def load_columns(posts: Iterable[dict[str, Any]]) -> Columns:
+    """Stream ``posts`` once into typed columns (compact ``array`` buffers, then NumPy)."""
+    stats, duration, created = array("d"), array("d"), array("d")
+    author_ids, hashtag_ptr, hashtag_ids = array("q"), array("q", [0]), array("q")
+    label_ptr, label_ids = array("q", [0]), array("q")
+    authors, hashtags, labels = Vocabulary(), Vocabulary(), Vocabulary()
+
+    for post in posts:
+        post_stats = post.get("stats") or {}
+        stats.extend(_number(post_stats.get(field)) for field in STAT_FIELDS)
+        duration.append(_number((post.get("video") or {}).get("duration")))
+        created.append(_number(post.get("createTime")))
+        author_ids.append(authors.id((post.get("author") or {}).get("uniqueId", "Unknown")))
+        hashtag_ids.extend(map(hashtags.id, hashtag_names(post)))
+        hashtag_ptr.append(len(hashtag_ids))
+        label_ids.extend(map(labels.id, diversification_labels(post)))
+        label_ptr.append(len(label_ids))
+
+    return Columns(
+        stats=np.frombuffer(stats, dtype=np.float64).reshape(-1, len(STAT_FIELDS)),
+        duration=np.frombuffer(duration, dtype=np.float64),
+        created=np.frombuffer(created, dtype=np.float64),
+        author_ids=np.frombuffer(author_ids, dtype=np.int64),
+        authors=authors,
+        hashtag_ptr=np.frombuffer(hashtag_ptr, dtype=np.int64),
+        hashtag_ids=np.frombuffer(hashtag_ids, dtype=np.int64),
+        hashtags=hashtags,
+        label_ptr=np.frombuffer(label_ptr, dtype=np.int64),
+        label_ids=np.frombuffer(label_ids, dtype=np.int64),
+        labels=labels,
+    )
+
+
+def engagement_rate(columns: Columns) -> np.ndarray:
+    """(likes + comments + shares + saves) / plays per post; NaN without plays.
+    A missing interaction count (older posts have no saves) counts as 0."""
+    plays = columns.stats[:, 0]
+    interactions = np.nansum(columns.stats[:, 1:], axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(plays > 0, interactions / plays, np.nan)
+
+
+def grouped_percentiles(
+    groups: np.ndarray, values: np.ndarray, n_groups: int, percentiles: Sequence[float]
+) -> np.ndarray:
+    """Percentiles of ``values`` per group, ignoring NaNs.
+
+    One sort by (group, value) puts every group's values in a sorted run; each
+    percentile is then read off every run at once, interpolating linearly like
+    ``np.percentile``. The table is shaped ``(n_groups, len(percentiles))``,
+    NaN for groups with no values.
+    """
+    keep = ~np.isnan(values)
+    groups, values = groups[keep], values[keep]
+    values = values[np.lexsort((values, groups))]
+    counts = np.bincount(groups, minlength=n_groups)
+    starts = np.cumsum(counts) - counts
+    table = np.full((n_groups, len(percentiles)), np.nan)
+    present = counts > 0
+    sizes, firsts = counts[present], starts[present]
+    for column, percentile in enumerate(percentiles):
+        position = percentile / 100 * (sizes - 1)
+        lower = np.floor(position).astype(np.int64)
+        upper = np.minimum(lower + 1, sizes - 1)
+        below, above = values[firsts + lower], values[firsts + upper]
+        table[present, column] = below + (above - below) * (position - lower)
+    return table
+
+
+def _rounded(value: float, digits: int) -> float | None:
+    return None if np.isnan(value) else round(float(value), digits)
+
+
+def engagement_by(
+    rows: np.ndarray,
+    groups: np.ndarray,
+    names: Sequence[str],
+    plays: np.ndarray,
+    rate: np.ndarray,
+    min_posts: int,
+) -> dict[str, dict[str, Any]]:
+    """Plays and engagement-rate percentiles per group, for groups on ``min_posts``+ posts.
+
+    ``rows[k]`` is a post and ``groups[k]`` one of its values (a post with three
+    hashtags appears three times; a value repeated in a post counts once).
+    Ordered by post count, most first.
+    """
+    n_groups = max(len(names), 1)
+    rows, groups = np.divmod(np.unique(rows * n_groups + groups), n_groups)
+    posts = np.bincount(groups, minlength=len(names))
+    play_table = grouped_percentiles(groups, plays[rows], len(names), PERCENTILES)
+    rate_table = grouped_percentiles(groups, rate[rows], len(names), PERCENTILES)
+    # Stable, so ties keep first-seen order, as the frequency tables do.
+    order = np.argsort(-posts, kind="stable")
+    report: dict[str, dict[str, Any]] = {}
+    for group in order[posts[order] >= min_posts]:
+        report[names[group]] = {
+            "posts": int(posts[group]),
+            "plays": {
+                f"p{p}": _rounded(value, 1)
+                for p, value in zip(PERCENTILES, play_table[group], strict=True)
+            },
+            "engagement_rate": {
+                f"p{p}": _rounded(value, 5)
+                for p, value in zip(PERCENTILES, rate_table[group], strict=True)
+            },
+        }
+    return report
+
+
+def csr_rows(ptr: np.ndarray) -> np.ndarray:
+    """The post (row) of every entry of a CSR ID array."""
+    return np.repeat(np.arange(len(ptr) - 1), np.diff(ptr))
+
+
+def posts_by_week(columns: Columns, rate: np.ndarray) -> dict[str, dict[str, Any]]:
+    """Posts per week posted (Monday, UTC), with median plays and engagement rate."""
+    dated = ~np.isnan(columns.created)
+    weeks = (columns.created[dated] // _DAY + _MONDAY_SHIFT) // 7
+    if not len(weeks):
+        return {}
+    unique, groups = np.unique(weeks.astype(np.int64), return_inverse=True)
+    plays = grouped_percentiles(groups, columns.stats[dated, 0], len(unique), (50,))
+    rates = grouped_percentiles(groups, rate[dated], len(unique), (50,))
+    posts = np.bincount(groups, minlength=len(unique))
+    report = {}
+    for index, week in enumerate(unique):
+        monday = datetime.date(1970, 1, 1) + datetime.timedelta(days=int(week) * 7 - _MONDAY_SHIFT)
+        report[monday.isoformat()] = {
+            "posts": int(posts[index]),
+            "median_plays": _rounded(plays[index, 0], 1),
+            "median_engagement_rate": _rounded(rates[index, 0], 5),
+        }
+    return report
+
+
+def duration_distribution(columns: Columns, rate: np.ndarray) -> dict[str, Any]:
+    """Video length percentiles, plus a length histogram with engagement per bin."""
+    timed = ~np.isnan(columns.duration)
+    durations = columns.duration[timed]
+    bins = np.searchsorted(np.asarray(DURATION_BINS), durations, side="left")
+    rates = grouped_percentiles(bins, rate[timed], len(DURATION_BINS) + 1, (50,))
+    posts = np.bincount(bins, minlength=len(DURATION_BINS) + 1)
+    edges = (0, *DURATION_BINS)
+    labels = [f"{low}-{high}s" for low, high in zip(edges, DURATION_BINS, strict=False)]
+    labels.append(f"{DURATION_BINS[-1]}s+")
+    return {
+        "posts": len(durations),
+        "seconds": {
+            f"p{p}": _rounded(value, 1)
+            for p, value in zip(
+                PERCENTILES,
+                np.percentile(durations, PERCENTILES) if len(durations) else [np.nan] * 4,
+                strict=True,
+            )
+        },
+        "bins": {
+            label: {
+                "posts": int(posts[index]),
+                "median_engagement_rate": _rounded(rates[index, 0], 5),
+            }
+            for index, label in enumerate(labels)
+        },
+    }
+
+
+def analyze(columns: Columns, min_posts: int = DEFAULT_MIN_POSTS) -> dict[str, Any]:
+    """Every report, keyed by the file name (without ``.json``) it's written to."""
+    rate = engagement_rate(columns)
+    plays = columns.stats[:, 0]
+    rows = np.arange(len(columns))
+    return {
+        "engagement_hashtagName": engagement_by(
+            csr_rows(columns.hashtag_ptr),
+            columns.hashtag_ids,
+            columns.hashtags.names,
+            plays,
+            rate,
+            min_posts,
+        ),
+        "engagement_uniqueId": engagement_by(
+            rows, columns.author_ids, columns.authors.names, plays, rate, min_posts
+        ),
+        "engagement_diversificationLabels": engagement_by(
+            csr_rows(columns.label_ptr),
+            columns.label_ids,
+            columns.labels.names,
+            plays,
+            rate,
+            min_posts,
+        ),
+        "posts_by_week": posts_by_week(columns, rate),
+        "duration_distribution": duration_distribution(columns, rate),
+    }
+
+
+def write_reports(reports: dict[str, Any], json_output_dir: Path) -> None:
+    json_output_dir.mkdir(parents=True, exist_ok=True)
+    for name, report in reports.items():
+        with (json_output_dir / f"{name}.json").open("w", encoding="utf-8") as file:
+            json.dump(report, file, ensure_ascii=False, indent=4)
+
+
+def main(
+    json_file_path: str,
+    output_dir: str,
+    db_path: str | None = None,
+    min_posts: int = DEFAULT_MIN_POSTS,
+) -> None:
+    posts = load_db(db_path) if db_path else iter_posts(json_file_path)
+    columns = load_columns(posts)
+    json_output_dir = Path(output_dir) / "json_output_directory"
+    write_reports(analyze(columns, min_posts), json_output_dir)
+    log.success(f"Analyzed {len(columns)} posts into {json_output_dir}")
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--input", default=str(DEFAULT_INPUT), help="scraped post_data.json (or .jsonl log)"
+    )
+    parser.add_argument("--db", help="read posts from the scraper's post_data.db instead")
+    parser.add_argument(
+        "--output-dir", default=str(DEFAULT_OUTPUT_DIR), help="where the frequency tables live"
+    )
+    parser.add_argument(
+        "--min-posts",
+        type=int,
+        default=DEFAULT_MIN_POSTS,
+        help="leave out hashtags/authors/labels on fewer posts than this",
+    )
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    _args = parse_args()
+    main(_args.input, _args.output_dir, _args.db, _args.min_posts)
@@ -0,0 +1,236 @@
+"""Which hashtags show up together: co-occurrence counts and PMI for the top pairs.
+
+``hashtagName.json`` counts each hashtag on its own; this keeps the per-post
+grouping. Hashtags are mapped to integer IDs and the posts loaded as a sparse
+post x hashtag incidence structure (CSR: per-post offsets into one sorted,
+de-duplicated ID array -- a hashtag repeated in a post counts once). Every pair
+within a post is then generated with array arithmetic, encoded as a single
+integer ``a * n_hashtags + b`` (``a < b``) and counted with ``np.unique``, in
+blocks of posts so memory follows the number of distinct pairs, never a dense
+hashtag x hashtag matrix.
+
+For each pair the report gives the number of posts with both, and the pointwise
+mutual information ``log(posts_ab * posts / (posts_a * posts_b))`` -- how much
+more often they appear together than chance would have it -- plus its normalized
+form in [-1, 1]. Two top-K lists are written: the most frequent pairs, and the
+highest-PMI pairs among those on at least ``--min-count`` posts (PMI on its
+own favors pairs seen once). The report goes next to ``hashtagName.json``:
+``scraper_data/post_processing/json_output_directory/hashtag_cooccurrence.json``.
+
+    python post_processing/hashtag_cooccurrence.py
+    python post_processing/hashtag_cooccurrence.py --top 200 --min-count 10
+    python post_processing/hashtag_cooccurrence.py --db scraper_data/scraper_output/post_data.db
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+from loguru import logger as log
+
+try:
+    from post_processing.engagement_analytics import Columns, csr_rows, load_columns
+    from post_processing.post_data_collection import (
+        DEFAULT_INPUT,
+        DEFAULT_OUTPUT_DIR,
+        iter_posts,
+        load_db,
+    )
+except ModuleNotFoundError:  # run as a script: post_processing/ itself is on sys.path
+    from engagement_analytics import Columns, csr_rows, load_columns  # type: ignore[no-redef]
+    from post_data_collection import (  # type: ignore[no-redef]
+        DEFAULT_INPUT,
+        DEFAULT_OUTPUT_DIR,
+        iter_posts,
+        load_db,
+    )
+
+DEFAULT_TOP = 100
+DEFAULT_MIN_COUNT = 5
+# Pairs generated per block; bounds the temporary arrays, not the result.
+BLOCK_PAIRS = 4_000_000
+# count_frequencies' stand-in for a textExtra without a hashtag (e.g. a mention).
+_PLACEHOLDER = "Unknown"
+
+
+@dataclass
+class Cooccurrence:
+    """Every hashtag pair seen together, as parallel arrays sorted by (first, second)."""
+
+    first: np.ndarray  # int64 hashtag IDs, first < second
+    second: np.ndarray
+    posts: np.ndarray  # int64: posts with both
+    hashtag_posts: np.ndarray  # int64 per hashtag ID: posts with it
+    total_posts: int
+
+    def pmi(self) -> np.ndarray:
+        """log(P(a, b) / (P(a) P(b))) per pair."""
+        expected = self.hashtag_posts[self.first] * self.hashtag_posts[self.second]
+        return np.log(self.posts * self.total_posts / expected)
+
+    def npmi(self) -> np.ndarray:
+        """PMI normalized by -log P(a, b): 1 for pairs that only ever appear together."""
+        joint = -np.log(self.posts / self.total_posts)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(joint > 0, self.pmi() / joint, 1.0)
+
+
+def hashtag_sets(columns: Columns) -> tuple[np.ndarray, np.ndarray]:
+    """The post x hashtag incidence in CSR form: ``(ptr, ids)`` with each post's
+    hashtags sorted and de-duplicated, and the placeholder for a missing name dropped."""
+    n_hashtags = len(columns.hashtags)
+    rows, ids = csr_rows(columns.hashtag_ptr), columns.hashtag_ids
+    placeholder = columns.hashtags.ids.get(_PLACEHOLDER)
+    if placeholder is not None:
+        keep = ids != placeholder
+        rows, ids = rows[keep], ids[keep]
+    # One sort of (post, hashtag) codes both orders and de-duplicates every post.
+    codes = np.unique(rows * n_hashtags + ids)
+    rows, ids = np.divmod(codes, max(n_hashtags, 1))
+    ptr = np.concatenate(([0], np.cumsum(np.bincount(rows, minlength=len(columns)))))
+    return ptr, ids
+
+
+def _pair_codes(
+    ptr: np.ndarray, ids: np.ndarray, start: int, end: int, n_hashtags: int
+) -> np.ndarray:
+    """``a * n_hashtags + b`` for every pair within posts ``start:end``.
+
+    Entry ``g`` of a post ending at ``row_end`` pairs with entries ``g+1 ..
+    row_end-1``; the partner indices come from one ``repeat`` and an ``arange``.
+    """
+    lengths = np.diff(ptr[start : end + 1])
+    entries = np.arange(ptr[start], ptr[end])
+    partners = np.repeat(ptr[start + 1 : end + 1], lengths) - entries - 1
+    firsts = np.repeat(entries, partners)
+    offsets = np.arange(len(firsts)) - np.repeat(np.cumsum(partners) - partners, partners)
+    return ids[firsts] * n_hashtags + ids[firsts + 1 + offsets]
+
+
+def cooccurrence(columns: Columns, block_pairs: int = BLOCK_PAIRS) -> Cooccurrence:
+    """Count every hashtag pair over the posts, a block of posts at a time."""
+    n_hashtags = len(columns.hashtags)
+    ptr, ids = hashtag_sets(columns)
+    lengths = np.diff(ptr)
+    pairs_before = np.concatenate(([0], np.cumsum(lengths * (lengths - 1) // 2)))
+    codes = np.empty(0, dtype=np.int64)
+    counts = np.empty(0, dtype=np.int64)
+    start = 0
+    while start < len(columns):
+        end = int(np.searchsorted(pairs_before, pairs_before[start] + block_pairs, side="right"))
+        end = min(max(end - 1, start + 1), len(columns))
+        block, block_counts = np.unique(
+            _pair_codes(ptr, ids, start, end, n_hashtags), return_counts=True
+        )
+        merged, inverse = np.unique(np.concatenate((codes, block)), return_inverse=True)
+        counts = np.bincount(
+            inverse, weights=np.concatenate((counts, block_counts)), minlength=len(merged)
+        ).astype(np.int64)
+        codes = merged
+        start = end
+    first, second = np.divmod(codes, max(n_hashtags, 1))
+    return Cooccurrence(
+        first=first,
+        second=second,
+        posts=counts,
+        hashtag_posts=np.bincount(ids, minlength=n_hashtags),
+        total_posts=len(columns),
+    )
+
+
+def _rows(
+    pairs: Cooccurrence, names: list[str], picks: np.ndarray, pmi: np.ndarray, npmi: np.ndarray
+) -> list[dict[str, Any]]:
+    return [
+        {
+            "hashtags": [names[pairs.first[pick]], names[pairs.second[pick]]],
+            "posts": int(pairs.posts[pick]),
+            "pmi": round(float(pmi[pick]), 4),
+            "npmi": round(float(npmi[pick]), 4),
+        }
+        for pick in picks
+    ]
+
+
+def report(
+    pairs: Cooccurrence,
+    names: list[str],
+    top: int = DEFAULT_TOP,
+    min_count: int = DEFAULT_MIN_COUNT,
+) -> dict[str, Any]:
+    """The top ``top`` pairs by post count, and by PMI among pairs on ``min_count``+ posts."""
+    # lexsort's last key sorts first; the pair IDs make ties come out the same every run.
+    by_count = np.lexsort((pairs.second, pairs.first, -pairs.posts))[:top]
+    pmi, npmi = pairs.pmi(), pairs.npmi()
+    supported = np.flatnonzero(pairs.posts >= min_count)
+    by_pmi = supported[
+        np.lexsort(
+            (
+                pairs.second[supported],
+                pairs.first[supported],
+                -pairs.posts[supported],
+                -pmi[supported],
+            )
+        )
+    ][:top]
+    return {
+        "posts": pairs.total_posts,
+        "hashtags": int(np.count_nonzero(pairs.hashtag_posts)),
+        "pairs": len(pairs.posts),
+        "top_by_posts": _rows(pairs, names, by_count, pmi, npmi),
+        "top_by_pmi": _rows(pairs, names, by_pmi, pmi, npmi),
+    }
+
+
+def main(
+    json_file_path: str,
+    output_dir: str,
+    db_path: str | None = None,
+    top: int = DEFAULT_TOP,
+    min_count: int = DEFAULT_MIN_COUNT,
+) -> None:
+    posts = load_db(db_path) if db_path else iter_posts(json_file_path)
+    columns = load_columns(posts)
+    pairs = cooccurrence(columns)
+    json_output_dir = Path(output_dir) / "json_output_directory"
+    json_output_dir.mkdir(parents=True, exist_ok=True)
+    output_file = json_output_dir / "hashtag_cooccurrence.json"
+    with output_file.open("w", encoding="utf-8") as file:
+        json.dump(
+            report(pairs, columns.hashtags.names, top, min_count),
+            file,
+            ensure_ascii=False,
+            indent=4,
+        )
+    log.success(
+        f"Counted {len(pairs.posts)} hashtag pairs over {len(columns)} posts into {output_file}"
+    )
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--input", default=str(DEFAULT_INPUT), help="scraped post_data.json (or .jsonl log)"
+    )
+    parser.add_argument("--db", help="read posts from the scraper's post_data.db instead")
+    parser.add_argument(
+        "--output-dir", default=str(DEFAULT_OUTPUT_DIR), help="where the frequency tables live"
+    )
+    parser.add_argument("--top", type=int, default=DEFAULT_TOP, help="pairs per list")
+    parser.add_argument(
+        "--min-count",
+        type=int,
+        default=DEFAULT_MIN_COUNT,
+        help="posts a pair needs to be ranked by PMI",
+    )
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    _args = parse_args()
+    main(_args.input, _args.output_dir, _args.db, _args.top, _args.min_count)
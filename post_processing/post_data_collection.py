@@ -4,24 +4,60 @@ Reads the raw scrape (``scraper_data/scraper_output/post_data.json`` by default)
 and writes per-field frequency tables -- authors, verified flag, location,
 diversification labels, suggested words, and hashtags -- as both ``.txt`` and
 ``.json`` under ``scraper_data/post_processing/``. ``data_processor.py`` reads
-the hashtag and verified tables from here.
+the hashtag and verified tables from here. With ``--db`` it counts the scraper's
+SQLite store (``--storage sqlite``) instead, with ``GROUP BY`` queries inside
+SQLite (``count_db``) rather than loading each post.
+
+Posts are streamed into the counters one at a time -- the JSON array is parsed
+incrementally, and a ``.jsonl`` input (the scraper's ``--storage jsonl`` log) is
+read line by line -- so memory stays flat however big the scrape is. The tables
+come out the same as from loading the whole file.
+
+With ``--state`` the counts are kept in a state file, along with the IDs of the
+posts counted and how far into the input they go, and each run reads and folds
+in only the posts not counted yet; ``--merge``
+writes the tables from several such states added together. With ``--workers N``
+the input is split into chunks that ``N`` processes read, parse and count in
+parallel, merging the partial counts in order.
 
     python post_processing/post_data_collection.py
     python post_processing/post_data_collection.py --input path/to/post_data.json
+    python post_processing/post_data_collection.py --input path/to/post_data.jsonl
+    python post_processing/post_data_collection.py --db scraper_data/scraper_output/post_data.db
+    python post_processing/post_data_collection.py --state scraper_data/frequency_state.json
+    python post_processing/post_data_collection.py --merge alice_state.json bob_state.json
+    python post_processing/post_data_collection.py --workers 8
 """
 
 from __future__ import annotations
 
 import argparse
+import itertools
 import json
+import re
+import sqlite3
 from collections import Counter
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Any
+from typing import Any, BinaryIO
 
+import ijson
 from loguru import logger as log
 
 DEFAULT_INPUT = Path("scraper_data") / "scraper_output" / "post_data.json"
 DEFAULT_OUTPUT_DIR = Path("scraper_data") / "post_processing"
+# --workers chunk sizes: bytes of an indented post_data.json, or posts otherwise.
+DEFAULT_CHUNK_BYTES = 8 * 1024 * 1024
+DEFAULT_CHUNK_POSTS = 5000
+
+_LEADING_ID = re.compile(rb'\{"id": ?"([^"\\]*)"')
+# How the scraper writes post_data.json (indent=2): every top-level post starts
+# on a line of its own that is exactly "  {", and no string can hold a newline.
+_INDENTED_START = b"[\n  {\n"
+_POST_START = b"\n  {\n"
+# The start of each post in a json_chunks range, with its ID when that comes first.
+_POST_HEAD = re.compile(rb'\n  \{\n(?: {4}"id": "([^"\\]*)")?')
 
 
 def load_json(file_path: str) -> list[dict[str, Any]]:
@@ -29,8 +65,119 @@ def load_json(file_path: str) -> list[dict[str, Any]]:
         return json.load(file)
 
 
-def count_frequencies(data: list[dict[str, Any]]) -> dict[str, Counter]:
-    """Count occurrences of each field value across all posts."""
+def iter_json(file_path: str) -> Iterator[dict[str, Any]]:
+    """The posts of a ``post_data.json`` array, parsed one at a time."""
+    with Path(file_path).open("rb") as file:
+        yield from ijson.items(file, "item", use_float=True)
+
+
+def jsonl_offsets(file_path: str) -> list[int]:
+    """Byte offsets of the lines of a scraper ``.jsonl`` log that ``--compact`` keeps.
+
+    A refreshed post is logged again further down; like ``compact_log``, it
+    keeps its first position with its latest data, so the offsets come in the
+    order posts were first seen, each pointing at that post's latest line. The
+    scraper writes the ID first, so it's read off the start of the line; only
+    lines that don't start that way (or don't end, i.e. a torn tail) get parsed.
+    """
+    return list(_scan_jsonl(file_path)[0].values())
+
+
+def _scan_jsonl(
+    file_path: str, start: int = 0, first_index: int = 0
+) -> tuple[dict[str, int], int, int]:
+    """``jsonl_offsets`` for the lines from byte ``start`` on (line ``first_index``),
+    keyed by post, plus the byte offset and line index just past the last whole line."""
+    latest: dict[str, int] = {}
+    end, lines = start, first_index
+    with Path(file_path).open("rb") as file:
+        file.seek(start)
+        offset = start
+        for index, line in enumerate(file, first_index):
+            match = _LEADING_ID.match(line)
+            if match and line.endswith(b"\n"):
+                latest[match.group(1).decode() or f"#{index}"] = offset
+            else:
+                try:
+                    post_id = json.loads(line).get("id")
+                except json.JSONDecodeError:
+                    # Only the final line can be torn (crash mid-append); skip it.
+                    log.warning(f"Skipping unreadable line in {file_path}")
+                else:
+                    latest[post_id or f"#{index}"] = offset
+            offset += len(line)
+            if line.endswith(b"\n"):
+                end, lines = offset, index + 1
+    return latest, end, lines
+
+
+def _read_lines(file_path: str, offsets: Iterable[int]) -> Iterator[dict[str, Any]]:
+    with Path(file_path).open("rb") as file:
+        for offset in offsets:
+            file.seek(offset)
+            try:
+                yield json.loads(file.readline())
+            except json.JSONDecodeError:
+                log.warning(f"Skipping unreadable line in {file_path}")
+
+
+def iter_jsonl(file_path: str) -> Iterator[dict[str, Any]]:
+    """The posts of a scraper ``.jsonl`` log, as ``--compact`` would write them.
+
+    A first pass notes only each post's latest line (``jsonl_offsets``), so just
+    the IDs are ever held in memory; the second reads those lines back.
+    """
+    return _read_lines(file_path, jsonl_offsets(file_path))
+
+
+def iter_posts(file_path: str) -> Iterator[dict[str, Any]]:
+    """Stream the posts of a scrape: a JSON array, or a ``.jsonl`` log."""
+    if Path(file_path).suffix == ".jsonl":
+        return iter_jsonl(file_path)
+    return iter_json(file_path)
+
+
+def _connect_read_only(db_path: str) -> sqlite3.Connection:
+    return sqlite3.connect(f"file:{Path(db_path).as_posix()}?mode=ro", uri=True)
+
+
+def load_db(db_path: str, rowids: tuple[int, int] | None = None) -> Iterator[dict[str, Any]]:
+    """Posts from the scraper's SQLite store, in the order they were first scraped
+    (only rows ``low <= rowid < high`` with ``rowids=(low, high)``)."""
+    low, high = rowids or (-(2**63), 2**63 - 1)
+    connection = _connect_read_only(db_path)
+    try:
+        rows = connection.execute(
+            "SELECT data FROM posts WHERE rowid >= ? AND rowid < ? ORDER BY rowid", (low, high)
+        )
+        for (data,) in rows:
+            yield json.loads(data)
+    finally:
+        connection.close()
+
+
+def hashtag_names(post: dict[str, Any]) -> list[str]:
+    """The post's ``textExtra`` hashtag names, repeats kept, in order.
+
+    An entry without a name -- missing, null or empty, as a mention's is --
+    counts as "Unknown". Every consumer (the frequency tables, the SQLite
+    store's hashtag table, the engagement columns) goes through here so their
+    counts agree.
+    """
+    return [
+        text_extra.get("hashtagName") or "Unknown"
+        for content in post.get("contents") or []
+        for text_extra in content.get("textExtra") or []
+    ]
+
+
+def diversification_labels(post: dict[str, Any]) -> list[str]:
+    """The post's diversification labels, null and empty ones dropped."""
+    return [label for label in post.get("diversificationLabels") or [] if label]
+
+
+def count_frequencies(data: Iterable[dict[str, Any]]) -> dict[str, Counter]:
+    """Count occurrences of each field value across all posts, consuming them once."""
     unique_id_counter: Counter[str] = Counter()
     verified_counter: Counter[bool] = Counter()
     location_created_counter: Counter[str] = Counter()
@@ -49,15 +196,12 @@ def count_frequencies(data: list[dict[str, Any]]) -> dict[str, Counter]:
 
         location_created_counter[item.get("locationCreated", "Unknown")] += 1
 
-        for label in item.get("diversificationLabels") or []:
-            diversification_labels_counter[label] += 1
+        diversification_labels_counter.update(diversification_labels(item))
 
         for word in item.get("suggestedWords") or []:
             suggested_words_counter[word] += 1
 
-        for content in item.get("contents") or []:
-            for text_extra in content.get("textExtra") or []:
-                hashtag_name_counter[text_extra.get("hashtagName", "Unknown")] += 1
+        hashtag_name_counter.update(hashtag_names(item))
 
     return {
         "uniqueId": unique_id_counter,
@@ -69,6 +213,344 @@ def count_frequencies(data: list[dict[str, Any]]) -> dict[str, Counter]:
     }
 
 
+# count_db's SQL for what count_frequencies reads off each post. Fields with one
+# value per post, from the stored JSON: a missing key counts as its default, an
+# explicit null as None (json_type is NULL only when the key is missing).
+_DB_POST_FIELDS = {
+    "uniqueId": "CASE WHEN json_type(data, '$.author.uniqueId') IS NULL THEN 'Unknown' "
+    "ELSE json_extract(data, '$.author.uniqueId') END",
+    "verified": "CASE WHEN json_type(data, '$.author.verified') IS NULL THEN 0 "
+    "ELSE json_extract(data, '$.author.verified') END",
+    "locationCreated": "CASE WHEN json_type(data, '$.locationCreated') IS NULL THEN 'Unknown' "
+    "ELSE json_extract(data, '$.locationCreated') END",
+}
+# Fields with a list per post, as (value, position in the post's list, source).
+_DB_LIST_FIELDS = {
+    "diversificationLabels": (
+        "labels.name",
+        "post_labels.position",
+        "post_labels JOIN labels ON labels.id = post_labels.label_id "
+        "JOIN posts ON posts.id = post_labels.post_id",
+    ),
+    "suggestedWords": (
+        "word.value",
+        "word.key",
+        "posts JOIN json_each(posts.data, '$.suggestedWords') AS word "
+        "ON json_type(posts.data, '$.suggestedWords') = 'array'",
+    ),
+    "hashtagName": (
+        "hashtags.name",
+        "post_hashtags.position",
+        "post_hashtags JOIN hashtags ON hashtags.id = post_hashtags.hashtag_id "
+        "JOIN posts ON posts.id = post_hashtags.post_id",
+    ),
+}
+
+
+def count_db(db_path: str, rowids: tuple[int, int] | None = None) -> dict[str, Counter]:
+    """``count_frequencies`` of the posts ``load_db`` yields, counted by SQLite.
+
+    Hashtags and labels are counted with ``GROUP BY`` over the store's indexed
+    tables, the other fields over the stored JSON, so no post is parsed in
+    Python. Values come out in the order ``count_frequencies`` would first meet
+    them, so the tables break ties the same way.
+    """
+    low, high = rowids or (-(2**63), 2**63 - 1)
+    frequencies = count_frequencies(())
+    connection = _connect_read_only(db_path)
+    try:
+        for key, value in _DB_POST_FIELDS.items():
+            rows = connection.execute(
+                f"SELECT {value}, COUNT(*) FROM posts WHERE rowid >= ? AND rowid < ? "  # noqa: S608
+                "GROUP BY 1 ORDER BY MIN(rowid)",
+                (low, high),
+            )
+            counts = dict(rows)
+            if key == "verified":  # JSON true/false come back as 1/0; the keys are bools
+                counts = {bool(v) if v in (0, 1) else v: count for v, count in counts.items()}
+            frequencies[key].update(counts)
+        for key, (value, position, source) in _DB_LIST_FIELDS.items():
+            # Per value: its uses, and the post (then position) it first appears
+            # at. "position" is a bare column, taken from the MIN(post) row.
+            rows = connection.execute(
+                "SELECT item, SUM(uses), MIN(post) AS first, position FROM ("  # noqa: S608
+                f"SELECT {value} AS item, posts.rowid AS post, MIN({position}) AS position, "
+                f"COUNT(*) AS uses FROM {source} "
+                "WHERE posts.rowid >= ? AND posts.rowid < ? GROUP BY post, item"
+                ") GROUP BY item ORDER BY first, position",
+                (low, high),
+            )
+            frequencies[key].update({item: uses for item, uses, _, _ in rows})
+    finally:
+        connection.close()
+    return frequencies
+
+
+def _next_post_start(file: BinaryIO, position: int) -> int | None:
+    """Offset of the first top-level post starting after ``position``, if any."""
+    file.seek(position)
+    carry = b""
+    while block := file.read(1 << 20):
+        data = carry + block
+        found = data.find(_POST_START)
+        if found != -1:
+            return position - len(carry) + found + 1
+        position += len(block)
+        carry = data[-(len(_POST_START) - 1) :]
+    return None
+
+
+def json_chunks(file_path: str, chunk_bytes: int = DEFAULT_CHUNK_BYTES) -> list[tuple[int, int]]:
+    """Byte ranges of about ``chunk_bytes`` holding whole posts of an indented
+    ``post_data.json``, found without parsing it; empty if the file isn't laid
+    out the way the scraper writes it."""
+    path = Path(file_path)
+    size = path.stat().st_size
+    with path.open("rb") as file:
+        if file.read(len(_INDENTED_START)) != _INDENTED_START:
+            return []
+        starts = [len(_INDENTED_START) - len(_POST_START) + 1]
+        while (start := _next_post_start(file, starts[-1] + chunk_bytes)) is not None:
+            starts.append(start)
+    return list(zip(starts, [*starts[1:], size], strict=True))
+
+
+def _json_range(file_path: str, start: int, end: int) -> bytes:
+    """The posts in a ``json_chunks`` range, comma-separated, without the brackets."""
+    with Path(file_path).open("rb") as file:
+        file.seek(start)
+        body = file.read(end - start).rstrip()
+    # The last range ends with the array's closing bracket, the others with a comma.
+    return body.removesuffix(b"]").rstrip().removesuffix(b",")
+
+
+def _count_json_range(file_path: str, start: int, end: int) -> dict[str, Counter]:
+    return count_frequencies(json.loads(b"[" + _json_range(file_path, start, end) + b"]"))
+
+
+def _count_jsonl_lines(file_path: str, offsets: list[int]) -> dict[str, Counter]:
+    return count_frequencies(_read_lines(file_path, offsets))
+
+
+def _count_db_rows(db_path: str, low: int, high: int) -> dict[str, Counter]:
+    return count_db(db_path, (low, high))
+
+
+def count_frequencies_parallel(
+    json_file_path: str,
+    workers: int,
+    db_path: str | None = None,
+    *,
+    chunk_bytes: int = DEFAULT_CHUNK_BYTES,
+    chunk_posts: int = DEFAULT_CHUNK_POSTS,
+) -> dict[str, Counter]:
+    """``count_frequencies`` over the input, map-reduce style across ``workers`` processes.
+
+    The input is split into chunks -- byte ranges of the scraper's indented
+    ``post_data.json``, batches of ``.jsonl`` lines, or rowid ranges of the
+    database -- and each worker reads and parses its own chunks, which is most
+    of the work. The partial counters are merged in chunk order, so the tables
+    tie-break exactly as a single-process count would. A JSON file in any other
+    layout is counted in this process instead.
+    """
+    with ProcessPoolExecutor(workers) as pool:
+        if db_path:
+            connection = _connect_read_only(db_path)
+            try:
+                first, last = connection.execute(
+                    "SELECT MIN(rowid), MAX(rowid) FROM posts"
+                ).fetchone()
+            finally:
+                connection.close()
+            lows = range(first or 0, (last or -1) + 1, chunk_posts)
+            partials = pool.map(
+                _count_db_rows,
+                itertools.repeat(db_path),
+                lows,
+                [low + chunk_posts for low in lows],
+            )
+        elif Path(json_file_path).suffix == ".jsonl":
+            offsets = jsonl_offsets(json_file_path)
+            batches = [offsets[i : i + chunk_posts] for i in range(0, len(offsets), chunk_posts)]
+            partials = pool.map(_count_jsonl_lines, itertools.repeat(json_file_path), batches)
+        elif ranges := json_chunks(json_file_path, chunk_bytes):
+            starts, ends = zip(*ranges, strict=True)
+            partials = pool.map(_count_json_range, itertools.repeat(json_file_path), starts, ends)
+        else:
+            log.info(f"{json_file_path} isn't laid out as the scraper writes it; one process it is")
+            return count_frequencies(iter_posts(json_file_path))
+
+        frequencies = count_frequencies(())
+        for partial in partials:
+            for key, counter in partial.items():
+                frequencies[key].update(counter)
+    return frequencies
+
+
+class FrequencyState:
+    """The frequency counters plus the IDs of every post counted into them.
+
+    ``fold`` counts only posts it hasn't seen, and ``fold_input`` doesn't even
+    parse the ones it can tell are counted, so a weekly run costs the new posts,
+    not the whole scrape; ``merge`` adds another state's counts (another shard
+    or account). Saved as one JSON file, with each counter kept as ``[value,
+    count]`` pairs in insertion order: the tables then break ties exactly as a
+    full recount would, and ``verified`` keeps its bool keys.
+    """
+
+    def __init__(self) -> None:
+        self.frequencies = count_frequencies(())
+        self.post_ids: set[str] = set()
+        # Per input file: how far its counted prefix goes -- [bytes, lines] of a
+        # .jsonl log, [rowid] of a database.
+        self.watermarks: dict[str, list[int]] = {}
+
+    @classmethod
+    def load(cls, path: Path) -> FrequencyState:
+        """The state saved at ``path``; an empty one if there's no file yet."""
+        state = cls()
+        if not path.exists():
+            return state
+        with path.open(encoding="utf-8") as file:
+            saved = json.load(file)
+        state.post_ids = set(saved["post_ids"])
+        state.watermarks = saved.get("watermarks", {})
+        for key, pairs in saved["counters"].items():
+            state.frequencies[key] = Counter(dict(pairs))
+        return state
+
+    def fold(self, posts: Iterable[dict[str, Any]]) -> int:
+        """Count the posts not counted before; returns how many there were.
+
+        A post is known by its ID, or failing that by its position in the
+        input (as ``--compact`` does), so new posts must be appended after the
+        ones already counted -- which is how every scraper store grows.
+        """
+        return self._fold((post.get("id") or f"#{index}", post) for index, post in enumerate(posts))
+
+    def _fold(self, keyed_posts: Iterable[tuple[str, dict[str, Any]]]) -> int:
+        known = len(self.post_ids)
+
+        def unseen() -> Iterator[dict[str, Any]]:
+            for key, post in keyed_posts:
+                if key not in self.post_ids:
+                    self.post_ids.add(key)
+                    yield post
+
+        new = count_frequencies(unseen())
+        for key, counter in new.items():
+            self.frequencies[key].update(counter)
+        return len(self.post_ids) - known
+
+    def fold_input(
+        self,
+        json_file_path: str,
+        db_path: str | None = None,
+        *,
+        chunk_bytes: int = DEFAULT_CHUNK_BYTES,
+    ) -> int:
+        """``fold`` the posts of a scrape, parsing only the ones that can be new.
+
+        A ``.jsonl`` log and the database only grow at the end (a refreshed post
+        is logged again, or updated in its row), so the state keeps a watermark
+        for each and reads only past it. Of the rest -- and of a
+        ``post_data.json``, which is rewritten whole on every checkpoint -- posts
+        whose ID, read off the raw text, is already counted are never parsed.
+        """
+        if db_path:
+            keyed_posts = self._new_db_posts(db_path)
+        elif Path(json_file_path).suffix == ".jsonl":
+            keyed_posts = self._new_jsonl_posts(json_file_path)
+        elif chunks := json_chunks(json_file_path, chunk_bytes):
+            keyed_posts = self._new_json_posts(json_file_path, chunks)
+        else:
+            return self.fold(iter_json(json_file_path))
+        return self._fold(keyed_posts)
+
+    def _new_jsonl_posts(self, file_path: str) -> Iterator[tuple[str, dict[str, Any]]]:
+        path = Path(file_path)
+        mark = str(path.resolve())
+        start, first_index = self.watermarks.get(mark, [0, 0])
+        if start > path.stat().st_size:  # the log was replaced; start over
+            start, first_index = 0, 0
+        latest, end, lines = _scan_jsonl(file_path, start, first_index)
+        self.watermarks[mark] = [end, lines]
+        new = [(key, offset) for key, offset in latest.items() if key not in self.post_ids]
+
+        def read() -> Iterator[tuple[str, dict[str, Any]]]:
+            with path.open("rb") as file:
+                for key, offset in new:
+                    file.seek(offset)
+                    try:
+                        yield key, json.loads(file.readline())
+                    except json.JSONDecodeError:
+                        log.warning(f"Skipping unreadable line in {file_path}")
+
+        return read()
+
+    def _new_db_posts(self, db_path: str) -> Iterator[tuple[str, dict[str, Any]]]:
+        mark = str(Path(db_path).resolve())
+        connection = _connect_read_only(db_path)
+        (last,) = connection.execute("SELECT MAX(rowid) FROM posts").fetchone()
+        (after,) = self.watermarks.get(mark, [0])
+        if after > (last or 0):  # the database was replaced; start over
+            after = 0
+        self.watermarks[mark] = [last or 0]
+
+        def read() -> Iterator[tuple[str, dict[str, Any]]]:
+            try:
+                rows = connection.execute(
+                    "SELECT id, data FROM posts WHERE rowid > ? AND rowid <= ? ORDER BY rowid",
+                    (after, last or 0),
+                )
+                for post_id, data in rows:
+                    if post_id not in self.post_ids:
+                        yield post_id, json.loads(data)
+            finally:
+                connection.close()
+
+        return read()
+
+    def _new_json_posts(
+        self, file_path: str, chunks: list[tuple[int, int]]
+    ) -> Iterator[tuple[str, dict[str, Any]]]:
+        index = 0
+        for start, end in chunks:
+            body = _json_range(file_path, start, end)
+            post_ids = _POST_HEAD.findall(b"\n" + body)
+            if all(post_id and post_id.decode() in self.post_ids for post_id in post_ids):
+                index += len(post_ids)
+                continue
+            for post in json.loads(b"[" + body + b"]"):
+                yield post.get("id") or f"#{index}", post
+                index += 1
+
+    def merge(self, other: FrequencyState) -> int:
+        """Add ``other``'s counts to these; returns how many posts both had counted
+        (those stay counted once per state: the counters can't tell them apart)."""
+        overlap = len(self.post_ids & other.post_ids)
+        for key, counter in other.frequencies.items():
+            self.frequencies.setdefault(key, Counter()).update(counter)
+        self.post_ids |= other.post_ids
+        # Either state's counted prefix of an input is counted here too.
+        for mark, position in other.watermarks.items():
+            self.watermarks[mark] = max(self.watermarks.get(mark, position), position)
+        return overlap
+
+    def save(self, path: Path) -> None:
+        """Write the state atomically (temp file + rename)."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        state = {
+            "post_ids": sorted(self.post_ids),
+            "watermarks": self.watermarks,
+            "counters": {key: list(counter.items()) for key, counter in self.frequencies.items()},
+        }
+        tmp = path.with_name(path.name + ".tmp")
+        with tmp.open("w", encoding="utf-8") as file:
+            json.dump(state, file, ensure_ascii=False, separators=(",", ":"))
+        tmp.replace(path)
+
+
 def write_frequencies_to_text_files(frequencies: dict[str, Counter], output_dir: str) -> None:
     output_path = Path(output_dir)
     output_path.mkdir(parents=True, exist_ok=True)
@@ -86,27 +568,91 @@ def write_frequencies_to_json_files(frequencies: dict[str, Counter], json_output
             json.dump(dict(counter.most_common()), file, ensure_ascii=False, indent=4)
 
 
-def main(json_file_path: str, output_dir: str) -> None:
+def main(
+    json_file_path: str,
+    output_dir: str,
+    db_path: str | None = None,
+    *,
+    state_path: str | None = None,
+    merge_paths: list[str] | None = None,
+    workers: int = 1,
+) -> None:
     parent_dir = Path(output_dir)
     text_output_dir = parent_dir / "output_directory"
     json_output_dir = parent_dir / "json_output_directory"
 
-    data = load_json(json_file_path)
-    frequencies = count_frequencies(data)
+    if merge_paths:
+        state = FrequencyState()
+        for path in merge_paths:
+            overlap = state.merge(FrequencyState.load(Path(path)))
+            if overlap:
+                log.warning(f"{overlap} posts in {path} were already counted in another state")
+        if state_path:
+            state.save(Path(state_path))
+        frequencies = state.frequencies
+    elif workers > 1:
+        frequencies = count_frequencies_parallel(json_file_path, workers, db_path)
+    elif state_path:
+        state = FrequencyState.load(Path(state_path))
+        added = state.fold_input(json_file_path, db_path)
+        state.save(Path(state_path))
+        log.info(f"Folded {added} new posts into {state_path}")
+        frequencies = state.frequencies
+    else:
+        frequencies = (
+            count_db(db_path) if db_path else count_frequencies(iter_posts(json_file_path))
+        )
     write_frequencies_to_text_files(frequencies, str(text_output_dir))
     write_frequencies_to_json_files(frequencies, str(json_output_dir))
-    log.success(f"Counted {len(data)} posts into {parent_dir}")
+    # Every post adds exactly one to the verified table.
+    log.success(f"Counted {frequencies['verified'].total()} posts into {parent_dir}")
+
+
+def _positive_int(value: str) -> int:
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be a positive integer, got {value!r}")
+    return number
 
 
 def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
     parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
-    parser.add_argument("--input", default=str(DEFAULT_INPUT), help="scraped post_data.json")
+    parser.add_argument(
+        "--input", default=str(DEFAULT_INPUT), help="scraped post_data.json (or .jsonl log)"
+    )
+    parser.add_argument("--db", help="read posts from the scraper's post_data.db instead")
     parser.add_argument(
         "--output-dir", default=str(DEFAULT_OUTPUT_DIR), help="where to write the frequency tables"
     )
-    return parser.parse_args(argv)
+    parser.add_argument(
+        "--state",
+        help="keep the counts in this file and only count posts not counted there yet",
+    )
+    parser.add_argument(
+        "--merge",
+        nargs="+",
+        metavar="STATE",
+        help="write the tables from these --state files added together (shards, accounts)",
+    )
+    parser.add_argument(
+        "--workers",
+        type=_positive_int,
+        default=1,
+        help="count in this many processes, each parsing its own chunk of the input",
+    )
+    args = parser.parse_args(argv)
+    if args.workers > 1 and (args.state or args.merge):
+        parser.error("--workers counts the whole input; it doesn't combine with --state/--merge")
+    return args
 
 
 if __name__ == "__main__":
     _args = parse_args()
-    main(_args.input, _args.output_dir)
+    main(
+        _args.input,
+        _args.output_dir,
+        _args.db,
+        state_path=_args.state,
+        merge_paths=_args.merge,
+        workers=_args.workers,
+    )
@@ -0,0 +1,143 @@
+"""Several HTTP clients behind one client interface, each with its own throttle record.
+
+One ``AsyncClient`` means one connection pool, one User-Agent and one IP, so a
+single 429 streak slows everything. A ``ClientPool`` holds several clients -- each
+optionally going out through its own proxy or local source address with its own
+header profile -- and hands every request to one of them, round-robin or to the
+one throttled least recently. Each client's 403/429s are tracked separately: a
+client that gets throttled ``bench_threshold`` times within ``bench_window``
+seconds is benched for ``bench_seconds`` while the others carry on. Only when
+every client is benched do requests wait.
+
+The pool has the ``get``/``stream``/``aclose`` surface the scraper uses, so it
+drops in wherever a client is expected.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import time
+from collections import deque
+from collections.abc import AsyncIterator, Awaitable, Callable, Sequence
+from typing import Any
+
+from httpx import AsyncClient, Response
+from loguru import logger as log
+
+STRATEGIES = ("round-robin", "least-throttled")
+DEFAULT_STRATEGY = "round-robin"
+DEFAULT_BENCH_THRESHOLD = 2
+DEFAULT_BENCH_WINDOW = 60.0
+DEFAULT_BENCH_SECONDS = 120.0
+
+_THROTTLED = (403, 429)
+
+
+class _Member:
+    """One client in the pool and its throttling history."""
+
+    def __init__(self, client: AsyncClient, name: str) -> None:
+        self.client = client
+        self.name = name
+        self.throttles: deque[float] = deque()
+        self.last_throttle = float("-inf")
+        self.benched_until = 0.0
+        self.requests = 0
+
+
+class ClientPool:
+    """Schedules requests over several ``AsyncClient``s; see the module docstring.
+
+    ``names`` label the clients in logs (defaults to their position). ``clock``
+    and ``sleep`` are injectable so tests can drive benching without real waiting.
+    """
+
+    def __init__(
+        self,
+        clients: Sequence[AsyncClient],
+        *,
+        names: Sequence[str] | None = None,
+        strategy: str = DEFAULT_STRATEGY,
+        bench_threshold: int = DEFAULT_BENCH_THRESHOLD,
+        bench_window: float = DEFAULT_BENCH_WINDOW,
+        bench_seconds: float = DEFAULT_BENCH_SECONDS,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], Awaitable[None]] = asyncio.sleep,
+    ) -> None:
+        if not clients:
+            raise ValueError("ClientPool needs at least one client")
+        if strategy not in STRATEGIES:
+            raise ValueError(f"unknown strategy {strategy!r}; expected one of {STRATEGIES}")
+        names = names or [str(position) for position in range(len(clients))]
+        self._members = [_Member(client, name) for client, name in zip(clients, names, strict=True)]
+        self.strategy = strategy
+        self.bench_threshold = bench_threshold
+        self.bench_window = bench_window
+        self.bench_seconds = bench_seconds
+        self._clock = clock
+        self._sleep = sleep
+        self._next = 0
+
+    def __len__(self) -> int:
+        return len(self._members)
+
+    @property
+    def available(self) -> list[str]:
+        """Names of the clients not currently benched."""
+        now = self._clock()
+        return [member.name for member in self._members if member.benched_until <= now]
+
+    async def _pick(self) -> _Member:
+        while True:
+            now = self._clock()
+            ready = [member for member in self._members if member.benched_until <= now]
+            if ready:
+                break
+            wake = min(member.benched_until for member in self._members)
+            await self._sleep(wake - now)
+
+        if self.strategy == "least-throttled":
+            # Oldest last throttle wins; among equals, fewest requests so far, so
+            # never-throttled clients still share the load evenly.
+            member = min(ready, key=lambda m: (m.last_throttle, m.requests))
+        else:
+            # Round-robin over the whole pool, skipping benched members.
+            order = self._members[self._next :] + self._members[: self._next]
+            member = next(m for m in order if m.benched_until <= now)
+            self._next = (self._members.index(member) + 1) % len(self._members)
+        member.requests += 1
+        return member
+
+    def _record(self, member: _Member, status: int) -> None:
+        if status not in _THROTTLED:
+            return
+        now = self._clock()
+        member.last_throttle = now
+        member.throttles.append(now)
+        while member.throttles and now - member.throttles[0] > self.bench_window:
+            member.throttles.popleft()
+        if len(member.throttles) >= self.bench_threshold:
+            member.benched_until = now + self.bench_seconds
+            member.throttles.clear()
+            log.warning(
+                f"Client {member.name} throttled {self.bench_threshold}x in "
+                f"{self.bench_window:.0f}s; benched for {self.bench_seconds:.0f}s"
+            )
+
+    async def get(self, url: str, **kwargs: Any) -> Response:
+        member = await self._pick()
+        response = await member.client.get(url, **kwargs)
+        self._record(member, response.status_code)
+        return response
+
+    @contextlib.asynccontextmanager
+    async def stream(self, method: str, url: str, **kwargs: Any) -> AsyncIterator[Response]:
+        member = await self._pick()
+        async with member.client.stream(method, url, **kwargs) as response:
+            self._record(member, response.status_code)
+            yield response
+
+    async def aclose(self) -> None:
+        for member in self._members:
+            await member.client.aclose()
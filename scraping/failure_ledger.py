@@ -0,0 +1,135 @@
+"""Record of posts that failed to scrape, so resume runs don't keep re-fetching them.
+
+Deleted and private videos answer 404 (or a page with no post in it) forever, and
+without a record every resume run spends a rate-limited request on each of them
+again. The ledger keeps, per video ID, the failure's status class, the HTTP
+status, when it was last tried and how many times. Resume consults it:
+
+* ``gone`` (404/410) is permanent and skipped from then on.
+* ``empty`` (a 200 page without the post) is retried once more on the backoff
+  schedule, then treated as permanent -- once could be a glitch, twice is a
+  removed or private video.
+* ``throttled``, ``network`` and ``error`` (5xx, anything unexpected) are
+  transient: retried, but only after a backoff that doubles with every failed
+  attempt (1 hour, 2 hours, ... capped at a week).
+
+A post that later scrapes fine drops out of the ledger. Entries keep the post
+URL too, so ``--incremental`` runs -- which never re-read the old part of the
+Like List -- can still retry them via ``due()``. The ledger is one JSON file,
+written atomically.
+"""
+
+from __future__ import annotations
+
+import json
+import time
+from collections import Counter
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Any
+
+PERMANENT = frozenset({"gone"})
+# Classes that become permanent once they've happened this many times.
+PERMANENT_AFTER = {"empty": 2}
+RETRY_BASE_SECONDS = 3600.0
+RETRY_MAX_SECONDS = 7 * 24 * 3600.0
+
+
+def classify(status: int | None, *, crashed: bool = False) -> str:
+    """Status class of a failed fetch from its last HTTP status (None: no response);
+    ``crashed`` if the fetch raised something unexpected rather than a network error."""
+    if crashed:
+        return "error"
+    if status is None:
+        return "network"
+    if status in (404, 410):
+        return "gone"
+    if status == 200:
+        return "empty"
+    if status in (403, 429):
+        return "throttled"
+    return "error"
+
+
+class FailureLedger:
+    """Failed video IDs with their status class, last attempt time and attempt count."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._entries: dict[str, dict[str, Any]] = {}
+        if path.exists():
+            with path.open(encoding="utf-8") as file:
+                self._entries = json.load(file)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def record(
+        self,
+        video_id: str,
+        status: int | None,
+        when: float | None = None,
+        *,
+        url: str = "",
+        crashed: bool = False,
+    ) -> None:
+        """Note one more failed attempt at ``video_id`` (fetched from ``url``)."""
+        if not video_id:
+            return
+        previous = self._entries.get(video_id)
+        self._entries[video_id] = {
+            "class": classify(status, crashed=crashed),
+            "status": status,
+            "last_attempt": time.time() if when is None else when,
+            "attempts": (previous["attempts"] if previous else 0) + 1,
+            "url": url or (previous or {}).get("url", ""),
+        }
+
+    def resolve(self, video_id: str) -> None:
+        """Forget ``video_id``: it scraped fine after all."""
+        self._entries.pop(video_id, None)
+
+    def is_permanent(self, video_id: str) -> bool:
+        entry = self._entries.get(video_id)
+        if entry is None:
+            return False
+        status_class = entry["class"]
+        threshold = PERMANENT_AFTER.get(status_class)
+        return status_class in PERMANENT or (
+            threshold is not None and entry["attempts"] >= threshold
+        )
+
+    def retry_at(self, video_id: str) -> float:
+        """When ``video_id`` is next worth trying (0 if it isn't in the ledger)."""
+        entry = self._entries.get(video_id)
+        if entry is None:
+            return 0.0
+        wait = min(RETRY_BASE_SECONDS * 2 ** (entry["attempts"] - 1), RETRY_MAX_SECONDS)
+        return entry["last_attempt"] + wait
+
+    def skip(self, video_id: str, now: float | None = None) -> bool:
+        """True if resume should leave ``video_id`` alone this run."""
+        if video_id not in self._entries:
+            return False
+        now = time.time() if now is None else now
+        return self.is_permanent(video_id) or now < self.retry_at(video_id)
+
+    def due(self, now: float | None = None, *, everything: bool = False) -> Iterator[str]:
+        """URLs of the failed posts worth trying again now (transient, backoff over),
+        or with ``everything``, of every post in the ledger."""
+        now = time.time() if now is None else now
+        for video_id, entry in list(self._entries.items()):
+            if entry.get("url") and (everything or not self.skip(video_id, now)):
+                yield entry["url"]
+
+    def counts(self) -> Counter[str]:
+        """How many ledger entries there are per status class."""
+        return Counter(entry["class"] for entry in self._entries.values())
+
+    def save(self) -> None:
+        """Write the ledger atomically (temp file + rename)."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        with tmp.open("w", encoding="utf-8") as file:
+            json.dump(self._entries, file, indent=1)
+        tmp.replace(self.path)
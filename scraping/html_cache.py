@@ -0,0 +1,56 @@
+"""On-disk cache of fetched post pages, so a parser fix never needs a re-fetch.
+
+Each fetch is stored gzip-compressed as ``<root>/<xx>/<video id>-<fetch ms>.html.gz``,
+where ``xx`` is the last two digits of the video ID (keeps any one directory
+small). Fetching the same video again adds a new file rather than overwriting, and
+``latest()`` picks the newest page per video.
+"""
+
+from __future__ import annotations
+
+import gzip
+import time
+from pathlib import Path
+
+_SUFFIX = ".html.gz"
+
+
+class HtmlCache:
+    """A directory of compressed post pages keyed by video ID and fetch time."""
+
+    def __init__(self, root: Path, compresslevel: int = 6) -> None:
+        self.root = root
+        self.compresslevel = compresslevel
+
+    def path_for(self, video_id: str, fetched_at: float) -> Path:
+        return (
+            self.root
+            / video_id[-2:].rjust(2, "0")
+            / f"{video_id}-{int(fetched_at * 1000)}{_SUFFIX}"
+        )
+
+    def put(self, video_id: str, page: bytes, fetched_at: float | None = None) -> Path:
+        """Store one fetched page and return its path."""
+        path = self.path_for(video_id, time.time() if fetched_at is None else fetched_at)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Temp file + rename, so a crash never leaves a truncated page behind.
+        tmp = path.with_name(path.name + ".tmp")
+        tmp.write_bytes(gzip.compress(page, compresslevel=self.compresslevel))
+        tmp.replace(path)
+        return path
+
+    def latest(self) -> dict[str, Path]:
+        """Newest cached page for every video ID in the cache."""
+        newest: dict[str, tuple[int, Path]] = {}
+        for path in self.root.glob(f"*/*{_SUFFIX}"):
+            video_id, _, stamp = path.name.removesuffix(_SUFFIX).rpartition("-")
+            if not video_id or not stamp.isdigit():
+                continue
+            if video_id not in newest or int(stamp) > newest[video_id][0]:
+                newest[video_id] = (int(stamp), path)
+        return {video_id: path for video_id, (_, path) in newest.items()}
+
+
+def read_page(path: Path) -> bytes:
+    """Decompress one cached page."""
+    return gzip.decompress(path.read_bytes())
@@ -0,0 +1,147 @@
+"""Compact, sorted index of video IDs: resume and favorite checks without JSON.
+
+TikTok video IDs are 19-digit numbers that fit in an unsigned 64-bit integer, so
+a set of them packs into a sorted array of 8-byte ints that can be binary
+searched in place. On disk that's a 16-byte header (magic + a caller-defined
+``covered`` offset, e.g. how much of a log the index reflects) followed by the
+IDs, little-endian, which ``IdIndex.load`` memory-maps rather than reads.
+"""
+
+from __future__ import annotations
+
+import bisect
+import heapq
+import mmap
+import os
+import struct
+import sys
+from array import array
+from collections.abc import Iterable, Iterator, Sequence
+from pathlib import Path
+
+_MAGIC = b"TTIDX001"
+_HEADER = struct.Struct("<8sQ")
+_MAX_ID = 2**64 - 1
+
+
+def _as_int(video_id: str | int) -> int | None:
+    if isinstance(video_id, int):
+        return video_id if 0 <= video_id <= _MAX_ID else None
+    if video_id.isdigit() and video_id.isascii():
+        number = int(video_id)
+        return number if number <= _MAX_ID else None
+    return None
+
+
+class IdIndex:
+    """An immutable sorted set of video IDs; ``"123" in index`` is a binary search."""
+
+    def __init__(self, ids: Sequence[int] | None = None, *, covered: int = 0) -> None:
+        # Either an array("Q") or a memoryview over a mapped file; both index as ints.
+        self._ids: Sequence[int] = ids if ids is not None else array("Q")
+        self.covered = covered
+        self._mapping: mmap.mmap | None = None
+
+    @classmethod
+    def from_ids(cls, video_ids: Iterable[str | int], *, covered: int = 0) -> IdIndex:
+        """Build an index from any IDs; non-numeric ones (never real IDs) are dropped."""
+        numbers = {number for number in map(_as_int, video_ids) if number is not None}
+        return cls(array("Q", sorted(numbers)), covered=covered)
+
+    @classmethod
+    def load(cls, path: Path) -> IdIndex:
+        """Memory-map an index file. A missing or unrecognized file is an empty index."""
+        try:
+            with path.open("rb") as file:
+                header = file.read(_HEADER.size)
+                if len(header) < _HEADER.size:
+                    return cls()
+                magic, covered = _HEADER.unpack(header)
+                if magic != _MAGIC:
+                    return cls()
+                if file.seek(0, os.SEEK_END) == _HEADER.size:
+                    return cls(covered=covered)
+                mapping = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except FileNotFoundError:
+            return cls()
+
+        body = memoryview(mapping)[_HEADER.size :]
+        body = body[: len(body) - len(body) % 8]
+        if sys.byteorder == "little":
+            index = cls(body.cast("Q"), covered=covered)
+            index._mapping = mapping
+            return index
+        ids = array("Q", body.tobytes())
+        ids.byteswap()
+        body.release()
+        mapping.close()
+        return cls(ids, covered=covered)
+
+    def save(self, path: Path) -> None:
+        """Write the index atomically (temp file + rename); it stays usable."""
+        ids = array("Q", self._ids)
+        on_disk = ids
+        if sys.byteorder != "little":
+            on_disk = array("Q", ids)
+            on_disk.byteswap()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + ".tmp")
+        with tmp.open("wb") as file:
+            file.write(_HEADER.pack(_MAGIC, self.covered))
+            file.write(on_disk.tobytes())
+        # A live mapping of the old file would block the rename on Windows, so
+        # go on from the in-memory copy instead.
+        self._unmap(ids)
+        tmp.replace(path)
+
+    def merged(self, video_ids: Iterable[str | int], *, covered: int | None = None) -> IdIndex:
+        """A new index holding these IDs plus ``video_ids`` (one linear merge)."""
+        new = sorted({n for n in map(_as_int, video_ids) if n is not None})
+        out = array("Q")
+        last = -1
+        for number in heapq.merge(self._ids, new):
+            if number != last:
+                out.append(number)
+                last = number
+        return IdIndex(out, covered=self.covered if covered is None else covered)
+
+    def copy(self) -> IdIndex:
+        """An in-memory copy that stays valid after this index is closed."""
+        ids = array("Q")
+        if isinstance(self._ids, memoryview):
+            ids.frombytes(self._ids.cast("B"))
+        else:
+            ids.extend(self._ids)
+        return IdIndex(ids, covered=self.covered)
+
+    def close(self) -> None:
+        """Release the file mapping, if any (the index keeps working, empty)."""
+        self._unmap(array("Q"))
+
+    def _unmap(self, ids: Sequence[int]) -> None:
+        """Release the file mapping, if any, holding ``ids`` from then on."""
+        if self._mapping is not None:
+            if isinstance(self._ids, memoryview):
+                self._ids.release()
+            self._ids = ids
+            self._mapping.close()
+            self._mapping = None
+
+    def __contains__(self, video_id: object) -> bool:
+        if not isinstance(video_id, (str, int)):
+            return False
+        number = _as_int(video_id)
+        if number is None:
+            return False
+        position = bisect.bisect_left(self._ids, number)
+        return position != len(self._ids) and self._ids[position] == number
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __iter__(self) -> Iterator[str]:
+        return (str(number) for number in self._ids)
+
+    def __reduce__(self) -> tuple[type[IdIndex], tuple[array[int]]]:
+        # Pickle (e.g. to parse workers) as a plain array, never the mapping.
+        return (IdIndex, (array("Q", self._ids),))
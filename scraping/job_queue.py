@@ -0,0 +1,176 @@
+"""Durable URL queue with leases, so several scraper processes can share one export.
+
+The queue is a SQLite file. One process seeds it from the export (seeding is
+idempotent, so every process may do it); each process then claims small batches of
+URLs under its own worker ID. A claim is a lease: the owner renews it with
+``heartbeat()`` while it works and marks each URL ``complete()`` once its result is
+safely checkpointed -- or, if it failed only for now (throttled, network), hands
+it back with ``defer()`` to be claimed again once its backoff is over. If a
+process dies, its leases simply expire and the next ``claim()`` from anyone hands
+those URLs out again -- nothing is fetched twice unless a worker actually crashed
+mid-URL.
+
+Processes on different machines need the file on storage they can all lock
+(SQLite over a network filesystem is only as reliable as that filesystem's
+locking); each process keeps its own client, egress and output store.
+"""
+
+from __future__ import annotations
+
+import sqlite3
+import time
+from collections.abc import Callable, Iterable, Iterator
+from pathlib import Path
+
+DEFAULT_LEASE_SECONDS = 300.0
+DEFAULT_CLAIM_BATCH = 20
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    url TEXT PRIMARY KEY,
+    state TEXT NOT NULL DEFAULT 'pending'
+        CHECK (state IN ('pending', 'leased', 'done', 'failed')),
+    owner TEXT,
+    lease_expires REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    updated_at REAL,
+    not_before REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_state_lease ON jobs (state, lease_expires);
+CREATE INDEX IF NOT EXISTS jobs_owner ON jobs (owner) WHERE state = 'leased';
+
+CREATE TABLE IF NOT EXISTS favorites (
+    video_id TEXT PRIMARY KEY
+);
+"""
+
+
+class JobQueue:
+    """A SQLite-backed queue of post URLs with expiring leases."""
+
+    def __init__(
+        self,
+        path: Path,
+        *,
+        lease_seconds: float = DEFAULT_LEASE_SECONDS,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self._clock = clock
+        # Autocommit mode; claims open their own BEGIN IMMEDIATE transaction.
+        self._connection = sqlite3.connect(path, timeout=30, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode = WAL")
+        self._connection.executescript(SCHEMA)
+        columns = {row[1] for row in self._connection.execute("PRAGMA table_info(jobs)")}
+        if "not_before" not in columns:  # a queue from before defer() existed
+            self._connection.execute("ALTER TABLE jobs ADD COLUMN not_before REAL")
+
+    def seed(self, urls: Iterable[str], favorite_video_ids: Iterable[str] | None = None) -> int:
+        """Add URLs (and the export's favorites) not already queued; returns how many were new."""
+        connection = self._connection
+        before = connection.total_changes
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            connection.executemany(
+                "INSERT OR IGNORE INTO jobs (url, updated_at) VALUES (?, ?)",
+                ((url, self._clock()) for url in urls),
+            )
+            added = connection.total_changes - before
+            if favorite_video_ids is not None:
+                connection.executemany(
+                    "INSERT OR IGNORE INTO favorites (video_id) VALUES (?)",
+                    ((video_id,) for video_id in favorite_video_ids),
+                )
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        return added
+
+    def favorite_ids(self) -> list[str] | None:
+        """Sorted favorite IDs seeded with the queue, or None if there were none."""
+        rows = self._connection.execute("SELECT video_id FROM favorites ORDER BY video_id")
+        ids = [video_id for (video_id,) in rows]
+        return ids or None
+
+    def claim(self, owner: str, limit: int = DEFAULT_CLAIM_BATCH) -> list[str]:
+        """Lease up to ``limit`` URLs to ``owner``, in seed order: pending ones whose
+        ``defer()`` time (if any) has come, and leased ones whose lease has expired
+        (their worker died), alike."""
+        connection = self._connection
+        now = self._clock()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            urls = [
+                url
+                for (url,) in connection.execute(
+                    "SELECT url FROM jobs "
+                    "WHERE (state = 'pending' AND (not_before IS NULL OR not_before <= ?)) "
+                    "OR (state = 'leased' AND lease_expires < ?) ORDER BY rowid LIMIT ?",
+                    (now, now, limit),
+                )
+            ]
+            connection.executemany(
+                "UPDATE jobs SET state = 'leased', owner = ?, lease_expires = ?, "
+                "attempts = attempts + 1, updated_at = ? WHERE url = ?",
+                ((owner, now + self.lease_seconds, now, url) for url in urls),
+            )
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        return urls
+
+    def iter_claims(self, owner: str, batch: int = DEFAULT_CLAIM_BATCH) -> Iterator[str]:
+        """Claim and yield URLs batch by batch until nothing is left to claim."""
+        while urls := self.claim(owner, batch):
+            yield from urls
+
+    def heartbeat(self, owner: str) -> int:
+        """Extend every lease ``owner`` holds; returns how many were renewed."""
+        now = self._clock()
+        cursor = self._connection.execute(
+            "UPDATE jobs SET lease_expires = ?, updated_at = ? "
+            "WHERE owner = ? AND state = 'leased'",
+            (now + self.lease_seconds, now, owner),
+        )
+        return cursor.rowcount
+
+    def complete(self, owner: str, finished: Iterable[tuple[str, bool]]) -> None:
+        """Mark (url, succeeded) results done/failed, if ``owner`` still holds them.
+
+        A URL whose lease expired and went to another worker is left alone.
+        """
+        now = self._clock()
+        self._connection.executemany(
+            "UPDATE jobs SET state = ?, lease_expires = NULL, updated_at = ? "
+            "WHERE url = ? AND owner = ? AND state = 'leased'",
+            (("done" if ok else "failed", now, url, owner) for url, ok in finished),
+        )
+
+    def defer(self, owner: str, deferred: Iterable[tuple[str, float]]) -> None:
+        """Hand (url, not_before) URLs back as pending, claimable again from
+        ``not_before`` on, if ``owner`` still holds them."""
+        now = self._clock()
+        self._connection.executemany(
+            "UPDATE jobs SET state = 'pending', owner = NULL, lease_expires = NULL, "
+            "not_before = ?, updated_at = ? WHERE url = ? AND owner = ? AND state = 'leased'",
+            ((not_before, now, url, owner) for url, not_before in deferred),
+        )
+
+    def release(self, owner: str) -> None:
+        """Hand back every URL ``owner`` still holds (clean shutdown, not a crash)."""
+        self._connection.execute(
+            "UPDATE jobs SET state = 'pending', owner = NULL, lease_expires = NULL, "
+            "updated_at = ? WHERE owner = ? AND state = 'leased'",
+            (self._clock(), owner),
+        )
+
+    def counts(self) -> dict[str, int]:
+        rows = self._connection.execute("SELECT state, COUNT(*) FROM jobs GROUP BY state")
+        return dict(rows.fetchall())
+
+    def close(self) -> None:
+        self._connection.close()
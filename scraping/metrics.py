@@ -0,0 +1,224 @@
+"""Scrape metrics: what a slow run is actually waiting on.
+
+``ScrapeMetrics`` counts every request the scraper makes -- status codes, fetch
+latency, bytes received, parse time, pages that parsed to nothing, retries --
+alongside the live concurrency and adaptive rate. It can be written as a JSON
+stats file every few seconds (``--stats-file``) and served in the Prometheus
+text format on localhost (``--metrics-port``), with no extra dependencies.
+
+Reading it: high fetch latency with mostly 200s means the network; many
+403/429s and retries mean throttling; parse time near fetch time means the
+event loop is parse-bound (try ``--parse-workers``).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import bisect
+import json
+import time
+from collections import Counter
+from collections.abc import Callable, Sequence
+from pathlib import Path
+from typing import Any
+
+from loguru import logger as log
+
+# Upper bounds in seconds; an implicit +Inf bucket catches the rest.
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+PARSE_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+DEFAULT_STATS_INTERVAL = 10.0
+
+
+class Histogram:
+    """Fixed-bucket histogram, Prometheus style (each count is ``<= bound``)."""
+
+    def __init__(self, bounds: Sequence[float]) -> None:
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q: float) -> float | None:
+        """Estimate the ``q`` quantile by interpolating inside its bucket."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for position, count in enumerate(self.counts):
+            if seen + count >= rank and count:
+                lower = self.bounds[position - 1] if position else 0.0
+                if position == len(self.bounds):
+                    return lower  # the +Inf bucket has no upper edge
+                upper = self.bounds[position]
+                return lower + (upper - lower) * (rank - seen) / count
+            seen += count
+        return self.bounds[-1]
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 6),
+            "p50": self.quantile(0.5),
+            "p90": self.quantile(0.9),
+            "p99": self.quantile(0.99),
+            "buckets": {
+                **{
+                    str(bound): count
+                    for bound, count in zip(self.bounds, self.counts, strict=False)
+                },
+                "+Inf": self.counts[-1],
+            },
+        }
+
+    def prometheus(self, name: str, help_text: str) -> list[str]:
+        lines = [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+        cumulative = 0
+        for bound, count in zip(self.bounds, self.counts, strict=False):
+            cumulative += count
+            lines.append(f'{name}_bucket{{le="{bound}"}} {cumulative}')
+        lines.append(f'{name}_bucket{{le="+Inf"}} {self.count}')
+        lines.append(f"{name}_sum {self.sum}")
+        lines.append(f"{name}_count {self.count}")
+        return lines
+
+
+class ScrapeMetrics:
+    """Counters, histograms and gauges for one scrape run."""
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic) -> None:
+        self._clock = clock
+        self.started = clock()
+        self.status_counts: Counter[str] = Counter()  # "200", "429", "network", "error"
+        self.fetch_latency = Histogram(LATENCY_BUCKETS)
+        self.parse_time = Histogram(PARSE_BUCKETS)
+        self.bytes_received = 0
+        self.retries = 0
+        self.scraped = 0
+        self.failed = 0
+        self.empty_parses = 0  # a 200 page that didn't yield a post
+        self.in_flight = 0
+        self.concurrency = 0
+        self.rate: Callable[[], float] | None = None  # the adaptive rate, if any
+
+    def observe_fetch(self, status: int | str, seconds: float, size: int) -> None:
+        self.status_counts[str(status)] += 1
+        self.fetch_latency.observe(seconds)
+        self.bytes_received += size
+
+    def observe_parse(self, seconds: float, found: bool) -> None:
+        self.parse_time.observe(seconds)
+        if not found:
+            self.empty_parses += 1
+
+    def snapshot(self) -> dict[str, Any]:
+        elapsed = max(self._clock() - self.started, 1e-9)
+        pages = self.status_counts.get("200", 0)
+        return {
+            "elapsed_seconds": round(elapsed, 3),
+            "requests": sum(self.status_counts.values()),
+            "status_counts": dict(self.status_counts),
+            "retries": self.retries,
+            "scraped": self.scraped,
+            "failed": self.failed,
+            "posts_per_second": round(self.scraped / elapsed, 3),
+            "bytes_received": self.bytes_received,
+            "empty_parse_rate": round(self.empty_parses / pages, 4) if pages else 0.0,
+            "in_flight": self.in_flight,
+            "concurrency": self.concurrency,
+            "rate": self.rate() if self.rate is not None else None,
+            "fetch_latency_seconds": self.fetch_latency.to_dict(),
+            "parse_seconds": self.parse_time.to_dict(),
+        }
+
+    def prometheus(self) -> str:
+        """The metrics in the Prometheus text exposition format."""
+        lines = [
+            "# HELP tiktok_scraper_requests_total Fetch attempts by HTTP status.",
+            "# TYPE tiktok_scraper_requests_total counter",
+        ]
+        lines += [
+            f'tiktok_scraper_requests_total{{status="{status}"}} {count}'
+            for status, count in sorted(self.status_counts.items())
+        ]
+        counters = (
+            ("retries_total", self.retries, "URLs re-queued after a throttle or network error."),
+            ("posts_scraped_total", self.scraped, "Posts parsed and stored."),
+            ("posts_failed_total", self.failed, "URLs given up on."),
+            ("bytes_received_total", self.bytes_received, "Page bytes read."),
+            ("empty_parses_total", self.empty_parses, "200 pages that held no post."),
+        )
+        for name, value, help_text in counters:
+            lines += [
+                f"# HELP tiktok_scraper_{name} {help_text}",
+                f"# TYPE tiktok_scraper_{name} counter",
+                f"tiktok_scraper_{name} {value}",
+            ]
+        gauges: list[tuple[str, float, str]] = [
+            ("in_flight", self.in_flight, "Requests in flight right now."),
+            ("concurrency", self.concurrency, "Configured worker count."),
+        ]
+        if self.rate is not None:
+            gauges.append(("rate", self.rate(), "Adaptive request rate, per second."))
+        for name, level, help_text in gauges:
+            lines += [
+                f"# HELP tiktok_scraper_{name} {help_text}",
+                f"# TYPE tiktok_scraper_{name} gauge",
+                f"tiktok_scraper_{name} {level}",
+            ]
+        lines += self.fetch_latency.prometheus(
+            "tiktok_scraper_fetch_latency_seconds", "Time to fetch a page."
+        )
+        lines += self.parse_time.prometheus("tiktok_scraper_parse_seconds", "Time to parse a page.")
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: Path) -> None:
+        """Write ``snapshot()`` as JSON, atomically (temp file + rename)."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + ".tmp")
+        with tmp.open("w", encoding="utf-8") as file:
+            json.dump(self.snapshot(), file, indent=2)
+        tmp.replace(path)
+
+
+async def write_periodically(
+    metrics: ScrapeMetrics, path: Path, interval: float = DEFAULT_STATS_INTERVAL
+) -> None:
+    """Rewrite the stats file every ``interval`` seconds until cancelled."""
+    while True:
+        await asyncio.sleep(interval)
+        metrics.write(path)
+
+
+async def serve_prometheus(
+    metrics: ScrapeMetrics, port: int, host: str = "127.0.0.1"
+) -> asyncio.Server:
+    """Serve ``metrics.prometheus()`` over plain HTTP on ``host:port`` (any path)."""
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            # Read and ignore the request head; every path gets the metrics.
+            while (await reader.readline()).strip():
+                pass
+            body = metrics.prometheus().encode()
+            writer.write(
+                b"HTTP/1.1 200 OK\r\n"
+                b"Content-Type: text/plain; version=0.0.4; charset=utf-8\r\n"
+                + f"Content-Length: {len(body)}\r\n".encode()
+                + b"Connection: close\r\n\r\n"
+                + body
+            )
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    server = await asyncio.start_server(handle, host, port)
+    log.info(f"Prometheus metrics on http://{host}:{port}/metrics")
+    return server
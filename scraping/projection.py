@@ -0,0 +1,127 @@
+"""Compile a JMESPath query into a plain Python function, built once.
+
+``jmespath.search`` re-parses the query on every call (its parse cache is small)
+and then walks the AST through a generic visitor. ``compile_projection`` does the
+walk once, up front, turning each node into a closure, so projecting a post is
+just nested dict lookups. Output is identical to ``jmespath.search`` for the node
+types it supports -- the subset ``_POST_QUERY`` uses -- and anything else raises
+``ValueError`` so the caller can fall back to jmespath.
+
+``coerce_post`` is the one place scraped values get their types fixed up (TikTok
+sends some counts as strings), so downstream stages don't each have to.
+
+    python -m benchmarks.bench_projection   # compare against jmespath
+"""
+
+from __future__ import annotations
+
+from collections.abc import Callable
+from typing import Any
+
+import jmespath
+
+Projection = Callable[[Any], Any]
+
+
+def _field(name: str) -> Projection:
+    def field(value: Any) -> Any:
+        return value.get(name) if isinstance(value, dict) else None
+
+    return field
+
+
+def _subexpression(steps: list[Projection]) -> Projection:
+    def subexpression(value: Any) -> Any:
+        for step in steps:
+            value = step(value)
+        return value
+
+    return subexpression
+
+
+def _multi_select_dict(pairs: list[tuple[str, Projection]]) -> Projection:
+    def multi_select_dict(value: Any) -> Any:
+        if value is None:
+            return None
+        return {key: project(value) for key, project in pairs}
+
+    return multi_select_dict
+
+
+def _projection(base: Projection, each: Projection) -> Projection:
+    def projection(value: Any) -> Any:
+        items = base(value)
+        if not isinstance(items, list):
+            return None
+        return [result for result in map(each, items) if result is not None]
+
+    return projection
+
+
+def _flatten(base: Projection) -> Projection:
+    def flatten(value: Any) -> Any:
+        items = base(value)
+        if not isinstance(items, list):
+            return None
+        merged: list[Any] = []
+        for item in items:
+            if isinstance(item, list):
+                merged.extend(item)
+            else:
+                merged.append(item)
+        return merged
+
+    return flatten
+
+
+def _identity(value: Any) -> Any:
+    return value
+
+
+def _build(node: dict[str, Any]) -> Projection:
+    kind = node["type"]
+    children = node["children"]
+    if kind == "field":
+        return _field(node["value"])
+    if kind == "subexpression":
+        return _subexpression([_build(child) for child in children])
+    if kind == "multi_select_dict":
+        return _multi_select_dict([(pair["value"], _build(pair)) for pair in children])
+    if kind == "key_val_pair":
+        return _build(children[0])
+    if kind == "projection":
+        return _projection(_build(children[0]), _build(children[1]))
+    if kind == "flatten":
+        return _flatten(_build(children[0]))
+    if kind == "identity":
+        return _identity
+    raise ValueError(f"Unsupported JMESPath node type for compiled projection: {kind}")
+
+
+def compile_projection(expression: str) -> Projection:
+    """Turn a JMESPath ``expression`` into a function equivalent to
+    ``jmespath.search(expression, value)``.
+
+    Raises ``ValueError`` if the expression uses anything beyond fields,
+    sub-expressions, multi-select hashes, projections and flattens.
+    """
+    return _build(jmespath.compile(expression).parsed)
+
+
+def _to_int(value: Any) -> Any:
+    if isinstance(value, str) and value.isdigit():
+        return int(value)
+    return value
+
+
+def coerce_post(post: dict[str, Any]) -> dict[str, Any]:
+    """Fix up value types in a projected post, in place, and return it.
+
+    Engagement counts in ``stats`` come back as a mix of ints and digit strings
+    (``collectCount`` is usually ``"700"``); they all become ints.
+    """
+    stats = post.get("stats")
+    if isinstance(stats, dict):
+        for key, value in stats.items():
+            stats[key] = _to_int(value)
+    return post
@@ -0,0 +1,109 @@
+"""Adaptive request pacing shared by every scraper worker.
+
+TikTok doesn't publish a rate limit, and the sustainable rate drifts with time of
+day and IP reputation, so instead of hand-tuning ``--concurrency``/``--delay`` per
+run the controller searches for it: every 200 nudges the rate up a little
+(additive increase), a 403/429 cuts it by a factor (multiplicative decrease).
+As with TCP's congestion window, a cut happens at most once per round of
+requests: throttles for requests sent before the last cut answer the same
+congestion, which that cut already responded to, so they're ignored.
+A burst of throttles inside a short window is treated as a storm and pauses all
+workers for a shared cool-down, instead of each one hammering its own retries.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import deque
+from collections.abc import Awaitable, Callable
+
+from loguru import logger as log
+
+DEFAULT_INITIAL_RATE = 2.0
+DEFAULT_MIN_RATE = 0.2
+DEFAULT_MAX_RATE = 20.0
+DEFAULT_INCREASE = 0.1
+DEFAULT_DECREASE = 0.5
+DEFAULT_STORM_THRESHOLD = 3
+DEFAULT_STORM_WINDOW = 10.0
+DEFAULT_COOLDOWN = 30.0
+
+
+class RateController:
+    """AIMD rate limiter: ``acquire()`` before each request, then report the outcome.
+
+    ``rate`` is in requests per second across all workers. ``clock`` and ``sleep``
+    are injectable so tests can drive it without real waiting.
+    """
+
+    def __init__(
+        self,
+        initial_rate: float = DEFAULT_INITIAL_RATE,
+        *,
+        min_rate: float = DEFAULT_MIN_RATE,
+        max_rate: float = DEFAULT_MAX_RATE,
+        increase: float = DEFAULT_INCREASE,
+        decrease: float = DEFAULT_DECREASE,
+        storm_threshold: int = DEFAULT_STORM_THRESHOLD,
+        storm_window: float = DEFAULT_STORM_WINDOW,
+        cooldown: float = DEFAULT_COOLDOWN,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], Awaitable[None]] = asyncio.sleep,
+    ) -> None:
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.rate = min(max(initial_rate, min_rate), max_rate)
+        self.increase = increase
+        self.decrease = decrease
+        self.storm_threshold = storm_threshold
+        self.storm_window = storm_window
+        self.cooldown = cooldown
+        self._clock = clock
+        self._sleep = sleep
+        self._next_slot = 0.0
+        self._cooldown_until = 0.0
+        self._last_cut = float("-inf")
+        self._recent_throttles: deque[float] = deque()
+
+    @property
+    def cooling_down(self) -> bool:
+        return self._clock() < self._cooldown_until
+
+    async def acquire(self) -> float:
+        """Wait for the next request slot at the current rate (and out any cool-down).
+
+        Re-checks after every sleep, so a cool-down that starts while a worker is
+        waiting still holds it back. Returns the slot's time, for ``on_throttle``.
+        """
+        while True:
+            now = self._clock()
+            ready = max(self._next_slot, self._cooldown_until)
+            if ready <= now:
+                self._next_slot = now + 1 / self.rate
+                return now
+            await self._sleep(ready - now)
+
+    def on_success(self) -> None:
+        self.rate = min(self.max_rate, self.rate + self.increase)
+
+    def on_throttle(self, sent_at: float | None = None) -> None:
+        """Cut the rate for a throttled request that ``acquire`` let out at ``sent_at``
+        (default: now). Ignored if it was sent before the last cut."""
+        now = self._clock()
+        if sent_at is not None and sent_at <= self._last_cut:
+            return
+        self._last_cut = now
+        self.rate = max(self.min_rate, self.rate * self.decrease)
+        log.debug(f"Throttled; rate cut to {self.rate:.2f} req/s")
+
+        self._recent_throttles.append(now)
+        while self._recent_throttles and now - self._recent_throttles[0] > self.storm_window:
+            self._recent_throttles.popleft()
+        if len(self._recent_throttles) >= self.storm_threshold and not self.cooling_down:
+            self._cooldown_until = now + self.cooldown
+            self._recent_throttles.clear()
+            log.warning(
+                f"Throttle storm ({self.storm_threshold} in {self.storm_window:.0f}s); "
+                f"pausing all workers for {self.cooldown:.0f}s at {self.rate:.2f} req/s"
+            )
@@ -0,0 +1,171 @@
+"""SQLite post store (``--storage sqlite``): upserts, batched commits, indexes.
+
+Each post is kept whole as JSON in ``posts.data`` -- exactly what
+``post_data.json`` would hold -- plus normalized author, hashtag and label tables
+so the downstream stages can count with indexed ``GROUP BY`` queries instead of
+re-reading every post. Writes are buffered and committed one transaction per
+checkpoint. Re-scraping a post replaces its row in place (same ``rowid``, so
+``ORDER BY rowid`` is still first-scraped order), which makes resume and refresh
+plain upserts.
+
+``post_processing/post_data_collection.py`` and ``post_processing/data_processor.py``
+read this schema directly via ``--db``.
+"""
+
+from __future__ import annotations
+
+import json
+import sqlite3
+import time
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Any
+
+from post_processing.post_data_collection import diversification_labels, hashtag_names
+from scraping.id_index import IdIndex
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS authors (
+    id TEXT PRIMARY KEY,
+    unique_id TEXT,
+    nickname TEXT,
+    verified INTEGER
+);
+CREATE INDEX IF NOT EXISTS authors_unique_id ON authors (unique_id);
+
+CREATE TABLE IF NOT EXISTS posts (
+    id TEXT PRIMARY KEY,
+    author_id TEXT REFERENCES authors (id),
+    create_time INTEGER,
+    scraped_at REAL NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS posts_author_id ON posts (author_id);
+CREATE INDEX IF NOT EXISTS posts_create_time ON posts (create_time);
+
+CREATE TABLE IF NOT EXISTS hashtags (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+-- One row per textExtra entry (position keeps repeats), so COUNT(*) per hashtag
+-- matches post_data_collection's tally of the same posts.
+CREATE TABLE IF NOT EXISTS post_hashtags (
+    post_id TEXT NOT NULL REFERENCES posts (id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    hashtag_id INTEGER NOT NULL REFERENCES hashtags (id),
+    PRIMARY KEY (post_id, position)
+);
+CREATE INDEX IF NOT EXISTS post_hashtags_hashtag_id ON post_hashtags (hashtag_id);
+
+CREATE TABLE IF NOT EXISTS labels (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS post_labels (
+    post_id TEXT NOT NULL REFERENCES posts (id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    label_id INTEGER NOT NULL REFERENCES labels (id),
+    PRIMARY KEY (post_id, position)
+);
+CREATE INDEX IF NOT EXISTS post_labels_label_id ON post_labels (label_id);
+"""
+
+
+def connect(path: Path) -> sqlite3.Connection:
+    """Open (creating if needed) a post database with the schema in place."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    connection = sqlite3.connect(path)
+    connection.execute("PRAGMA journal_mode = WAL")
+    connection.execute("PRAGMA foreign_keys = ON")
+    connection.executescript(SCHEMA)
+    return connection
+
+
+def _int_or_none(value: Any) -> int | None:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class SqliteStore:
+    """Post store backed by ``post_data.db``; same interface as the JSON stores."""
+
+    def __init__(self, path: Path, *, resume: bool = True) -> None:
+        # resume=False still keeps existing rows: re-scraped posts are upserted
+        # over them, which is what re-scraping everything means here.
+        del resume
+        self.path = path
+        self._connection = connect(path)
+        self._pending: list[dict[str, Any]] = []
+
+    def saved_ids(self) -> IdIndex:
+        return IdIndex.from_ids(row[0] for row in self._connection.execute("SELECT id FROM posts"))
+
+    def add(self, post: dict[str, Any]) -> None:
+        if post.get("id"):
+            self._pending.append(post)
+
+    def checkpoint(self) -> None:
+        """Upsert every post added since the last checkpoint in one transaction."""
+        if not self._pending:
+            return
+        with self._connection:
+            for post in self._pending:
+                self._upsert(post)
+        self._pending.clear()
+
+    def close(self) -> None:
+        self.checkpoint()
+        self._connection.close()
+
+    def _upsert(self, post: dict[str, Any]) -> None:
+        execute = self._connection.execute
+        author = post.get("author") or {}
+        author_id = author.get("id")
+        if author_id:
+            execute(
+                "INSERT INTO authors (id, unique_id, nickname, verified) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (id) DO UPDATE SET unique_id = excluded.unique_id, "
+                "nickname = excluded.nickname, verified = excluded.verified",
+                (author_id, author.get("uniqueId"), author.get("nickname"), author.get("verified")),
+            )
+        execute(
+            "INSERT INTO posts (id, author_id, create_time, scraped_at, data) "
+            "VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT (id) DO UPDATE SET author_id = excluded.author_id, "
+            "create_time = excluded.create_time, scraped_at = excluded.scraped_at, "
+            "data = excluded.data",
+            (
+                post["id"],
+                author_id,
+                _int_or_none(post.get("createTime")),
+                time.time(),
+                json.dumps(post, ensure_ascii=False),
+            ),
+        )
+        execute("DELETE FROM post_hashtags WHERE post_id = ?", (post["id"],))
+        execute("DELETE FROM post_labels WHERE post_id = ?", (post["id"],))
+        self._link(post["id"], "hashtags", "post_hashtags", "hashtag_id", hashtag_names(post))
+        self._link(post["id"], "labels", "post_labels", "label_id", diversification_labels(post))
+
+    def _link(
+        self, post_id: str, table: str, link_table: str, column: str, names: list[str]
+    ) -> None:
+        # Table names come from the two fixed call sites above, never from input.
+        for name in set(names):
+            self._connection.execute(
+                f"INSERT INTO {table} (name) VALUES (?) ON CONFLICT (name) DO NOTHING",  # noqa: S608
+                (name,),
+            )
+        self._connection.executemany(
+            f"INSERT INTO {link_table} (post_id, position, {column}) "  # noqa: S608
+            f"SELECT ?, ?, id FROM {table} WHERE name = ?",
+            [(post_id, position, name) for position, name in enumerate(names)],
+        )
+
+    def iter_posts(self) -> Iterator[dict[str, Any]]:
+        """Every stored post, in first-scraped order."""
+        self.checkpoint()
+        for (data,) in self._connection.execute("SELECT data FROM posts ORDER BY rowid"):
+            yield json.loads(data)
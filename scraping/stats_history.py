@@ -0,0 +1,149 @@
+"""Per-post engagement over time, stored as delta-encoded snapshots.
+
+Every successful scrape appends one snapshot of a post's ``stats`` to
+``stats_history.jsonl``. The first snapshot of a post is stored as is; later
+ones hold only the difference from the previous snapshot of that post, seconds
+since then included, so a post re-scraped weekly costs a few small integers per
+week rather than another copy of the whole post record::
+
+    ["7400543367504858373", 1717236000, [15000, 1200, 40, 12, 90]]   # first
+    ["7400543367504858373", 604800, [2300, 110, 3, 0, 8]]            # +1 week
+
+Values follow ``STAT_FIELDS``; a stat missing from the post counts as 0. The
+log is append-only: a crash loses the unflushed tail, and a line torn mid-write
+is cut off on the next open, so new deltas are appended (and replayed) against
+the last snapshot that made it to disk. Loading replays the log to get each
+post's latest snapshot (for TTL scheduling and the next delta); ``series()``
+decodes a post's full history.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import time
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Any
+
+STAT_FIELDS = ("playCount", "diggCount", "commentCount", "shareCount", "collectCount")
+_DAY = 86400.0
+
+
+def _values(stats: dict[str, Any] | None) -> list[int]:
+    stats = stats or {}
+    return [value if isinstance(value, int) else 0 for value in map(stats.get, STAT_FIELDS)]
+
+
+def drop_torn_tail(path: Path) -> None:
+    """Cut a partial last line, left by a crash mid-append, off the log at ``path``.
+
+    The next append then starts on a fresh line instead of gluing onto the
+    fragment. Only the end of the log is read: the last byte, and the torn line
+    if any.
+    """
+    try:
+        with path.open("rb+") as file:
+            end = file.seek(0, os.SEEK_END)
+            if end == 0:
+                return
+            file.seek(end - 1)
+            if file.read(1) == b"\n":
+                return
+            while end > 0:
+                start = max(end - 65536, 0)
+                file.seek(start)
+                newline = file.read(end - start).rfind(b"\n")
+                if newline != -1:
+                    file.truncate(start + newline + 1)
+                    return
+                end = start
+            file.truncate(0)
+    except FileNotFoundError:
+        pass
+
+
+class StatsHistory:
+    """Append-only log of stat snapshots; keeps the last two per post in memory."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        # post id -> (time, values) of its latest snapshot, and of the one before.
+        self._last: dict[str, tuple[float, list[int]]] = {}
+        self._previous: dict[str, tuple[float, list[int]]] = {}
+        drop_torn_tail(path)
+        for post_id, when, values in self._replay():
+            if post_id in self._last:
+                self._previous[post_id] = self._last[post_id]
+            self._last[post_id] = (when, values)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = path.open("a", encoding="utf-8")
+
+    def _replay(self, only: str | None = None) -> Iterator[tuple[str, float, list[int]]]:
+        """Decode the log into absolute (post id, time, values) snapshots, in order."""
+        last: dict[str, tuple[float, list[int]]] = {}
+        try:
+            file = self.path.open(encoding="utf-8")
+        except FileNotFoundError:
+            return
+        with file:
+            for line in file:
+                try:
+                    post_id, when, values = json.loads(line)
+                except (json.JSONDecodeError, ValueError):
+                    continue  # a torn final line from a crash mid-append
+                if post_id in last:
+                    base_time, base = last[post_id]
+                    when += base_time
+                    values = [b + d for b, d in zip(base, values, strict=True)]
+                last[post_id] = (when, values)
+                if only is None or post_id == only:
+                    yield post_id, when, values
+
+    def __contains__(self, post_id: object) -> bool:
+        return post_id in self._last
+
+    def record(self, post_id: str, stats: dict[str, Any] | None, when: float | None = None) -> None:
+        """Append a snapshot of ``stats`` for ``post_id`` (delta from its previous one)."""
+        if not post_id:
+            return
+        when = int(time.time() if when is None else when)
+        values = _values(stats)
+        if post_id in self._last:
+            base_time, base = self._last[post_id]
+            entry = [post_id, when - base_time, [v - b for v, b in zip(values, base, strict=True)]]
+            self._previous[post_id] = self._last[post_id]
+        else:
+            entry = [post_id, when, values]
+        self._file.write(json.dumps(entry, separators=(",", ":")) + "\n")
+        self._last[post_id] = (when, values)
+
+    def last_seen(self, post_id: str) -> float | None:
+        """When ``post_id``'s stats were last recorded, or None if never."""
+        snapshot = self._last.get(post_id)
+        return snapshot[0] if snapshot else None
+
+    def growth(self, post_id: str) -> float | None:
+        """Plays per day between the post's last two snapshots, or None with fewer."""
+        if post_id not in self._previous:
+            return None
+        (then, before), (now, after) = self._previous[post_id], self._last[post_id]
+        return (after[0] - before[0]) / max((now - then) / _DAY, 1 / 24)
+
+    def latest(self, post_id: str) -> dict[str, int] | None:
+        snapshot = self._last.get(post_id)
+        return dict(zip(STAT_FIELDS, snapshot[1], strict=True)) if snapshot else None
+
+    def series(self, post_id: str) -> list[tuple[float, dict[str, int]]]:
+        """Every snapshot of ``post_id``, oldest first, as (time, stats)."""
+        self.flush()
+        return [
+            (when, dict(zip(STAT_FIELDS, values, strict=True)))
+            for _, when, values in self._replay(only=post_id)
+        ]
+
+    def flush(self) -> None:
+        self._file.flush()
+
+    def close(self) -> None:
+        self._file.close()
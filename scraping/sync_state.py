@@ -0,0 +1,55 @@
+"""What ``--incremental`` remembers between weekly exports: a like-date watermark
+and the favorites seen so far.
+
+Each TikTok export repeats the whole Like List, newest first. The watermark is the
+``Date`` of the newest like a completed run covered, so the next run reads the
+new export only until it reaches that date -- the cost follows the number of new
+likes, not the size of the export. Favorites are merged across exports, so a
+video keeps its ``isFavorite`` flag even when a later export no longer lists it.
+
+The state is one small JSON file, written atomically.
+"""
+
+from __future__ import annotations
+
+import datetime
+import json
+from collections.abc import Iterable
+from pathlib import Path
+
+
+class SyncState:
+    """The incremental watermark and merged favorites, loaded from ``path`` if it exists."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.watermark: datetime.datetime | None = None
+        self.favorite_ids: list[str] = []
+        if path.exists():
+            with path.open(encoding="utf-8") as file:
+                state = json.load(file)
+            if state.get("watermark"):
+                self.watermark = datetime.datetime.fromisoformat(state["watermark"])
+            self.favorite_ids = state.get("favorites", [])
+
+    def merge_favorites(self, video_ids: Iterable[str] | None) -> list[str]:
+        """Add this export's favorites to those already known; returns the sorted union."""
+        self.favorite_ids = sorted(set(self.favorite_ids).union(video_ids or ()))
+        return self.favorite_ids
+
+    def advance(self, newest_like: datetime.datetime | None) -> None:
+        """Move the watermark up to ``newest_like`` (never back)."""
+        if newest_like is not None and (self.watermark is None or newest_like > self.watermark):
+            self.watermark = newest_like
+
+    def save(self) -> None:
+        """Write the state atomically (temp file + rename)."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        state = {
+            "watermark": str(self.watermark) if self.watermark else None,
+            "favorites": self.favorite_ids,
+        }
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        with tmp.open("w", encoding="utf-8") as file:
+            json.dump(state, file, indent=1)
+        tmp.replace(self.path)
@@ -3,14 +3,23 @@
 Needs the WordNet corpus: python -c "import nltk; nltk.download('wordnet')"
 """
 
+import contextlib
+import sqlite3
+import tempfile
+from pathlib import Path
+from typing import Any
+
 from post_processing.data_processor import (
     Hashtag,
     combine_hashtags,
     extract_largest_word,
     filter_and_score,
     lemmatize,
+    load_hashtags_from_db,
     synsets_for,
 )
+from post_processing.post_data_collection import count_frequencies
+from scraping.sqlite_store import SqliteStore
 
 
 def test_lemmatize() -> None:
@@ -78,6 +87,35 @@ def test_filter_and_score_handles_zero_posts() -> None:
     assert kept == []
 
 
+def test_db_hashtag_counts_match_frequency_table() -> None:
+    # The GROUP BY path must count exactly what post_data_collection would.
+    posts: list[dict[str, Any]] = [
+        {"id": "1", "contents": [{"textExtra": [{"hashtagName": "cat"}, {"hashtagName": "cat"}]}]},
+        {"id": "2", "contents": [{"textExtra": [{"hashtagName": "dog"}]}, {"textExtra": []}]},
+        {"id": "3", "contents": [{"textExtra": [{"hashtagName": "cat"}, {}]}]},
+        # A mention's entry: a null or empty name is "Unknown", not a hashtag of its own.
+        {"id": "4", "contents": [{"textExtra": [{"hashtagName": None}, {"hashtagName": ""}]}]},
+        {"id": "5", "diversificationLabels": ["Comedy", None, "", "Comedy"]},
+    ]
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Path(tmp) / "post_data.db"
+        store = SqliteStore(db)
+        for post in posts:
+            store.add(post)
+        store.close()
+        hashtags, total_posts = load_hashtags_from_db(db)
+        with contextlib.closing(sqlite3.connect(db)) as connection:
+            labels = connection.execute(
+                "SELECT labels.name, COUNT(*) FROM post_labels "
+                "JOIN labels ON labels.id = post_labels.label_id GROUP BY labels.name"
+            ).fetchall()
+    expected = count_frequencies(posts)
+    assert {ht.name: ht.value for ht in hashtags} == dict(expected["hashtagName"])
+    assert expected["hashtagName"]["Unknown"] == 3
+    assert dict(labels) == dict(expected["diversificationLabels"]) == {"Comedy": 2}
+    assert total_posts == 5
+
+
 if __name__ == "__main__":
     for _name, _case in sorted(globals().items()):
         if _name.startswith("test_"):
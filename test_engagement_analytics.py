@@ -0,0 +1,147 @@
+"""Offline checks for the engagement analytics stage. Run: python test_engagement_analytics.py"""
+
+import itertools
+import json
+import math
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+from post_processing.engagement_analytics import (
+    analyze,
+    engagement_rate,
+    grouped_percentiles,
+    load_columns,
+)
+from post_processing.hashtag_cooccurrence import cooccurrence, report
+
+WEEK_OF_2024_06_03 = 1717372800  # Monday 2024-06-03 00:00 UTC
+
+
+def _post(author: str, plays: int | str, likes: int, tags: list[str], **extra: object) -> dict:
+    return {
+        "id": str(len(tags)) + author,
+        "createTime": str(WEEK_OF_2024_06_03 + 3600),
+        "video": {"duration": 20},
+        "author": {"uniqueId": author},
+        "stats": {"playCount": plays, "diggCount": likes, "commentCount": 0},
+        "diversificationLabels": ["Food"],
+        "contents": [{"textExtra": [{"hashtagName": tag} for tag in tags]}],
+        **extra,
+    }
+
+
+POSTS = [
+    _post("amy", 1000, 100, ["cat", "dog"]),
+    _post("amy", "2000", 100, ["cat"], video={"duration": 75}),
+    _post("bob", 0, 5, ["cat", "owl"], createTime=str(WEEK_OF_2024_06_03 - 1)),
+    _post("amy", 4000, 400, ["dog", "dog"], stats={"playCount": 4000, "diggCount": "400"}),
+    {"id": "bare"},
+]
+
+
+def test_grouped_percentiles_match_numpy() -> None:
+    rng = np.random.default_rng(0)
+    groups = rng.integers(0, 6, 500)
+    values = rng.exponential(100, 500)
+    values[rng.integers(0, 500, 40)] = np.nan
+    table = grouped_percentiles(groups, values, 7, (0, 25, 50, 90, 100))
+    for group in range(6):
+        mine = values[(groups == group) & ~np.isnan(values)]
+        assert np.allclose(table[group], np.percentile(mine, [0, 25, 50, 90, 100]))
+    assert np.isnan(table[6]).all()
+
+
+def test_columns_and_reports() -> None:
+    columns = load_columns(POSTS)
+    assert len(columns) == 5
+    assert columns.hashtags.names == ["cat", "dog", "owl"]
+    assert columns.hashtag_ptr.tolist() == [0, 2, 3, 5, 7, 7]
+    assert columns.stats[1, 0] == 2000
+    assert np.isnan(columns.stats[4]).all()
+    rate = engagement_rate(columns)
+    assert rate[:2].tolist() == [0.1, 0.05]
+    assert np.isnan(rate[2])
+
+    reports = analyze(columns, min_posts=2)
+    hashtags = reports["engagement_hashtagName"]
+    assert list(hashtags) == ["cat", "dog"]  # owl is on one post only
+    assert hashtags["cat"]["posts"] == 3
+    assert hashtags["cat"]["plays"]["p50"] == 1000.0
+    assert hashtags["dog"]["posts"] == 2  # tagged twice on one post, still one post
+    assert hashtags["dog"]["engagement_rate"]["p50"] == 0.1
+    assert list(reports["engagement_uniqueId"]) == ["amy"]
+    assert reports["posts_by_week"]["2024-05-27"]["posts"] == 1
+    assert reports["posts_by_week"]["2024-06-03"] == {
+        "posts": 3,
+        "median_plays": 2000.0,
+        "median_engagement_rate": 0.1,
+    }
+    durations = reports["duration_distribution"]
+    assert durations["posts"] == 4
+    assert durations["bins"]["15-30s"]["posts"] == 3
+    assert durations["bins"]["60-90s"] == {"posts": 1, "median_engagement_rate": 0.05}
+
+
+def test_script_writes_reports_next_to_frequency_tables() -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        source = Path(tmp) / "post_data.json"
+        source.write_text(json.dumps(POSTS, indent=2), encoding="utf-8")
+        script = Path(__file__).parent / "post_processing" / "engagement_analytics.py"
+        subprocess.run(
+            [sys.executable, str(script), "--input", str(source), "--output-dir", tmp],
+            check=True,
+            capture_output=True,
+        )
+        written = sorted(path.name for path in (Path(tmp) / "json_output_directory").iterdir())
+    assert written == [
+        "duration_distribution.json",
+        "engagement_diversificationLabels.json",
+        "engagement_hashtagName.json",
+        "engagement_uniqueId.json",
+        "posts_by_week.json",
+    ]
+
+
+def test_cooccurrence_counts_pairs_once_per_post_and_ranks_by_pmi() -> None:
+    tag_lists = [["a", "b", "c"], ["b", "a", "a"], ["c", "d"], ["a", "b", "Unknown"], ["d"], []]
+    posts = [_post("amy", 10, 1, tags) for tags in tag_lists]
+    columns = load_columns(posts)
+    pairs = cooccurrence(columns, block_pairs=2)  # several blocks, merged
+    names = columns.hashtags.names
+    counted = {
+        (names[a], names[b]): int(n)
+        for a, b, n in zip(pairs.first, pairs.second, pairs.posts, strict=True)
+    }
+    expected: dict[tuple[str, str], int] = {}
+    for tags in tag_lists:
+        unique = sorted({tag for tag in tags if tag != "Unknown"}, key=names.index)
+        for pair in itertools.combinations(unique, 2):
+            expected[pair] = expected.get(pair, 0) + 1
+    assert counted == expected == {("a", "b"): 3, ("a", "c"): 1, ("b", "c"): 1, ("c", "d"): 1}
+
+    result = report(pairs, names, top=2, min_count=1)
+    assert (result["posts"], result["hashtags"], result["pairs"]) == (6, 4, 4)
+    assert result["top_by_posts"][0] == {
+        "hashtags": ["a", "b"],
+        "posts": 3,
+        "pmi": round(math.log(3 * 6 / (3 * 3)), 4),
+        "npmi": round(math.log(2) / -math.log(3 / 6), 4),
+    }
+    # PMI: a+b log(2), c+d log(1.5), a+c and b+c log(1) -- ties by post count, then ID.
+    ranked = report(pairs, names, min_count=1)["top_by_pmi"]
+    assert [row["hashtags"] for row in ranked] == [["a", "b"], ["c", "d"], ["a", "c"], ["b", "c"]]
+    assert [row["hashtags"] for row in report(pairs, names, min_count=2)["top_by_pmi"]] == [
+        ["a", "b"]
+    ]
+
+
+if __name__ == "__main__":
+    for _name, _case in sorted(globals().items()):
+        if _name.startswith("test_"):
+            _case()
+            print(f"ok  {_name}")
+    print("all passed")
@@ -0,0 +1,207 @@
+"""Offline checks for the frequency counting stage. Run: python test_post_data_collection.py"""
+
+import contextlib
+import json
+import sqlite3
+import tempfile
+from collections import Counter
+from pathlib import Path
+
+from post_processing.post_data_collection import (
+    FrequencyState,
+    count_db,
+    count_frequencies,
+    count_frequencies_parallel,
+    iter_posts,
+    json_chunks,
+    load_json,
+    main,
+)
+from scraping.sqlite_store import SqliteStore
+
+
+def _post(post_id: str, author: str, hashtags: list[str], **extra: object) -> dict:
+    return {
+        "id": post_id,
+        "author": {"uniqueId": author, "verified": author.startswith("v")},
+        "locationCreated": "US",
+        "diversificationLabels": ["Food"],
+        "suggestedWords": ["bagel"],
+        "contents": [{"textExtra": [{"hashtagName": tag} for tag in hashtags]}],
+        **extra,
+    }
+
+
+POSTS = [
+    _post("1", "amy", ["cat", "dog"]),
+    _post("2", "vic", ["dog"], locationCreated="GB"),
+    {"id": "3", "contents": [{"textExtra": [{}]}]},
+    _post("4", "amy", ["owl", "cat"], stats={"playCount": 1.5}),
+]
+
+
+def _tables(output_dir: Path) -> dict[str, bytes]:
+    return {
+        path.relative_to(output_dir).as_posix(): path.read_bytes()
+        for path in sorted(output_dir.rglob("*"))
+        if path.is_file()
+    }
+
+
+def test_streamed_json_matches_loading_it_whole() -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        source = Path(tmp) / "post_data.json"
+        source.write_text(json.dumps(POSTS, indent=4), encoding="utf-8")
+        assert list(iter_posts(str(source))) == load_json(str(source))
+        assert count_frequencies(iter_posts(str(source))) == count_frequencies(POSTS)
+
+
+def test_jsonl_log_counts_like_its_compacted_json() -> None:
+    refreshed = _post("1", "amy", ["cat", "dog", "emu"])
+    with tempfile.TemporaryDirectory() as tmp:
+        log_file = Path(tmp) / "post_data.jsonl"
+        lines = [json.dumps(post) for post in [*POSTS, refreshed]]
+        log_file.write_text("\n".join(lines) + '\n{"id": "5", "tor', encoding="utf-8")
+        compacted = Path(tmp) / "post_data.json"
+        compacted.write_text(json.dumps([refreshed, *POSTS[1:]]), encoding="utf-8")
+
+        main(str(log_file), str(Path(tmp) / "from_log"))
+        main(str(compacted), str(Path(tmp) / "from_json"))
+        from_log = _tables(Path(tmp) / "from_log")
+        assert from_log == _tables(Path(tmp) / "from_json")
+        assert len(from_log) == 12
+        assert json.loads(from_log["json_output_directory/hashtagName.json"]) == {
+            "cat": 2,
+            "dog": 2,
+            "Unknown": 1,
+            "emu": 1,
+            "owl": 1,
+        }
+
+
+def test_incremental_state_folds_only_new_posts() -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        source = Path(tmp) / "post_data.json"
+        state_file = Path(tmp) / "frequency_state.json"
+        source.write_text(json.dumps(POSTS[:2]), encoding="utf-8")
+        main(str(source), str(Path(tmp) / "first"), state_path=str(state_file))
+
+        source.write_text(json.dumps(POSTS), encoding="utf-8")
+        state = FrequencyState.load(state_file)
+        assert state.fold(iter_posts(str(source))) == 2
+        assert state.fold(iter_posts(str(source))) == 0
+        main(str(source), str(Path(tmp) / "incremental"), state_path=str(state_file))
+        main(str(source), str(Path(tmp) / "full"))
+        assert _tables(Path(tmp) / "incremental") == _tables(Path(tmp) / "full")
+        assert FrequencyState.load(state_file).frequencies["verified"] == {False: 3, True: 1}
+
+
+def test_fold_input_parses_only_posts_past_what_was_counted() -> None:
+    posts = [_post(str(n), f"a{n % 3}", [f"t{n % 4}"]) for n in range(1, 41)]
+    expected = count_frequencies(posts)
+    with tempfile.TemporaryDirectory() as tmp:
+        indented = Path(tmp) / "post_data.json"
+        log_file = Path(tmp) / "post_data.jsonl"
+        db = Path(tmp) / "post_data.db"
+        states = {"json": FrequencyState(), "jsonl": FrequencyState(), "db": FrequencyState()}
+        for batch in (posts[:30], posts):
+            indented.write_text(json.dumps(batch, indent=2), encoding="utf-8")
+            with log_file.open("a", encoding="utf-8") as file:
+                file.writelines(json.dumps(post) + "\n" for post in batch[len(batch) - 30 :])
+            store = SqliteStore(db)
+            for post in batch:
+                store.add(post)
+            store.close()
+            folded = [
+                states["json"].fold_input(str(indented), chunk_bytes=500),
+                states["jsonl"].fold_input(str(log_file)),
+                states["db"].fold_input("", str(db)),
+            ]
+            assert folded == [30, 30, 30] if len(batch) == 30 else [10, 10, 10]
+            # Garble every counted post's body: none of it may be parsed again.
+            indented.write_bytes(indented.read_bytes().replace(b'"a1"', b"a1"))
+            log_file.write_bytes(log_file.read_bytes().replace(b'"a1"', b"a1"))
+            with contextlib.closing(sqlite3.connect(db)) as connection, connection:
+                connection.execute("UPDATE posts SET data = 'garbled'")
+
+        for state in states.values():
+            assert state.fold_input(str(indented), chunk_bytes=500) == 0
+            assert state.frequencies == expected
+        assert states["jsonl"].fold_input(str(log_file)) == 0
+        assert states["db"].fold_input("", str(db)) == 0
+
+
+def test_states_merge_across_shards() -> None:
+    shards = [FrequencyState(), FrequencyState()]
+    shards[0].fold(POSTS[:3])
+    shards[1].fold(POSTS[3:])
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = [str(Path(tmp) / f"shard{n}.json") for n in range(2)]
+        for shard, path in zip(shards, paths, strict=True):
+            shard.save(Path(path))
+        merged = FrequencyState()
+        for path in paths:
+            assert merged.merge(FrequencyState.load(Path(path))) == 0
+        assert merged.merge(FrequencyState.load(Path(paths[1]))) == 1
+    assert merged.post_ids == {"1", "2", "3", "4"}
+    full = count_frequencies(POSTS)
+    assert merged.frequencies["hashtagName"] == full["hashtagName"] + Counter({"owl": 1, "cat": 1})
+    assert merged.frequencies["uniqueId"] == full["uniqueId"] + Counter({"amy": 1})
+
+
+def test_db_is_counted_in_sqlite_like_its_posts_would_be() -> None:
+    posts = [
+        *POSTS,
+        {"id": "5", "author": {}, "locationCreated": None, "suggestedWords": None},
+        {"id": "6", "author": {"uniqueId": None, "verified": None}, "suggestedWords": ["a", 3]},
+        _post("7", "vic", ["emu", "cat", "emu"], diversificationLabels=["Pets", "Food"]),
+    ]
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Path(tmp) / "post_data.db"
+        store = SqliteStore(db)
+        for post in posts:
+            store.add(post)
+        store.close()
+        counted = count_db(str(db))
+        # Same values in the same first-seen order, so ties break alike.
+        assert {key: list(counter.items()) for key, counter in counted.items()} == {
+            key: list(counter.items()) for key, counter in count_frequencies(posts).items()
+        }
+        assert count_db(str(db), (2, 4)) == count_frequencies(posts[1:3])
+
+
+def test_parallel_counting_matches_one_process_in_every_layout() -> None:
+    posts = [_post(str(n), f"a{n % 7}", [f"t{n % 5}", f"t{n % 3}"]) for n in range(1, 60)]
+    posts[10] = {"id": "11"}
+    expected = count_frequencies(posts)
+    with tempfile.TemporaryDirectory() as tmp:
+        indented = Path(tmp) / "post_data.json"
+        indented.write_text(json.dumps(posts, indent=2, ensure_ascii=False), encoding="utf-8")
+        assert len(json_chunks(str(indented), chunk_bytes=2000)) > 3
+        compact = Path(tmp) / "compact.json"
+        compact.write_text(json.dumps(posts), encoding="utf-8")
+        assert json_chunks(str(compact)) == []
+        log_file = Path(tmp) / "post_data.jsonl"
+        log_file.write_text(
+            "".join(json.dumps(post, ensure_ascii=False) + "\n" for post in posts), encoding="utf-8"
+        )
+        db = Path(tmp) / "post_data.db"
+        store = SqliteStore(db)
+        for post in posts:
+            store.add(post)
+        store.close()
+
+        for path, db_path in [(indented, None), (compact, None), (log_file, None), ("", db)]:
+            counted = count_frequencies_parallel(
+                str(path), 2, str(db_path) if db_path else None, chunk_bytes=2000, chunk_posts=7
+            )
+            for key, counter in expected.items():
+                assert list(counted[key].most_common()) == list(counter.most_common()), path
+
+
+if __name__ == "__main__":
+    for _name, _case in sorted(globals().items()):
+        if _name.startswith("test_"):
+            _case()
+            print(f"ok  {_name}")
+    print("all passed")
@@ -6,20 +6,63 @@ against a saved page with `python tiktok_post_scraper.py --parse-html page.html`
 
 import argparse
 import asyncio
+import contextlib
+import functools
 import json
+import pickle
+import sqlite3
 import tempfile
+import time
 from pathlib import Path
+from typing import Any, cast
 
 import httpx
-
+import jmespath
+
+from benchmarks.mock_tiktok import MockTikTok, TokenBucket
+from scraping.client_pool import ClientPool
+from scraping.failure_ledger import FailureLedger
+from scraping.html_cache import HtmlCache
+from scraping.id_index import IdIndex
+from scraping.job_queue import JobQueue
+from scraping.metrics import Histogram, ScrapeMetrics, serve_prometheus
+from scraping.projection import compile_projection
+from scraping.rate_control import RateController
+from scraping.sqlite_store import SqliteStore
+from scraping.stats_history import STAT_FIELDS, StatsHistory
+from scraping.sync_state import SyncState
 from tiktok_post_scraper import (
+    _POST_QUERY,
+    FetchResult,
+    HttpClient,
+    JsonlStore,
+    JsonStore,
+    _advance_watermark,
+    _compile_query,
     _positive_int,
+    _read_jsonl,
+    _read_until_rehydration,
+    _record_results,
     _write_output,
     binary_search,
+    build_parse_pool,
+    compact_log,
+    extract_rehydration_fast,
+    extract_rehydration_xpath,
     fetch_and_parse,
+    iter_liked_urls,
+    load_existing,
+    load_favorite_ids,
     load_urls_and_favorites_from_json,
+    newest_like_date,
+    parse_args,
     parse_post,
+    plan_accounts,
+    reparse_cache,
+    scrape_posts,
+    stale_posts,
     video_id_from_url,
+    write_account_outputs,
 )
 
 
@@ -87,8 +130,46 @@ def test_parse_post_extracts_fields() -> None:
     assert post["isFavorite"] is True
 
 
+def test_compiled_projection_matches_jmespath() -> None:
+    project = compile_projection(_POST_QUERY)
+    shapes = [
+        {},
+        {"id": "1", "video": None, "author": "not-a-dict", "contents": None},
+        {"contents": [{"textExtra": None}, {"textExtra": [{"hashtagName": "a"}, {}]}, 5]},
+        {"contents": [[{"textExtra": [{"hashtagName": "nested"}]}]], "stats": {"x": 1}},
+    ]
+    for item in shapes:
+        assert project(item) == jmespath.search(_POST_QUERY, item), item
+
+
+def test_unsupported_query_falls_back_to_jmespath() -> None:
+    query = "{tags: length(contents), id: id}"  # compile_projection has no functions
+    project = _compile_query(query)
+    assert project({"id": "1", "contents": [1, 2]}) == {"tags": 2, "id": "1"}
+    assert _compile_query(_POST_QUERY).__module__ == "scraping.projection"
+
+
+def test_parse_post_coerces_string_counts() -> None:
+    post = parse_post(_page({"id": "1", "stats": {"diggCount": 5, "collectCount": "700"}}), None)
+    assert post["stats"] == {"diggCount": 5, "collectCount": 700}
+
+
 def test_parse_post_missing_script() -> None:
     assert parse_post("<html><body>no data here</body></html>", None) == {}
+    assert parse_post("<html><body>no data here</body></html>", None, "xpath") == {}
+
+
+def test_fast_extractor_matches_xpath() -> None:
+    # The id also appears outside the tag first; the scan must skip that mention.
+    page = '<link rel="preload" data-x="__UNIVERSAL_DATA_FOR_REHYDRATION__">' + _page(
+        {"id": "1", "desc": "caf\u00e9 </b>"}
+    )
+    expected = extract_rehydration_xpath(page)
+    assert expected is not None
+    assert extract_rehydration_fast(page) == expected
+    assert extract_rehydration_fast(page.encode()) == expected.encode()
+    assert parse_post(page.encode(), None)["desc"] == "caf\u00e9 </b>"
+    assert extract_rehydration_fast("<script id='__UNIVERSAL_DATA_FOR_REHYDRATION__'>{") is None
 
 
 def test_load_urls_and_favorites() -> None:
@@ -119,6 +200,99 @@ def test_load_urls_and_favorites() -> None:
     assert favorites == ["111"]
 
 
+def test_iter_liked_urls_streams_only_what_it_needs() -> None:
+    # The loader must skip unrelated sections and stop reading once it has
+    # `limit` likes, so a truncated tail (standing in for a huge rest of the
+    # file) is never reached.
+    likes = [{"Date": "2024-05-02 10:00:00", "Link": f"https://x/share/video/{n}/"} for n in (2, 1)]
+    head = json.dumps(
+        {"Activity": {"Watch History": {"VideoList": [{"Link": "w"}] * 3}, "Like List": {}}}
+    )
+    text = head.replace('"Like List": {}', '"Like List": {"ItemFavoriteList": ' + json.dumps(likes))
+    text = text.removesuffix("}}}") + ', {"Date": "broken'  # corrupt tail after the 2nd like
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "export.json"
+        path.write_text(text, encoding="utf-8")
+        urls = iter_liked_urls(str(path), limit=2)
+        assert next(urls) == "https://x/@/video/2/"
+        assert list(urls) == ["https://x/@/video/1/"]
+
+        path.write_text(json.dumps({"Activity": {"Like List": {}}}), encoding="utf-8")
+        assert load_favorite_ids(str(path), None) is None  # no favorites list at all
+
+
+def _export(likes: list[tuple[str, str]], favorites: list[tuple[str, str]]) -> dict:
+    return {
+        "Activity": {
+            "Like List": {
+                "ItemFavoriteList": [
+                    {"Date": date, "Link": f"https://x/share/video/{n}/"} for date, n in likes
+                ]
+            },
+            "Favorite Videos": {
+                "FavoriteVideoList": [
+                    {"Date": date, "Link": f"https://x/video/{n}/"} for date, n in favorites
+                ]
+            },
+        }
+    }
+
+
+def test_incremental_watermark_reads_only_new_likes() -> None:
+    old_likes = [("2024-05-02 10:00:00", "2"), ("2024-05-01 10:00:00", "1")]
+    week1 = _export(old_likes, [("2024-05-01 09:00:00", "1")])
+    new_likes = [("2024-05-09 10:00:00", "4"), ("2024-05-08 10:00:00", "3")]
+    # 1 is no longer listed as a favorite in the second export.
+    week2 = _export(new_likes + old_likes, [("2024-05-08 09:00:00", "3")])
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "export.json"
+        args = argparse.Namespace(input=str(path), limit=10)
+        state = Path(tmp) / "sync_state.json"
+
+        path.write_text(json.dumps(week1), encoding="utf-8")
+        sync = SyncState(state)
+        sync.merge_favorites(load_favorite_ids(str(path), newest_like_date(str(path))))
+        _advance_watermark(sync, args, newest_like_date(str(path)))
+
+        path.write_text(json.dumps(week2), encoding="utf-8")
+        sync = SyncState(state)
+        new = list(iter_liked_urls(str(path), 10, newer_than=sync.watermark))
+        assert new == ["https://x/@/video/4/", "https://x/@/video/3/"]
+        assert sync.merge_favorites(["3"]) == ["1", "3"]  # merged across exports
+
+        # Two new likes but --limit 1: the watermark must not skip past the second.
+        _advance_watermark(sync, argparse.Namespace(input=str(path), limit=1), None)
+        assert str(SyncState(state).watermark) == "2024-05-02 10:00:00"
+        _advance_watermark(sync, args, newest_like_date(str(path)))
+        assert str(SyncState(state).watermark) == "2024-05-09 10:00:00"
+
+
+def test_several_exports_fetch_each_video_once_with_own_favorites() -> None:
+    alice = _export(
+        [("2024-05-02 10:00:00", "1"), ("2024-05-01 10:00:00", "2")],
+        [("2024-05-01 09:00:00", "2"), ("2024-04-01 09:00:00", "9")],  # 9 was never liked
+    )
+    bob = _export([("2024-05-03 10:00:00", "2"), ("2024-05-01 10:00:00", "3")], [])
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = []
+        for name, export in (("alice", alice), ("bob", bob)):
+            path = Path(tmp) / f"{name}.json"
+            path.write_text(json.dumps(export), encoding="utf-8")
+            paths.append(str(path))
+        assert parse_args(["--input", paths[0], "--input", paths[1]]).inputs == paths
+
+        to_fetch, account_posts, favorites = plan_accounts(paths, limit=10)
+        assert list(to_fetch) == ["1", "2", "9", "3"]  # 2 is fetched once for both
+        assert account_posts == {"alice": ["1", "2", "9"], "bob": ["2", "3"]}
+
+        scraped = [{"id": n, "desc": f"post {n}"} for n in ("1", "2", "3")]  # 9 failed
+        write_account_outputs(scraped, account_posts, favorites, Path(tmp))
+        alice_out = json.loads((Path(tmp) / "alice" / "post_data.json").read_text("utf-8"))
+        bob_out = json.loads((Path(tmp) / "bob" / "post_data.json").read_text("utf-8"))
+    assert [(post["id"], post["isFavorite"]) for post in alice_out] == [("1", False), ("2", True)]
+    assert [(post["id"], post["isFavorite"]) for post in bob_out] == [("2", False), ("3", False)]
+
+
 def test_parse_post_missing_id_does_not_crash() -> None:
     # A post with no "id" but a favorites list must not blow up binary_search.
     item = {"desc": "x", "author": {"uniqueId": "a"}, "contents": []}
@@ -159,6 +333,249 @@ def test_fetch_and_parse_never_raises() -> None:
     assert results == [{}, {}]
 
 
+def test_scrape_posts_slow_url_does_not_stall_the_pool() -> None:
+    # With a sliding window, a URL stuck in backoff only ties up its own worker:
+    # the other slot keeps pulling fresh URLs instead of waiting at a barrier.
+    finished: list[str] = []
+
+    class _SlowFirstClient:
+        async def get(self, url):
+            if url.endswith("/1"):
+                await asyncio.sleep(0.2)
+            finished.append(url)
+            return httpx.Response(404, request=httpx.Request("GET", url))
+
+    urls = [f"http://x/video/{n}" for n in range(1, 7)]
+    with tempfile.TemporaryDirectory() as tmp:
+        out = Path(tmp) / "post_data.json"
+        store = JsonStore(out)
+        client = cast(HttpClient, _SlowFirstClient())
+        asyncio.run(scrape_posts(client, urls, None, store, concurrency=2, delay=0))
+        assert json.loads(out.read_text(encoding="utf-8")) == []
+    assert finished[-1] == "http://x/video/1"  # everything else finished first
+    assert sorted(finished) == sorted(urls)
+
+
+def test_scrape_posts_retries_from_heap_without_holding_a_worker() -> None:
+    # One worker: /1 is throttled once and /2 always. Neither backoff may block the
+    # fresh URLs behind it, and /2's final failure must carry its attempt count.
+    calls: list[str] = []
+
+    class _Client:
+        async def get(self, url):
+            calls.append(url)
+            throttled = url.endswith("/2") or (calls.count(url) == 1 and url.endswith("/1"))
+            status = 429 if throttled else 200
+            page = _page({"id": url.rsplit("/", 1)[1]})
+            return httpx.Response(status, text=page, request=httpx.Request("GET", url))
+
+    results: list[FetchResult] = []
+    urls = [f"http://x/video/{n}" for n in range(1, 5)]
+    with tempfile.TemporaryDirectory() as tmp:
+        store = JsonStore(Path(tmp) / "post_data.json")
+        scraped = asyncio.run(
+            scrape_posts(
+                cast(HttpClient, _Client()),
+                urls,
+                None,
+                store,
+                concurrency=1,
+                delay=0,
+                retries=3,
+                on_checkpoint=results.extend,
+                backoff=lambda attempt: 0.05 * attempt,
+            )
+        )
+    assert scraped == 3
+    assert calls[:4] == urls  # fresh URLs first; the retries come after
+    assert calls.count("http://x/video/2") == 3
+    (gave_up,) = [result for result in results if not result.post]
+    assert (gave_up.url, gave_up.status, gave_up.attempts) == ("http://x/video/2", 429, 3)
+
+
+def test_scrape_posts_records_metrics_and_serves_prometheus() -> None:
+    class _Client:
+        async def get(self, url):
+            page = {"1": _page({"id": "1"}), "2": "<html>no post</html>"}.get(url[-1], "")
+            status = 429 if url.endswith("/3") else 200
+            return httpx.Response(status, text=page, request=httpx.Request("GET", url))
+
+    metrics = ScrapeMetrics()
+
+    async def scenario() -> str:
+        with tempfile.TemporaryDirectory() as tmp:
+            store = JsonStore(Path(tmp) / "post_data.json")
+            urls = [f"http://x/video/{n}" for n in (1, 2, 3)]
+            await scrape_posts(
+                cast(HttpClient, _Client()),
+                urls,
+                None,
+                store,
+                delay=0,
+                retries=2,
+                metrics=metrics,
+                backoff=lambda _: 0,
+            )
+        server = await serve_prometheus(metrics, 0)
+        port = server.sockets[0].getsockname()[1]
+        try:
+            async with httpx.AsyncClient() as client:
+                response = await client.get(f"http://127.0.0.1:{port}/metrics")
+        finally:
+            server.close()
+        return response.text
+
+    text = asyncio.run(scenario())
+    stats = metrics.snapshot()
+    assert stats["status_counts"] == {"200": 2, "429": 2}
+    assert (stats["scraped"], stats["failed"], stats["retries"]) == (1, 2, 1)
+    assert stats["empty_parse_rate"] == 0.5
+    assert stats["fetch_latency_seconds"]["count"] == 4
+    assert stats["in_flight"] == 0
+    assert 'tiktok_scraper_requests_total{status="429"} 2' in text
+    assert 'tiktok_scraper_fetch_latency_seconds_bucket{le="+Inf"} 4' in text
+
+
+def test_histogram_quantiles_interpolate_within_buckets() -> None:
+    histogram = Histogram((1.0, 2.0, 4.0))
+    for value in (0.5, 1.5, 1.5, 3.0):
+        histogram.observe(value)
+    assert histogram.quantile(0.5) == 1.5  # halfway through the (1, 2] bucket
+    assert histogram.quantile(1.0) == 4.0
+    assert Histogram((1.0,)).quantile(0.5) is None
+
+
+def test_rate_controller_aimd() -> None:
+    rate = RateController(2.0, min_rate=0.5, max_rate=2.5, increase=0.25, decrease=0.5)
+    rate.on_success()
+    rate.on_success()
+    rate.on_success()
+    assert rate.rate == 2.5  # additive increase, capped at max_rate
+    rate.on_throttle()
+    assert rate.rate == 1.25  # multiplicative decrease
+    rate.on_throttle()
+    rate.on_throttle()
+    assert rate.rate == 0.5  # floored at min_rate
+
+
+def test_rate_controller_storm_pauses_acquire() -> None:
+    # A burst of throttles trips a shared cool-down; acquire() must wait it out.
+    now = [0.0]
+    slept: list[float] = []
+
+    async def fake_sleep(seconds: float) -> None:
+        slept.append(seconds)
+        now[0] += seconds
+
+    rate = RateController(
+        10.0,
+        storm_threshold=2,
+        storm_window=5.0,
+        cooldown=30.0,
+        clock=lambda: now[0],
+        sleep=fake_sleep,
+    )
+    rate.on_throttle()
+    assert not rate.cooling_down
+    rate.on_throttle()
+    assert rate.cooling_down
+    asyncio.run(rate.acquire())
+    assert now[0] == 30.0  # slept exactly through the cool-down
+    assert sum(slept) == 30.0
+
+
+def test_fetch_and_parse_reports_throttle_to_rate_controller() -> None:
+    rate = RateController(5.0, storm_threshold=99)
+    client = cast(HttpClient, _FakeClient(status=429))
+    asyncio.run(fetch_and_parse(client, "http://x/video/1", None, retries=1, rate=rate))
+    assert rate.rate == 2.5
+
+
+def test_concurrent_throttles_cut_the_rate_once() -> None:
+    # Eight requests in flight all come back 429: one congestion event, one cut,
+    # and no storm. A request sent after the cut that is throttled cuts again.
+    rate = RateController(1000.0, max_rate=1000.0, storm_threshold=3)
+    arrived = 0
+    all_sent = asyncio.Event()
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal arrived
+        arrived += 1
+        if arrived >= 8:
+            all_sent.set()
+        await all_sent.wait()
+        return httpx.Response(429)
+
+    async def scrape(urls: list[str]) -> None:
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            await asyncio.gather(
+                *(fetch_and_parse(client, url, None, retries=1, rate=rate) for url in urls)
+            )
+
+    asyncio.run(scrape([f"http://x/video/{n}" for n in range(8)]))
+    assert rate.rate == 500.0
+    assert not rate.cooling_down
+    asyncio.run(scrape(["http://x/video/9"]))
+    assert rate.rate == 250.0
+
+
+def test_fetch_and_parse_stream_stops_after_script() -> None:
+    # Streaming must stop pulling chunks once the rehydration script has closed.
+    page = _page({"id": "1", "desc": "streamed"}).encode()
+    chunks = [page[i : i + 16] for i in range(0, len(page), 16)] + [b"<div>tail</div>"] * 50
+    pulled: list[bytes] = []
+
+    async def body():
+        for chunk in chunks:
+            pulled.append(chunk)
+            yield chunk
+
+    class _StreamingClient:
+        @contextlib.asynccontextmanager
+        async def stream(self, method, url):
+            yield httpx.Response(200, content=body(), request=httpx.Request(method, url))
+
+    post = asyncio.run(
+        fetch_and_parse(
+            cast(HttpClient, _StreamingClient()), "http://x/video/1", None, retries=1, stream=True
+        )
+    )
+    assert post["desc"] == "streamed"
+    assert len(pulled) < len(chunks) - 40  # the tail was never read
+
+
+def test_streamed_read_stops_at_the_script_however_the_page_is_chunked() -> None:
+    # A mention of the id outside a script tag mustn't count; the id and the
+    # closing tag may arrive split across chunks.
+    decoy = b'<script>var id = "__UNIVERSAL_DATA_FOR_REHYDRATION__";</script>'
+    page = decoy + _page({"id": "1", "desc": "split"}).encode()
+    end = page.index(b"</script>", len(decoy)) + len(b"</script>")
+
+    async def read(chunks: list[bytes]) -> bytes:
+        async def body():
+            for chunk in chunks:
+                yield chunk
+
+        return await _read_until_rehydration(httpx.Response(200, content=body()))
+
+    for size in (1, 3, 16, len(page)):
+        chunks = [page[i : i + size] for i in range(0, len(page), size)]
+        streamed = asyncio.run(read([*chunks, b"<div>tail</div>"]))
+        assert end <= len(streamed) < end + size
+        assert parse_post(streamed, None)["desc"] == "split"
+
+
+def test_fetch_and_parse_in_parse_pool() -> None:
+    # Parsing in a worker process gives the same post, favorites included.
+    client = cast(HttpClient, _FakeClient(status=200, text=_page({"id": "111", "desc": "pooled"})))
+    with build_parse_pool(1, ["111"]) as pool:
+        post = asyncio.run(
+            fetch_and_parse(client, "http://x/video/111", None, retries=1, parse_pool=pool)
+        )
+    assert post["desc"] == "pooled"
+    assert post["isFavorite"] is True
+
+
 def test_positive_int_rejects_non_positive() -> None:
     assert _positive_int("5") == 5
     for bad in ("0", "-3"):
@@ -178,6 +595,405 @@ def test_write_output_is_atomic_and_leaves_no_tmp() -> None:
         assert not list(out.parent.glob("*.tmp"))  # temp file was replaced, not left behind
 
 
+def test_jsonl_store_appends_resumes_and_compacts() -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        log_file = Path(tmp) / "post_data.jsonl"
+        store = JsonlStore(log_file, fsync_every=1)
+        store.add({"id": "1", "desc": "old"})
+        store.add({"id": "2"})
+        store.close()
+
+        # Simulate a crash mid-append: a torn final line must not break resume.
+        with log_file.open("a", encoding="utf-8") as file:
+            file.write('{"id": "3", "de')
+        store = JsonlStore(log_file)
+        assert set(store.saved_ids()) == {"1", "2"}
+        store.add({"id": "1", "desc": "new"})
+        store.close()
+        assert [post["id"] for post in load_existing(log_file)] == ["1", "2", "1"]
+
+        out = Path(tmp) / "post_data.json"
+        assert compact_log(log_file, out) == 2
+        assert json.loads(out.read_text(encoding="utf-8")) == [
+            {"id": "1", "desc": "new"},  # first position, latest data
+            {"id": "2"},
+        ]
+
+
+def test_jsonl_store_drops_torn_tail_longer_than_a_read() -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        log_file = Path(tmp) / "post_data.jsonl"
+        log_file.write_text('{"id": "9", "desc": "' + "x" * 100_000, encoding="utf-8")
+        JsonlStore(log_file).close()
+        assert log_file.read_bytes() == b""
+
+        intact = '{"id": "1"}\n'
+        log_file.write_text(intact + '{"id": "2", "desc": "' + "x" * 100_000, encoding="utf-8")
+        store = JsonlStore(log_file)
+        assert set(store.saved_ids()) == {"1"}
+        store.close()
+        assert log_file.read_text(encoding="utf-8") == intact
+
+
+def test_reparse_cache_rebuilds_output_from_newest_pages() -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = HtmlCache(Path(tmp) / "cache")
+        cache.put("111", b"<html>old markup</html>", fetched_at=1.0)
+        cache.put("111", _page({"id": "111", "desc": "new"}).encode(), fetched_at=2.0)
+        cache.put("222", _page({"id": "222", "desc": "other"}).encode(), fetched_at=1.0)
+        assert set(cache.latest()) == {"111", "222"}
+
+        out_dir = Path(tmp) / "out"
+        args = parse_args(
+            [
+                "--reparse-cache",
+                "--cache-dir", str(cache.root),
+                "--output-dir", str(out_dir),
+                "--input", str(Path(tmp) / "missing.json"),
+                "--parse-workers", "1",
+            ]
+        )  # fmt: skip
+        reparse_cache(args)
+        posts = json.loads((out_dir / "post_data.json").read_text(encoding="utf-8"))
+    assert [(post["id"], post["desc"]) for post in posts] == [("111", "new"), ("222", "other")]
+
+
+def test_id_index_roundtrip_merge_and_pickle() -> None:
+    index = IdIndex.from_ids(["7400543367504858373", "5", "not-an-id", "5"])
+    assert list(index) == ["5", "7400543367504858373"]
+    assert "5" in index
+    assert "6" not in index
+    assert "" not in index
+    merged = index.merged(["6", "5"], covered=42)
+    assert list(merged) == ["5", "6", "7400543367504858373"]
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "post_data.ids"
+        merged.save(path)
+        loaded = IdIndex.load(path)  # memory-mapped
+        assert loaded.covered == 42
+        assert "7400543367504858373" in loaded
+        assert list(pickle.loads(pickle.dumps(loaded))) == list(merged)
+        loaded.save(path)  # over the very file it maps
+        assert list(loaded) == list(merged) and "6" in loaded
+        assert list(IdIndex.load(path)) == list(merged)
+        loaded.close()
+    assert len(IdIndex.load(Path("does-not-exist.ids"))) == 0
+
+
+def test_jsonl_resume_reads_only_the_unindexed_tail() -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        log_file = Path(tmp) / "post_data.jsonl"
+        store = JsonlStore(log_file)
+        store.add({"id": "111"})
+        store.close()  # checkpoint: index now covers the whole log
+        # Append behind the index's back, and garble the indexed part: resume must
+        # trust the index for the covered bytes and parse only the new line.
+        with log_file.open("a", encoding="utf-8") as file:
+            file.write('{"id": "222"}\n')
+        data = log_file.read_bytes()
+        log_file.write_bytes(b"x" * data.index(b"\n") + data[data.index(b"\n") :])
+        store = JsonlStore(log_file)
+        assert set(store.saved_ids()) == {"111", "222"}
+        store.close()
+
+
+def test_jsonl_saved_ids_survive_checkpoints() -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        log_file = Path(tmp) / "post_data.jsonl"
+        store = JsonlStore(log_file)
+        store.add({"id": "111"})
+        store.close()
+        store = JsonlStore(log_file)  # resumes from the memory-mapped index
+        done = store.saved_ids()
+        store.add({"id": "222"})
+        store.checkpoint()  # swaps in a new index and unmaps the old one
+        store.add({"id": "333"})
+        store.checkpoint()
+        assert set(done) == {"111"}
+        assert set(store.saved_ids()) == {"111", "222", "333"}
+        store.close()
+
+
+def test_sqlite_store_upserts_in_first_scraped_order() -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "post_data.db"
+        store = SqliteStore(path)
+        store.add({"id": "1", "author": {"id": "a", "uniqueId": "chef"}, "stats": {"x": 1}})
+        store.add({"id": "2", "contents": [{"textExtra": [{"hashtagName": "bagel"}]}]})
+        store.checkpoint()
+        store.add({"id": "1", "author": {"id": "a", "uniqueId": "chef"}, "stats": {"x": 9}})
+        mention = {"textExtra": [{"hashtagName": None}, {"hashtagName": "bagel"}]}
+        store.add({"id": "3", "contents": [mention], "diversificationLabels": [None, "", "Food"]})
+        store.close()
+
+        store = SqliteStore(path)
+        assert set(store.saved_ids()) == {"1", "2", "3"}
+        posts = list(store.iter_posts())
+        assert [post["id"] for post in posts] == ["1", "2", "3"]  # refreshed in place
+        assert posts[0]["stats"] == {"x": 9}
+        store.close()
+        with contextlib.closing(sqlite3.connect(path)) as connection:
+            assert connection.execute(
+                "SELECT name, COUNT(*) FROM post_hashtags JOIN hashtags ON id = hashtag_id "
+                "GROUP BY name ORDER BY name"
+            ).fetchall() == [("Unknown", 1), ("bagel", 2)]
+            assert connection.execute("SELECT name FROM labels").fetchall() == [("Food",)]
+
+
+def test_job_queue_reclaims_expired_leases_only() -> None:
+    now = [0.0]
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "jobs.db"
+        queue = JobQueue(path, lease_seconds=10, clock=lambda: now[0])
+        assert queue.seed(["u1", "u2", "u3"], ["7", "5"]) == 3
+        assert queue.seed(["u1", "u4"]) == 1  # idempotent: every process may seed
+        assert queue.favorite_ids() == ["5", "7"]
+
+        other = JobQueue(path, lease_seconds=10, clock=lambda: now[0])
+        assert queue.claim("a", 2) == ["u1", "u2"]
+        assert other.claim("b", 5) == ["u3", "u4"]  # a's leases are still live
+        now[0] = 8
+        assert queue.heartbeat("a") == 2  # a is alive; b has died silently
+        now[0] = 15
+        assert queue.claim("a", 5) == ["u3", "u4"]  # b's expired leases come back
+        other.complete("b", [("u3", True)])  # too late: no longer b's to finish
+        queue.complete("a", [("u1", True), ("u2", False), ("u3", True)])
+        queue.release("a")
+        assert queue.counts() == {"done": 2, "failed": 1, "pending": 1}
+        other.close()
+        queue.close()
+
+
+def test_job_queue_hands_throttled_urls_out_again_after_backoff() -> None:
+    now = [time.time()]
+    throttled, gone = "http://x/video/1", "http://x/video/2"
+    with tempfile.TemporaryDirectory() as tmp:
+        queue = JobQueue(Path(tmp) / "jobs.db", clock=lambda: now[0])
+        queue.seed([throttled, gone])
+        assert queue.claim("a") == [throttled, gone]
+        ledger = FailureLedger(Path(tmp) / "post_data.failures.json")
+        history = StatsHistory(Path(tmp) / "stats_history.jsonl")
+        results = [
+            FetchResult(throttled, status=429, retryable=True),
+            FetchResult(gone, status=404),
+        ]
+        _record_results(results, ledger, history, queue, "a")
+        assert queue.counts() == {"pending": 1, "failed": 1}
+        assert queue.claim("b") == []  # still backing off
+        now[0] += 2 * 3600
+        assert queue.claim("b") == [throttled]
+        history.close()
+        queue.close()
+
+
+def test_scrape_posts_from_job_queue_completes_on_checkpoint() -> None:
+    class _Client:
+        async def get(self, url):
+            if url.endswith("/5"):
+                raise ValueError("boom")  # unexpected: an "error", not a network failure
+            status = 404 if url.endswith("/2") else 200
+            page = _page({"id": url.rsplit("/", 1)[1]})
+            return httpx.Response(status, text=page, request=httpx.Request("GET", url))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        queue = JobQueue(Path(tmp) / "jobs.db")
+        queue.seed(f"http://x/video/{n}" for n in range(1, 6))
+        store = JsonStore(Path(tmp) / "post_data.json")
+        ledger = FailureLedger(Path(tmp) / "post_data.failures.json")
+        history = StatsHistory(Path(tmp) / "stats_history.jsonl")
+        on_checkpoint = functools.partial(
+            _record_results, ledger=ledger, history=history, job_queue=queue, owner="w1"
+        )
+        asyncio.run(
+            scrape_posts(
+                cast(HttpClient, _Client()),
+                queue.iter_claims("w1", 3),
+                None,
+                store,
+                concurrency=2,
+                delay=0,
+                retries=1,
+                on_checkpoint=on_checkpoint,
+            )
+        )
+        assert queue.counts() == {"done": 3, "failed": 1, "pending": 1}  # 5 crashed: retry later
+        assert ledger.counts() == {"gone": 1, "error": 1}
+        assert "3" in history and "2" not in history
+        history.close()
+        queue.close()
+
+
+def test_client_pool_benches_only_the_throttled_client() -> None:
+    # Two egress clients on mock transports: "blocked" answers everything with 429.
+    hits: list[str] = []
+
+    def transport(name: str, status: int) -> httpx.MockTransport:
+        def handler(request: httpx.Request) -> httpx.Response:
+            hits.append(name)
+            return httpx.Response(status, text=_page({"id": "1"}))
+
+        return httpx.MockTransport(handler)
+
+    now = [0.0]
+    slept: list[float] = []
+
+    async def fake_sleep(seconds: float) -> None:
+        slept.append(seconds)
+        now[0] += seconds
+
+    pool = ClientPool(
+        [
+            httpx.AsyncClient(transport=transport("blocked", 429)),
+            httpx.AsyncClient(transport=transport("open", 200)),
+        ],
+        names=["blocked", "open"],
+        bench_threshold=2,
+        bench_seconds=100,
+        clock=lambda: now[0],
+        sleep=fake_sleep,
+    )
+
+    async def scenario() -> None:
+        for _ in range(8):
+            await pool.get("http://x/video/1")
+        assert pool.available == ["open"]
+        async with pool.stream("GET", "http://x/video/1") as response:
+            assert response.status_code == 200
+        now[0] = 101  # bench over: "blocked" is back in the rotation
+        await pool.get("http://x/video/1")
+        await pool.aclose()
+
+    asyncio.run(scenario())
+    assert hits == ["blocked", "open", "blocked"] + ["open"] * 6 + ["blocked"]
+    assert slept == []  # one client kept working, so nobody ever waited
+
+
+def test_failure_ledger_skips_gone_and_backs_off_transient() -> None:
+    hour = 3600
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "post_data.failures.json"
+        ledger = FailureLedger(path)
+        ledger.record("1", 404, when=0)  # deleted: permanent at once
+        ledger.record("2", 429, when=0)  # throttled: transient
+        ledger.record("3", 200, when=0)  # page without the post: one more try
+        ledger.record("4", None, when=0)
+        ledger.resolve("4")  # scraped fine on a later attempt
+        ledger.save()
+
+        ledger = FailureLedger(path)
+        assert ledger.counts() == {"gone": 1, "throttled": 1, "empty": 1}
+        assert ledger.skip("1", now=100 * hour)
+        assert ledger.skip("2", now=0.5 * hour)
+        assert not ledger.skip("2", now=1.5 * hour)  # backoff over
+        ledger.record("2", 429, when=1.5 * hour)
+        assert ledger.skip("2", now=3 * hour)  # second failure doubles the wait
+        assert not ledger.skip("3", now=2 * hour)
+        ledger.record("3", 200, when=2 * hour)
+        assert ledger.is_permanent("3")
+        assert not ledger.skip("4") and not ledger.skip("unknown")
+
+
+def test_stats_history_stores_deltas_and_decodes_series() -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "stats_history.jsonl"
+        history = StatsHistory(path)
+        history.record("7", {"playCount": 1000, "diggCount": 10}, when=1_000_000)
+        history.record("7", {"playCount": 1500, "diggCount": 12}, when=1_086_400)
+        history.record("8", {"playCount": 5}, when=1_000_000)
+        history.close()
+        lines = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+        assert lines[1] == ["7", 86400, [500, 2, 0, 0, 0]]  # only the change since last time
+
+        history = StatsHistory(path)
+        assert history.growth("7") == 500  # plays per day
+        assert history.growth("8") is None
+        assert history.last_seen("7") == 1_086_400
+        history.record("7", {"playCount": 1600, "diggCount": 12}, when=1_172_800)
+        series = history.series("7")
+        assert [stats["playCount"] for _, stats in series] == [1000, 1500, 1600]
+        assert series[-1][0] == 1_172_800
+        history.close()
+
+
+def test_stats_history_drops_torn_tail_before_appending() -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "stats_history.jsonl"
+        history = StatsHistory(path)
+        history.record("7", {"playCount": 100}, when=1_000_000)
+        history.record("7", {"playCount": 200}, when=1_086_400)
+        history.close()
+        with path.open("a", encoding="utf-8") as file:
+            file.write('["7",86400,[50')  # crash mid-append
+
+        history = StatsHistory(path)
+        history.record("7", {"playCount": 300}, when=1_172_800)
+        history.close()
+        history = StatsHistory(path)
+        assert history.latest("7") == {**dict.fromkeys(STAT_FIELDS, 0), "playCount": 300}
+        assert [stats["playCount"] for _, stats in history.series("7")] == [100, 200, 300]
+        history.close()
+
+
+def test_refresh_picks_stale_fast_growers_and_replaces_in_place() -> None:
+    day = 86400
+    now = 100 * day
+    posts: list[dict[str, Any]] = [
+        {"id": "1", "createTime": str(10 * day), "stats": {"playCount": 900}},  # slow
+        {"id": "2", "createTime": str(99 * day), "stats": {"playCount": 900}},  # brand new
+        {"id": "3", "createTime": str(10 * day), "stats": {"playCount": 50}},  # fresh stats
+    ]
+    with tempfile.TemporaryDirectory() as tmp:
+        history = StatsHistory(Path(tmp) / "stats_history.jsonl")
+        history.record("1", posts[0]["stats"], when=now - 10 * day)
+        history.record("3", posts[2]["stats"], when=now - day)
+        stale = stale_posts(posts, history, ttl=7 * day, now=now)
+        assert [post["id"] for post in stale] == ["2", "1"]
+        history.close()
+
+        store = JsonStore(Path(tmp) / "post_data.json")
+        for post in posts:
+            store.add(post)
+        store.add({"id": "1", "stats": {"playCount": 950}})  # a refreshed copy
+        assert [post["id"] for post in store.iter_posts()] == ["1", "2", "3"]
+        assert store.posts[0]["stats"]["playCount"] == 950
+
+
+def test_scrape_posts_against_mock_tiktok_retries_throttles() -> None:
+    mock = MockTikTok(page_kb=64, throttle_rate=0.3, gone_rate=0.1, seed=7)
+    urls = [f"https://www.tiktok.com/@a/video/{n}" for n in range(100, 140)]
+    metrics = ScrapeMetrics()
+
+    async def scenario() -> int:
+        async with httpx.AsyncClient(transport=mock.transport()) as client:
+            return await scrape_posts(
+                client,
+                urls,
+                None,
+                store,
+                delay=0,
+                retries=6,
+                backoff=lambda _: 0,
+                stream=True,
+                metrics=metrics,
+            )
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = JsonlStore(Path(tmp) / "post_data.jsonl")
+        scraped = asyncio.run(scenario())
+        posts = _read_jsonl(store.path)
+    assert mock.responses["429"] > 0
+    assert scraped == mock.responses["200"] == len(urls) - mock.responses["404"]
+    assert {post["id"] for post in posts} <= {url.rsplit("/", 1)[1] for url in urls}
+    assert metrics.retries == mock.responses["429"]
+    assert metrics.bytes_received < mock.responses["200"] * 64 * 1024  # stopped at the script
+
+    clock = [0.0]
+    bucket = TokenBucket(rate=2, burst=2, clock=lambda: clock[0])
+    assert [bucket.allow() for _ in range(3)] == [True, True, False]
+    clock[0] = 0.5
+    assert bucket.allow()
+
+
 if __name__ == "__main__":
     for _name, _case in sorted(globals().items()):
         if _name.startswith("test_"):
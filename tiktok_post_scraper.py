@@ -2,12 +2,17 @@
 
 The export lists the videos you liked and favorited, but only as URLs. This
 fetches each post page, pulls the embedded post JSON (author, stats, hashtags,
-location, ...), and writes it to ``scraper_data/scraper_output/post_data.json``.
+location, ...), and writes it to ``scraper_data/scraper_output/post_data.json``
+(or, with ``--storage jsonl``, appends it to ``post_data.jsonl``, and with
+``--storage sqlite`` upserts it into ``post_data.db``; ``--compact`` turns either
+into ``post_data.json``).
 
 Runs are resumable: on a second run it reads what's already saved and skips any
 video ID it already has, so a crash or a rate-limit stop only costs the posts
-still outstanding. Requests that come back 403/429 (TikTok throttling) or hit a
-transient network error are retried with exponential backoff.
+still outstanding. A fixed pool of workers keeps ``--concurrency`` requests in
+flight, so one slow or throttled URL never holds up the others. Requests that
+come back 403/429 (TikTok throttling) or hit a transient network error are
+retried with exponential backoff.
 
 Examples::
 
@@ -15,6 +20,12 @@ Examples::
     python tiktok_post_scraper.py --limit 200            # just the 200 most recent
     python tiktok_post_scraper.py --url "https://..."    # one live URL, print result
     python tiktok_post_scraper.py --parse-html page.html # parse a saved page offline
+    python tiktok_post_scraper.py --storage jsonl        # append-only checkpoint log
+    python tiktok_post_scraper.py --compact              # post_data.jsonl -> .json
+    python tiktok_post_scraper.py --storage sqlite       # indexed SQLite store
+    python tiktok_post_scraper.py --cache-dir scraper_data/html_cache  # keep raw pages
+    python tiktok_post_scraper.py --reparse-cache        # rebuild output from the cache
+    python tiktok_post_scraper.py --queue jobs.db        # share one export across processes
 """
 
 from __future__ import annotations
@@ -22,34 +33,73 @@ from __future__ import annotations
 import argparse
 import asyncio
 import bisect
+import contextlib
 import datetime
+import functools
+import heapq
+import itertools
 import json
+import os
+import random
 import re
+import socket
 import sys
 import time
+from collections import Counter
+from collections.abc import Callable, Iterable, Iterator, Sequence, Sized
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import dataclass, field
 from pathlib import Path
+from typing import AnyStr, BinaryIO
 
+import ijson
 import jmespath
-from httpx import AsyncClient, Response, TransportError
+from httpx import AsyncClient, AsyncHTTPTransport, Response, TransportError
 from loguru import logger as log
 from parsel import Selector
 from tenacity import (
     AsyncRetrying,
-    retry_if_exception_type,
+    retry_if_result,
     stop_after_attempt,
     wait_exponential_jitter,
 )
 from tqdm import tqdm
 
+from scraping.client_pool import DEFAULT_STRATEGY, STRATEGIES, ClientPool
+from scraping.failure_ledger import FailureLedger
+from scraping.html_cache import HtmlCache, read_page
+from scraping.id_index import IdIndex
+from scraping.job_queue import JobQueue
+from scraping.metrics import ScrapeMetrics, serve_prometheus, write_periodically
+from scraping.projection import Projection, coerce_post, compile_projection
+from scraping.rate_control import DEFAULT_INITIAL_RATE, DEFAULT_MAX_RATE, RateController
+from scraping.sqlite_store import SqliteStore
+from scraping.stats_history import StatsHistory, drop_torn_tail
+from scraping.sync_state import SyncState
+
 DEFAULT_INPUT = "user_data_tiktok.json"
 DEFAULT_OUTPUT_DIR = Path("scraper_data/scraper_output")
+DEFAULT_CACHE_DIR = Path("scraper_data/html_cache")
 DEFAULT_LIMIT = 7999
-DEFAULT_BATCH_SIZE = 5
-DEFAULT_BATCH_DELAY = 0.1
+DEFAULT_CONCURRENCY = 5
+DEFAULT_DELAY = 0.1
 DEFAULT_RETRIES = 3
-# Checkpoint the growing output every N batches so a crash costs at most this
-# many batches, without rewriting the whole file on every single batch.
-CHECKPOINT_EVERY = 10
+# Checkpoint the growing output every N finished URLs so a crash costs at most
+# this many posts, without rewriting the whole file after every single one.
+CHECKPOINT_EVERY = 50
+# With --storage jsonl, fsync the log every N appended posts (the most a crash
+# can lose); checkpoints sync whatever is pending as well.
+FSYNC_EVERY = 10
+OUTPUT_JSON = "post_data.json"
+OUTPUT_LOG = "post_data.jsonl"
+OUTPUT_DB = "post_data.db"
+# Posts that failed, and how (see scraping/failure_ledger.py); resume consults it.
+OUTPUT_FAILURES = "post_data.failures.json"
+# --incremental's like-date watermark and merged favorites (scraping/sync_state.py).
+OUTPUT_SYNC_STATE = "sync_state.json"
+# Delta-encoded stats snapshots of every scrape (scraping/stats_history.py).
+OUTPUT_STATS_HISTORY = "stats_history.jsonl"
+DEFAULT_REFRESH_TTL_HOURS = 168.0
 
 _USER_AGENT = (
     "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
@@ -62,6 +112,36 @@ _HEADERS = {
     "Accept": _ACCEPT,
     "Accept-Encoding": "gzip, deflate, br",
 }
+# Alternative browser identities for the extra clients in a --proxy/--source-address
+# pool; client N gets profile N % len, so the first client is always _HEADERS.
+_HEADER_PROFILES = (
+    _HEADERS,
+    {
+        **_HEADERS,
+        "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 "
+        "(KHTML, like Gecko) Version/15.1 Safari/605.1.15",
+    },
+    {
+        **_HEADERS,
+        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:95.0) "
+        "Gecko/20100101 Firefox/95.0",
+        "Accept-Language": "en-US,en;q=0.5",
+    },
+)
+
+_VIDEO_ID = re.compile(r"/video/(\d+)")
+_SHARE_LINK_V = re.compile(r"v(?!i)")
+_NON_DIGIT = re.compile(r"\D")
+# ijson prefixes of the two export arrays the scraper reads; the rest of the
+# export (watch history, comments, DMs, ...) is skipped without being decoded.
+_LIKES_PREFIX = "Activity.Like List.ItemFavoriteList.item"
+_FAVORITES_PREFIX = "Activity.Favorite Videos.FavoriteVideoList"
+
+_REHYDRATION_ID = "__UNIVERSAL_DATA_FOR_REHYDRATION__"
+# How parse_post finds the rehydration script: a raw string scan ("fast", with
+# an XPath fallback) or a full lxml parse of the page ("xpath").
+EXTRACTORS = ("fast", "xpath")
+DEFAULT_EXTRACTOR = "fast"
 
 _POST_QUERY = """{
     id: id,
@@ -77,13 +157,61 @@ _POST_QUERY = """{
     }"""
 
 
-class RateLimitedError(Exception):
-    """Raised on a 403/429 so the retry layer backs off and tries again."""
+def _compile_query(query: str) -> Projection:
+    """``query`` as a plain function, or, if it uses JMESPath the compiler doesn't
+    support, jmespath's own (slower) compiled search."""
+    try:
+        return compile_projection(query)
+    except ValueError:
+        log.debug(f"Falling back to jmespath for {query!r}")
+        return jmespath.compile(query).search
+
+
+# Built once at import: a plain-function version of jmespath.search(_POST_QUERY, ...).
+_project_post = _compile_query(_POST_QUERY)
 
 
-def build_client() -> AsyncClient:
-    """Create the shared HTTP/2 client with browser-like headers."""
-    return AsyncClient(http2=True, headers=_HEADERS)
+# Favorite video IDs: an IdIndex, or a plain sorted list for binary_search.
+Favorites = IdIndex | list[str]
+# What fetches go through: one client, or several behind a ClientPool.
+HttpClient = AsyncClient | ClientPool
+
+
+def build_client(
+    *, proxy: str | None = None, local_address: str | None = None, headers: dict | None = None
+) -> AsyncClient:
+    """Create an HTTP/2 client with browser-like headers, optionally going out
+    through ``proxy`` or from the local IP ``local_address``."""
+    if proxy is None and local_address is None:
+        return AsyncClient(http2=True, headers=headers or _HEADERS)
+    transport = AsyncHTTPTransport(http2=True, proxy=proxy, local_address=local_address)
+    return AsyncClient(headers=headers or _HEADERS, transport=transport)
+
+
+def build_client_pool(
+    proxies: Sequence[str],
+    source_addresses: Sequence[str],
+    *,
+    strategy: str = DEFAULT_STRATEGY,
+) -> HttpClient:
+    """One client per proxy and per source address, pooled; a plain client if none.
+
+    Each pooled client gets its own connection pool and header profile.
+    """
+    egress = [(proxy, None) for proxy in proxies] + [(None, ip) for ip in source_addresses]
+    if not egress:
+        return build_client()
+    clients = [
+        build_client(
+            proxy=proxy,
+            local_address=ip,
+            headers=_HEADER_PROFILES[position % len(_HEADER_PROFILES)],
+        )
+        for position, (proxy, ip) in enumerate(egress)
+    ]
+    names = [proxy or ip or "direct" for proxy, ip in egress]
+    log.info(f"Scraping through {len(clients)} clients ({strategy}): {', '.join(names)}")
+    return ClientPool(clients, names=names, strategy=strategy)
 
 
 def binary_search(sorted_list: list[str], item: str) -> bool:
@@ -94,17 +222,71 @@ def binary_search(sorted_list: list[str], item: str) -> bool:
 
 def video_id_from_url(url: str) -> str:
     """Pull the numeric video ID out of a post URL, or "" if there isn't one."""
-    match = re.search(r"/video/(\d+)", url)
+    match = _VIDEO_ID.search(url)
     return match.group(1) if match else ""
 
 
-def parse_post(html: str, favorite_video_ids: list[str] | None) -> dict:
-    """Extract the post JSON from a post page's HTML.
+def _scan_script_body(
+    html: AnyStr, marker: AnyStr, open_tag: AnyStr, close_tag: AnyStr, gt: AnyStr
+) -> AnyStr | None:
+    position = html.find(marker)
+    while position != -1:
+        tag_start = html.rfind(open_tag, 0, position)
+        # The id must sit inside the open tag: no ">" between "<script" and it.
+        if tag_start != -1 and html.find(gt, tag_start, position) == -1:
+            body_start = html.find(gt, position) + 1
+            body_end = html.find(close_tag, body_start) if body_start else -1
+            return html[body_start:body_end] if body_end != -1 else None
+        position = html.find(marker, position + len(marker))
+    return None
+
+
+def extract_rehydration_fast(html: str | bytes) -> str | bytes | None:
+    """Cut the rehydration script's contents out of the raw page by string search.
+
+    Finds the script's ``id`` inside a ``<script ...>`` open tag and slices up to
+    the next ``</script>``, without building a DOM for the rest of the ~1 MB page.
+    Works on ``str`` or undecoded ``bytes`` (``json.loads`` takes either), and
+    returns ``None`` if the markup doesn't look as expected.
+    """
+    if isinstance(html, bytes):
+        return _scan_script_body(html, _REHYDRATION_ID.encode(), b"<script", b"</script>", b">")
+    return _scan_script_body(html, _REHYDRATION_ID, "<script", "</script>", ">")
+
+
+def extract_rehydration_xpath(html: str | bytes) -> str | None:
+    """Find the rehydration script with a full lxml parse (slow, but forgiving)."""
+    selector = Selector(body=html) if isinstance(html, bytes) else Selector(html)
+    return selector.xpath(f"//script[@id='{_REHYDRATION_ID}']/text()").get()
+
+
+def extract_rehydration(
+    html: str | bytes, extractor: str = DEFAULT_EXTRACTOR
+) -> str | bytes | None:
+    """The rehydration script's contents, via ``extractor`` ("fast" or "xpath").
+
+    The fast scan falls back to XPath when it can't find the script, so odd markup
+    costs speed, not correctness.
+    """
+    if extractor == "fast":
+        data = extract_rehydration_fast(html)
+        if data is not None:
+            return data
+        log.debug("Fast script scan missed; falling back to XPath")
+    return extract_rehydration_xpath(html)
+
+
+def parse_post(
+    html: str | bytes,
+    favorite_video_ids: Favorites | None,
+    extractor: str = DEFAULT_EXTRACTOR,
+) -> dict:
+    """Extract the post JSON from a post page's HTML (text or raw bytes).
 
     Returns an empty dict if the rehydration script or the expected keys are
     missing, which happens when TikTok changes its markup.
     """
-    data = Selector(html).xpath("//script[@id='__UNIVERSAL_DATA_FOR_REHYDRATION__']/text()").get()
+    data = extract_rehydration(html, extractor)
     if data is None:
         log.error("Failed to find the required script tag in the HTML.")
         return {}
@@ -116,82 +298,313 @@ def parse_post(html: str, favorite_video_ids: list[str] | None) -> dict:
         log.error(f"Failed to parse JSON data: {exc}")
         return {}
 
-    parsed: dict = jmespath.search(_POST_QUERY, post_data)
+    parsed: dict = coerce_post(_project_post(post_data) or {})
     if parsed and favorite_video_ids is not None and parsed.get("id"):
-        parsed["isFavorite"] = binary_search(favorite_video_ids, parsed["id"])
+        if isinstance(favorite_video_ids, IdIndex):
+            parsed["isFavorite"] = parsed["id"] in favorite_video_ids
+        else:
+            parsed["isFavorite"] = binary_search(favorite_video_ids, parsed["id"])
     return parsed
 
 
+# Per-process state for --parse-workers, set once by _init_parse_worker so the
+# favorites list isn't pickled along with every page.
+_worker_favorites: Favorites | None = None
+_worker_extractor = DEFAULT_EXTRACTOR
+
+
+def _init_parse_worker(favorite_video_ids: Favorites | None, extractor: str) -> None:
+    global _worker_favorites, _worker_extractor
+    _worker_favorites = favorite_video_ids
+    _worker_extractor = extractor
+
+
+def _parse_in_worker(html: bytes) -> dict:
+    return parse_post(html, _worker_favorites, _worker_extractor)
+
+
+def _parse_cached_in_worker(path: Path) -> dict:
+    try:
+        return _parse_in_worker(read_page(path))
+    except (OSError, EOFError) as exc:
+        log.error(f"Unreadable cached page {path}: {exc}")
+        return {}
+
+
+def build_parse_pool(
+    workers: int, favorite_video_ids: Favorites | None, extractor: str = DEFAULT_EXTRACTOR
+) -> ProcessPoolExecutor:
+    """Process pool that parses pages off the event loop (``--parse-workers``).
+
+    Each process gets the favorites and extractor once, at startup.
+    """
+    return ProcessPoolExecutor(
+        workers, initializer=_init_parse_worker, initargs=(favorite_video_ids, extractor)
+    )
+
+
+def _open_export(file_path: str) -> BinaryIO:
+    return Path(file_path).open("rb")
+
+
+def normalize_like_url(link: str) -> str:
+    """Turn an export's share link into a post URL (drops the stray "v"s, share -> @)."""
+    return _SHARE_LINK_V.sub("", link).replace("share", "@")
+
+
+def newest_like_date(file_path: str) -> datetime.datetime | None:
+    """Date of the most recent like (the Like List is newest first), or None."""
+    with _open_export(file_path) as file:
+        first = next(ijson.items(file, _LIKES_PREFIX), None)
+    return datetime.datetime.fromisoformat(first["Date"]) if first else None
+
+
+def iter_liked_urls(
+    file_path: str, limit: int, newer_than: datetime.datetime | None = None
+) -> Iterator[str]:
+    """Lazily yield up to ``limit`` liked post URLs, newest first.
+
+    Streams the export: only the Like List entries are ever decoded, and reading
+    stops once ``limit`` URLs have been taken -- or, with ``newer_than``, at the
+    first like that isn't newer than it.
+    """
+    with _open_export(file_path) as file:
+        items = ijson.items(file, _LIKES_PREFIX)
+        if newer_than is not None:
+            items = itertools.takewhile(
+                lambda item: datetime.datetime.fromisoformat(item["Date"]) > newer_than, items
+            )
+        for item in itertools.islice(items, limit):
+            yield normalize_like_url(item["Link"])
+
+
+def iter_favorite_urls(file_path: str) -> Iterator[str]:
+    """Lazily yield every favorited post URL in the export, newest first."""
+    with _open_export(file_path) as file:
+        for item in ijson.items(file, _FAVORITES_PREFIX + ".item"):
+            yield normalize_like_url(item["Link"])
+
+
+def load_favorite_ids(file_path: str, newest_like: datetime.datetime | None) -> list[str] | None:
+    """Sorted video IDs of favorites saved on or before ``newest_like``.
+
+    Favorites after the most recent like are dropped so the two lists line up in
+    time; with no likes at all, nothing qualifies. IDs come back sorted for
+    ``binary_search``. Returns ``None`` when the export has no favorites list.
+    """
+    with _open_export(file_path) as file:
+        favorites = next(ijson.items(file, _FAVORITES_PREFIX), None)
+    if favorites is None:
+        return None
+    if newest_like is None:
+        return []
+    return sorted(
+        _NON_DIGIT.sub("", item["Link"])
+        for item in favorites
+        if datetime.datetime.fromisoformat(item["Date"]) <= newest_like
+    )
+
+
 def load_urls_and_favorites_from_json(
     file_path: str, limit: int
 ) -> tuple[list[str], list[str] | None]:
     """Read the export and return (liked post URLs, sorted favorite video IDs).
 
-    Favorites are limited to those saved on or before the most recent like, so
-    the two lists line up in time. Favorite IDs come back sorted for
-    ``binary_search``. Returns ``None`` for favorites when the export has none.
+    The eager form of ``iter_liked_urls`` + ``load_favorite_ids``; see those.
     """
-    with Path(file_path).open(encoding="utf-8") as file:
-        data = json.load(file)
+    urls = list(iter_liked_urls(file_path, limit))
+    return urls, load_favorite_ids(file_path, newest_like_date(file_path))
 
-    liked_posts = data.get("Activity", {}).get("Like List", {}).get("ItemFavoriteList", [])[:limit]
-
-    date_format = "%Y-%m-%d %H:%M:%S"
-    last_liked_date = (
-        datetime.datetime.strptime(liked_posts[0]["Date"], date_format) if liked_posts else None
-    )
 
-    urls = [item["Link"] for item in liked_posts]
-    urls = [re.sub(r"v(?!i)", "", url).replace("share", "@") for url in urls]
-
-    favorite_video_data = (
-        data.get("Activity", {}).get("Favorite Videos", {}).get("FavoriteVideoList")
-    )
-    if favorite_video_data is None:
-        favorite_video_ids = None
-    else:
-        favorite_video_ids = [
-            re.sub(r"\D", "", item["Link"])
-            for item in favorite_video_data
-            if last_liked_date
-            and datetime.datetime.strptime(item["Date"], date_format) <= last_liked_date
-        ]
-        favorite_video_ids.sort()
+def _find_rehydration_body(page: bytearray, start: int) -> tuple[int | None, int]:
+    """Where the rehydration script's body starts in a partly read ``page``.
 
-    return urls, favorite_video_ids
+    Looks for the script's id from ``start`` on, the way ``_scan_script_body``
+    does. Returns (body start or None, where the next call should search from).
+    """
+    marker = _REHYDRATION_ID.encode()
+    position = page.find(marker, start)
+    while position != -1:
+        tag_start = page.rfind(b"<script", 0, position)
+        if tag_start != -1 and page.find(b">", tag_start, position) == -1:
+            gt = page.find(b">", position)
+            if gt == -1:  # the open tag hasn't fully arrived
+                return None, position
+            return gt + 1, gt + 1
+        position = page.find(marker, position + len(marker))
+    return None, max(start, len(page) - len(marker) + 1)
+
+
+async def _read_until_rehydration(response: Response) -> bytes:
+    """Read a streamed page only up to the end of the rehydration script.
+
+    Stops pulling (and decompressing) chunks as soon as the script has closed;
+    the caller's ``async with client.stream(...)`` then closes the stream. If the
+    script never shows up, the whole body is returned for the parser to report.
+    Each chunk is searched once: scanning resumes where the last one stopped.
+    """
+    buffer = bytearray()
+    body_start = None
+    scan_from = 0
+    async for chunk in response.aiter_bytes():
+        buffer += chunk
+        if body_start is None:
+            body_start, scan_from = _find_rehydration_body(buffer, scan_from)
+        if body_start is not None:
+            if buffer.find(b"</script>", scan_from) != -1:
+                return bytes(buffer)
+            scan_from = max(body_start, len(buffer) - len(b"</script>") + 1)
+    return bytes(buffer)
+
+
+async def _get_page(client: HttpClient, url: str, stream: bool) -> tuple[int, bytes]:
+    """GET ``url`` and return (status code, body); streamed bodies stop early."""
+    if not stream:
+        response: Response = await client.get(url)
+        return response.status_code, response.content
+    async with client.stream("GET", url) as response:
+        if response.status_code != 200:
+            return response.status_code, b""
+        return response.status_code, await _read_until_rehydration(response)
+
+
+def retry_backoff(attempt: int) -> float:
+    """Seconds to wait before retrying after failed attempt number ``attempt``:
+    exponential from 1s, capped at 30s, plus up to 1s of jitter."""
+    return min(2.0 ** (attempt - 1), 30.0) + random.uniform(0, 1)  # noqa: S311
+
+
+@dataclass
+class FetchResult:
+    """How fetching one URL went: the post, or why there isn't one."""
+
+    url: str
+    post: dict = field(default_factory=dict)
+    # Last HTTP status; None when no response arrived (network error, crash).
+    status: int | None = None
+    # Throttled (403/429) or a network error: worth another attempt later.
+    retryable: bool = False
+    attempts: int = 1
+    error: str = ""
+
+    @property
+    def crashed(self) -> bool:
+        """Failed on something unexpected: an error, but no response and not retryable."""
+        return bool(self.error) and self.status is None and not self.retryable
+
+
+async def fetch_attempt(
+    client: HttpClient,
+    url: str,
+    favorite_video_ids: Favorites | None,
+    *,
+    rate: RateController | None = None,
+    extractor: str = DEFAULT_EXTRACTOR,
+    stream: bool = False,
+    parse_pool: Executor | None = None,
+    cache: HtmlCache | None = None,
+    metrics: ScrapeMetrics | None = None,
+) -> FetchResult:
+    """Fetch and parse one post URL, once. Retrying is up to the caller.
+
+    With a ``rate`` controller, the attempt waits for a slot first and reports
+    back whether it was throttled, so the shared rate tracks what TikTok allows.
+    With ``stream`` the body is read only as far as the post JSON. With a
+    ``parse_pool`` (see ``build_parse_pool``) the page is parsed in another process
+    while the event loop keeps fetching; the pool's own favorites and extractor
+    then apply. With a ``cache``, every fetched page is saved there first so it can
+    be re-parsed offline later (``--reparse-cache``); a streamed page is saved as
+    far as it was read, which still holds the post JSON. With ``metrics``, the fetch
+    (status, latency, size) and the parse (time, whether a post came out) are
+    recorded there.
+
+    Never raises: a network error or anything unexpected comes back as a result.
+    """
+    started = 0.0
+    sent_at = None
+    try:
+        if rate is not None:
+            sent_at = await rate.acquire()
+        started = time.perf_counter()
+        status, body = await _get_page(client, url, stream)
+        if metrics is not None:
+            metrics.observe_fetch(status, time.perf_counter() - started, len(body))
+        if status == 200:
+            if rate is not None:
+                rate.on_success()
+            video_id = video_id_from_url(url)
+            if cache is not None and video_id:
+                await asyncio.to_thread(cache.put, video_id, body)
+            parse_started = time.perf_counter()
+            # Raw bytes: the fast extractor slices them without decoding the
+            # whole page first.
+            if parse_pool is not None:
+                loop = asyncio.get_running_loop()
+                post = await loop.run_in_executor(parse_pool, _parse_in_worker, body)
+            else:
+                post = parse_post(body, favorite_video_ids, extractor)
+            if metrics is not None:
+                metrics.observe_parse(time.perf_counter() - parse_started, bool(post))
+            return FetchResult(url, post, status)
+        if status in (403, 429):
+            log.warning(f"{status} (throttled) for {url}; backing off")
+            if rate is not None:
+                rate.on_throttle(sent_at)
+            return FetchResult(url, status=status, retryable=True)
+        log.warning(f"Received status code {status} for URL: {url}")
+        return FetchResult(url, status=status)
+    except TransportError as exc:
+        if metrics is not None:
+            metrics.observe_fetch("network", time.perf_counter() - started, 0)
+        return FetchResult(url, retryable=True, error=repr(exc))
+    except Exception as exc:
+        # One malformed post must never abort a whole scrape run.
+        log.error(f"Unexpected error scraping {url}: {exc}")
+        if metrics is not None:
+            metrics.status_counts["error"] += 1
+        return FetchResult(url, error=repr(exc))
 
 
 async def fetch_and_parse(
-    client: AsyncClient, url: str, favorite_video_ids: list[str] | None, retries: int
+    client: HttpClient,
+    url: str,
+    favorite_video_ids: Favorites | None,
+    retries: int,
+    *,
+    rate: RateController | None = None,
+    extractor: str = DEFAULT_EXTRACTOR,
+    stream: bool = False,
+    parse_pool: Executor | None = None,
+    cache: HtmlCache | None = None,
 ) -> dict:
     """Fetch one post URL and parse it, retrying throttling (403/429) and transient
-    network errors with backoff.
+    network errors with backoff in place. Options as for ``fetch_attempt``.
 
-    Always returns a dict: a URL that keeps failing -- or raises anything
-    unexpected -- is logged and skipped so it can't abort the surrounding batch.
+    For one-off fetches (``--url``); ``scrape_posts`` retries through its own
+    queue instead so a backing-off URL doesn't hold a worker. Always returns a
+    dict: a URL that keeps failing is logged and comes back as ``{}``.
     """
-    try:
-        async for attempt in AsyncRetrying(
-            stop=stop_after_attempt(retries),
-            wait=wait_exponential_jitter(initial=1, max=30),
-            retry=retry_if_exception_type((TransportError, RateLimitedError)),
-            reraise=True,
-        ):
-            with attempt:
-                response: Response = await client.get(url)
-                if response.status_code == 200:
-                    return parse_post(response.text, favorite_video_ids)
-                if response.status_code in (403, 429):
-                    log.warning(f"{response.status_code} (throttled) for {url}; backing off")
-                    raise RateLimitedError(url)
-                log.warning(f"Received status code {response.status_code} for URL: {url}")
-                return {}
-    except (TransportError, RateLimitedError):
+    retrying = AsyncRetrying(
+        stop=stop_after_attempt(retries),
+        wait=wait_exponential_jitter(initial=1, max=30),
+        retry=retry_if_result(lambda result: result.retryable),
+        retry_error_callback=lambda state: state.outcome.result() if state.outcome else None,
+    )
+    result: FetchResult | None = await retrying(
+        fetch_attempt,
+        client,
+        url,
+        favorite_video_ids,
+        rate=rate,
+        extractor=extractor,
+        stream=stream,
+        parse_pool=parse_pool,
+        cache=cache,
+    )
+    if result is None or result.retryable:
         log.error(f"Failed to scrape URL after {retries} attempts: {url}")
-    except Exception as exc:
-        # One malformed post must never abort a whole scrape run.
-        log.error(f"Unexpected error scraping {url}: {exc}")
-    return {}
+        return {}
+    return result.post
 
 
 def _write_output(output_file: Path, data: list[dict]) -> None:
@@ -204,9 +617,26 @@ def _write_output(output_file: Path, data: list[dict]) -> None:
     tmp.replace(output_file)
 
 
+def _read_jsonl(log_file: Path) -> list[dict]:
+    posts: list[dict] = []
+    with log_file.open(encoding="utf-8") as file:
+        for line in file:
+            try:
+                posts.append(json.loads(line))
+            except json.JSONDecodeError:
+                # Only the final line can be torn (crash mid-append); skip it.
+                log.warning(f"Skipping unreadable line in {log_file}")
+    return posts
+
+
 def load_existing(output_file: Path) -> list[dict]:
-    """Return posts already saved from an earlier run (empty list if none)."""
+    """Return posts already saved from an earlier run (empty list if none).
+
+    Reads either the legacy ``post_data.json`` array or a ``.jsonl`` log.
+    """
     try:
+        if output_file.suffix == ".jsonl":
+            return _read_jsonl(output_file)
         with output_file.open(encoding="utf-8") as file:
             existing = json.load(file)
         return existing if isinstance(existing, list) else []
@@ -214,86 +644,738 @@ def load_existing(output_file: Path) -> list[dict]:
         return []
 
 
+class JsonStore:
+    """Legacy storage: the full post list, rewritten to ``post_data.json`` at every
+    checkpoint. Simple, but each checkpoint costs O(posts saved so far)."""
+
+    def __init__(self, path: Path, *, resume: bool = True) -> None:
+        self.path = path
+        self.posts = load_existing(path) if resume else []
+        self._positions = {post["id"]: n for n, post in enumerate(self.posts) if post.get("id")}
+
+    def saved_ids(self) -> IdIndex:
+        return IdIndex.from_ids(self._positions)
+
+    def add(self, post: dict) -> None:
+        """Append ``post``, or replace the saved post with the same ID in place."""
+        position = self._positions.get(post.get("id") or "")
+        if position is not None:
+            self.posts[position] = post
+            return
+        if post.get("id"):
+            self._positions[post["id"]] = len(self.posts)
+        self.posts.append(post)
+
+    def iter_posts(self) -> Iterator[dict]:
+        return iter(self.posts)
+
+    def checkpoint(self) -> None:
+        _write_output(self.path, self.posts)
+
+    def close(self) -> None:
+        self.checkpoint()
+
+
+class JsonlStore:
+    """Append-only log: one post per line, fsynced every ``fsync_every`` posts.
+
+    A checkpoint only costs the posts added since the last one, nothing is kept in
+    memory, and a crash loses at most the unsynced tail. ``compact_log`` turns the
+    log into the legacy ``post_data.json`` for the downstream scripts.
+
+    Saved video IDs are kept in a sidecar ``IdIndex`` (``post_data.ids``) that
+    records how many bytes of the log it covers. Each checkpoint folds in the new
+    IDs, and on resume only the part of the log past that offset is read, so a
+    100k-post log doesn't have to be parsed to find out what's already done.
+    """
+
+    def __init__(self, path: Path, *, resume: bool = True, fsync_every: int = FSYNC_EVERY) -> None:
+        self.path = path
+        self.index_path = path.with_suffix(".ids")
+        self.fsync_every = fsync_every
+        self._unsynced = 0
+        self._new_ids: list[str] = []
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if resume:
+            drop_torn_tail(path)
+            self._index = self._load_index()
+        else:
+            self._index = IdIndex()
+            self._index.save(self.index_path)
+        self._file = path.open("a" if resume else "w", encoding="utf-8")
+
+    def _load_index(self) -> IdIndex:
+        index = IdIndex.load(self.index_path)
+        size = self.path.stat().st_size if self.path.exists() else 0
+        if index.covered > size:  # the log was replaced; start over
+            index.close()
+            index = IdIndex()
+        if index.covered == size:
+            return index
+
+        tail_ids: list[str] = []
+        with self.path.open("rb") as file:
+            file.seek(index.covered)
+            for line in file:
+                try:
+                    tail_ids.append(json.loads(line).get("id") or "")
+                except json.JSONDecodeError:
+                    log.warning(f"Skipping unreadable line in {self.path}")
+        updated = index.merged(tail_ids, covered=size)
+        index.close()
+        updated.save(self.index_path)
+        log.debug(f"Indexed {len(tail_ids)} log lines past the saved ID index")
+        return updated
+
+    def saved_ids(self) -> IdIndex:
+        # A copy: checkpoints replace (and unmap) the store's own index, while the
+        # caller keeps using this one for the rest of the run.
+        return self._index.copy()
+
+    def add(self, post: dict) -> None:
+        self._file.write(json.dumps(post, ensure_ascii=False) + "\n")
+        if post.get("id"):
+            self._new_ids.append(post["id"])
+        self._unsynced += 1
+        if self._unsynced >= self.fsync_every:
+            self._sync()
+
+    def _sync(self) -> None:
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._unsynced = 0
+
+    def checkpoint(self) -> None:
+        """Sync the log, then fold the IDs added since the last checkpoint into the index."""
+        self._sync()
+        if self._new_ids:
+            covered = os.fstat(self._file.fileno()).st_size
+            old = self._index
+            self._index = old.merged(self._new_ids, covered=covered)
+            old.close()
+            self._index.save(self.index_path)
+            self._new_ids.clear()
+
+    def close(self) -> None:
+        self.checkpoint()
+        self._file.close()
+
+    def iter_posts(self) -> Iterator[dict]:
+        """Every logged post once, in first-logged order with its latest data."""
+        self._sync()
+        return iter(_latest_by_id(load_existing(self.path)))
+
+
+PostStore = JsonStore | JsonlStore | SqliteStore
+
+
+def open_store(storage: str, output_dir: Path, *, resume: bool = True) -> PostStore:
+    """The post store for ``--storage`` under ``output_dir``."""
+    if storage == "sqlite":
+        return SqliteStore(output_dir / OUTPUT_DB, resume=resume)
+    if storage == "jsonl":
+        return JsonlStore(output_dir / OUTPUT_LOG, resume=resume)
+    return JsonStore(output_dir / OUTPUT_JSON, resume=resume)
+
+
+def _latest_by_id(posts: list[dict]) -> list[dict]:
+    # Re-scraped (refreshed) posts are appended again; keep the first position
+    # and the latest data.
+    by_id: dict[str, dict] = {}
+    for index, post in enumerate(posts):
+        by_id[post.get("id") or f"#{index}"] = post
+    return list(by_id.values())
+
+
+def compact_log(log_file: Path, output_file: Path) -> int:
+    """Rewrite a JSONL log as the legacy ``post_data.json`` array.
+
+    A video ID logged more than once keeps its first position and its latest
+    data. Returns the number of posts written.
+    """
+    posts = _latest_by_id(load_existing(log_file))
+    _write_output(output_file, posts)
+    return len(posts)
+
+
 async def scrape_posts(
-    client: AsyncClient,
-    urls: list[str],
-    favorite_video_ids: list[str] | None,
-    output_file: Path,
+    client: HttpClient,
+    urls: Iterable[str],
+    favorite_video_ids: Favorites | None,
+    store: PostStore,
     *,
-    base_data: list[dict] | None = None,
-    batch_size: int = DEFAULT_BATCH_SIZE,
-    batch_delay: float = DEFAULT_BATCH_DELAY,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    delay: float = DEFAULT_DELAY,
     retries: int = DEFAULT_RETRIES,
-) -> list[dict]:
-    """Scrape ``urls`` in concurrent batches, checkpointing to ``output_file``.
-
-    Newly scraped posts are appended to ``base_data`` (posts already on disk) so
-    the output file always holds the full, resumable set. Returns just the posts
+    rate: RateController | None = None,
+    extractor: str = DEFAULT_EXTRACTOR,
+    stream: bool = False,
+    parse_pool: Executor | None = None,
+    cache: HtmlCache | None = None,
+    on_checkpoint: Callable[[list[FetchResult]], None] | None = None,
+    backoff: Callable[[int], float] = retry_backoff,
+    metrics: ScrapeMetrics | None = None,
+) -> int:
+    """Scrape ``urls`` with a pool of ``concurrency`` workers into ``store``.
+
+    ``urls`` is consumed lazily: a producer feeds a small bounded queue, so a
+    streamed export starts scraping before it has been read to the end. Each
+    worker pulls the next URL off the queue as soon as its previous one
+    finishes (pausing ``delay`` seconds in between), so there are always up to
+    ``concurrency`` requests in flight. A throttled or network-failed URL doesn't
+    hold its worker while it backs off: it goes on a retry heap, ordered by when
+    its ``backoff`` ends, and is queued again then (up to ``retries`` attempts in
+    all) while the worker moves straight on. With a ``rate`` controller the
+    pacing is adaptive instead and ``delay`` is ignored.
+
+    The store is checkpointed every ``CHECKPOINT_EVERY`` finished URLs and closed
+    at the end; right after each checkpoint (and the close), ``on_checkpoint``
+    gets the results of the URLs finished since the last one, so a caller never
+    records a URL as done before its post is durable. Every attempt, retry and
+    outcome is counted in ``metrics`` if given. Returns the number of posts
     scraped this run.
     """
     start_time = time.time()
-    combined = list(base_data or [])
-    new_data: list[dict] = []
-    failed = 0
-
-    with tqdm(total=len(urls), desc="scraping", unit="post") as bar:
-        for batch_index, i in enumerate(range(0, len(urls), batch_size)):
-            batch = urls[i : i + batch_size]
-            results = await asyncio.gather(
-                *[fetch_and_parse(client, url, favorite_video_ids, retries) for url in batch]
-            )
-            got = [post for post in results if post]
-            failed += len(batch) - len(got)
-            new_data.extend(got)
-            combined.extend(got)
-            bar.update(len(batch))
-
-            if batch_index % CHECKPOINT_EVERY == 0:
-                _write_output(output_file, combined)
-            if i + batch_size < len(urls):
-                await asyncio.sleep(batch_delay)
-
-    _write_output(output_file, combined)
-    log.success(f"Scraped {len(new_data)} posts ({failed} failed) into {output_file}")
+    loop = asyncio.get_running_loop()
+    scraped = 0
+    retried = 0
+    failed_by: Counter[str] = Counter()
+    since_checkpoint = 0
+    finished: list[FetchResult] = []
+
+    def checkpoint() -> None:
+        nonlocal finished
+        store.checkpoint()
+        if on_checkpoint is not None:
+            on_checkpoint(finished)
+        finished = []
+
+    # (url, attempt number); None is the end-of-input sentinel, one per worker.
+    queue: asyncio.Queue[tuple[str, int] | None] = asyncio.Queue(maxsize=concurrency * 2)
+    # URLs waiting out a backoff, soonest first: (due, tiebreak, url, next attempt).
+    retry_heap: list[tuple[float, int, str, int]] = []
+    retry_order = itertools.count()
+    changed = asyncio.Event()  # a retry was scheduled, a URL finished, or input ran out
+    outstanding = 0  # URLs taken from the input and not finished yet
+    input_done = False
+    if metrics is not None:
+        metrics.concurrency = concurrency
+        if rate is not None:
+            metrics.rate = lambda: rate.rate
+
+    async def producer() -> None:
+        nonlocal outstanding, input_done
+        for url in urls:
+            outstanding += 1
+            await queue.put((url, 1))
+        input_done = True
+        changed.set()
+
+    async def retry_pump() -> None:
+        # Re-queue each retry when its backoff is over. Once the input is used up
+        # and every URL has finished (none can come back), send the workers home.
+        while not (input_done and outstanding == 0):
+            changed.clear()
+            if retry_heap and retry_heap[0][0] <= loop.time():
+                _, _, url, attempt = heapq.heappop(retry_heap)
+                await queue.put((url, attempt))
+                continue
+            timeout = retry_heap[0][0] - loop.time() if retry_heap else None
+            with contextlib.suppress(TimeoutError):
+                await asyncio.wait_for(changed.wait(), timeout)
+        for _ in range(concurrency):
+            await queue.put(None)
+
+    async def worker(bar: tqdm) -> None:
+        nonlocal scraped, retried, since_checkpoint, outstanding
+        while True:
+            item = await queue.get()
+            if item is None:
+                return
+            url, attempt = item
+            if metrics is not None:
+                metrics.in_flight += 1
+            try:
+                result = await fetch_attempt(
+                    client,
+                    url,
+                    favorite_video_ids,
+                    rate=rate,
+                    extractor=extractor,
+                    stream=stream,
+                    parse_pool=parse_pool,
+                    cache=cache,
+                    metrics=metrics,
+                )
+            finally:
+                if metrics is not None:
+                    metrics.in_flight -= 1
+            result.attempts = attempt
+            if result.retryable and attempt < retries:
+                due = loop.time() + backoff(attempt)
+                heapq.heappush(retry_heap, (due, next(retry_order), url, attempt + 1))
+                retried += 1
+                if metrics is not None:
+                    metrics.retries += 1
+            else:
+                if result.post:
+                    store.add(result.post)
+                    scraped += 1
+                    if metrics is not None:
+                        metrics.scraped += 1
+                else:
+                    failed_by[
+                        "error" if result.crashed else str(result.status or "network error")
+                    ] += 1
+                    if metrics is not None:
+                        metrics.failed += 1
+                    if result.retryable:
+                        last = result.status or result.error
+                        log.error(f"Gave up on {url} after {attempt} attempts (last: {last})")
+                finished.append(result)
+                outstanding -= 1
+                bar.update(1)
+
+                since_checkpoint += 1
+                if since_checkpoint >= CHECKPOINT_EVERY:
+                    since_checkpoint = 0
+                    checkpoint()
+            changed.set()
+            if delay and rate is None and not queue.empty():
+                await asyncio.sleep(delay)
+
+    total = len(urls) if isinstance(urls, Sized) else None
+    try:
+        with tqdm(total=total, desc="scraping", unit="post") as bar:
+            # A TaskGroup, so a failing producer (say, a corrupt export) cancels
+            # the workers instead of leaving them waiting on an empty queue.
+            async with asyncio.TaskGroup() as group:
+                group.create_task(producer())
+                group.create_task(retry_pump())
+                for _ in range(concurrency):
+                    group.create_task(worker(bar))
+    finally:
+        store.close()
+        if on_checkpoint is not None:
+            on_checkpoint(finished)
+
+    failed = sum(failed_by.values())
+    log.success(f"Scraped {scraped} posts ({failed} failed, {retried} retries) into {store.path}")
+    if failed:
+        log.info("Failures by last status: " + ", ".join(f"{k}: {v}" for k, v in failed_by.items()))
+    if rate is not None:
+        log.info(f"Adaptive rate settled at {rate.rate:.2f} req/s")
     log.info(f"scrape_posts took {time.time() - start_time:.2f} seconds")
-    return new_data
+    return scraped
+
+
+def _skip_known(
+    urls: Iterator[str],
+    done: IdIndex,
+    ledger: FailureLedger | None,
+    job_queue: JobQueue | None,
+    owner: str,
+) -> Iterator[str]:
+    """Drop URLs whose post is already in the store, or that the failure ledger says
+    aren't worth trying yet (and settle them in the queue, see ``_settle_jobs``)."""
+    now = time.time()
+    for url in urls:
+        video_id = video_id_from_url(url)
+        if video_id in done:
+            saved = True
+        elif ledger is not None and ledger.skip(video_id, now):
+            saved = False
+        else:
+            yield url
+            continue
+        if job_queue is not None:
+            _settle_jobs(job_queue, owner, ledger, [(url, saved)])
+
+
+def _settle_jobs(
+    job_queue: JobQueue,
+    owner: str,
+    ledger: FailureLedger | None,
+    outcomes: Iterable[tuple[str, bool]],
+) -> None:
+    """Mark (url, saved) outcomes in the queue: saved URLs done, and failed ones
+    failed only if the ledger has given up on them (gone, empty twice). The rest
+    go back to pending until the ledger's backoff is over."""
+    finished: list[tuple[str, bool]] = []
+    deferred: list[tuple[str, float]] = []
+    for url, saved in outcomes:
+        video_id = video_id_from_url(url)
+        if saved or ledger is None or not video_id or ledger.is_permanent(video_id):
+            finished.append((url, saved))
+        else:
+            deferred.append((url, ledger.retry_at(video_id)))
+    job_queue.complete(owner, finished)
+    job_queue.defer(owner, deferred)
+
+
+def _advance_watermark(
+    sync: SyncState, args: argparse.Namespace, newest_like: datetime.datetime | None
+) -> None:
+    """After a completed --incremental run, move the watermark to the export's newest like.
+
+    Not if ``--limit`` cut the new likes short: the ones past the limit would
+    fall behind the watermark and never be read. Merged favorites are kept either way.
+    """
+    newer = iter_liked_urls(args.input, args.limit + 1, newer_than=sync.watermark)
+    if next(itertools.islice(newer, args.limit, None), None) is not None:
+        log.warning(
+            f"More than --limit {args.limit} new likes; watermark left at {sync.watermark} "
+            "so the rest are picked up next run"
+        )
+    else:
+        sync.advance(newest_like)
+        log.info(f"Watermark now {sync.watermark}")
+    sync.save()
+
+
+def open_job_queue(args: argparse.Namespace) -> JobQueue:
+    """Open the ``--queue`` file, seeding it from the export if this machine has one."""
+    job_queue = JobQueue(Path(args.queue))
+    if Path(args.input).exists():
+        favorites = load_favorite_ids(args.input, newest_like_date(args.input))
+        added = job_queue.seed(iter_liked_urls(args.input, args.limit), favorites)
+        log.info(f"Seeded {added} new URLs from {args.input} into {args.queue}")
+    log.info(f"Queue {args.queue}: {job_queue.counts()}")
+    return job_queue
+
+
+def _record_results(
+    results: list[FetchResult],
+    ledger: FailureLedger,
+    history: StatsHistory,
+    job_queue: JobQueue | None,
+    owner: str,
+) -> None:
+    """Note checkpointed results in the failure ledger and the stats history and,
+    with --queue, the job queue."""
+    for result in results:
+        video_id = video_id_from_url(result.url)
+        if result.post:
+            ledger.resolve(video_id)
+            history.record(result.post.get("id", ""), result.post.get("stats"))
+        else:
+            ledger.record(video_id, result.status, url=result.url, crashed=result.crashed)
+    if results:
+        ledger.save()
+        history.flush()
+    if job_queue is not None:
+        _settle_jobs(
+            job_queue, owner, ledger, [(result.url, bool(result.post)) for result in results]
+        )
+
+
+async def _heartbeat(job_queue: JobQueue, owner: str) -> None:
+    # Renew well inside the lease so one slow checkpoint never lets it lapse.
+    while True:
+        await asyncio.sleep(job_queue.lease_seconds / 3)
+        job_queue.heartbeat(owner)
+
+
+async def _scrape(
+    args: argparse.Namespace,
+    urls: Iterable[str],
+    favorite_video_ids: Favorites | None,
+    store: PostStore,
+    on_checkpoint: Callable[[list[FetchResult]], None],
+) -> int:
+    """Run ``scrape_posts`` with the client, pacing and parsing the CLI asked for."""
+    rate = (
+        RateController(args.initial_rate, max_rate=max(args.max_rate, args.initial_rate))
+        if args.adaptive
+        else None
+    )
+    parse_pool = (
+        build_parse_pool(args.parse_workers, favorite_video_ids, args.extractor)
+        if args.parse_workers
+        else None
+    )
+    metrics = ScrapeMetrics() if args.stats_file or args.metrics_port else None
+    reporters: list[asyncio.Task] = []
+    server = None
+    if metrics is not None and args.stats_file:
+        reporters.append(asyncio.create_task(write_periodically(metrics, Path(args.stats_file))))
+    if metrics is not None and args.metrics_port:
+        server = await serve_prometheus(metrics, args.metrics_port)
+    client = build_client_pool(args.proxy, args.source_address, strategy=args.pool_strategy)
+    try:
+        return await scrape_posts(
+            client,
+            urls,
+            favorite_video_ids,
+            store,
+            concurrency=args.concurrency,
+            delay=args.delay,
+            retries=args.retries,
+            rate=rate,
+            extractor=args.extractor,
+            stream=args.stream,
+            parse_pool=parse_pool,
+            cache=HtmlCache(Path(args.cache_dir)) if args.cache_dir else None,
+            on_checkpoint=on_checkpoint,
+            metrics=metrics,
+        )
+    finally:
+        await client.aclose()
+        if parse_pool is not None:
+            parse_pool.shutdown()
+        for task in reporters:
+            task.cancel()
+        if server is not None:
+            server.close()
+        if metrics is not None and args.stats_file:
+            metrics.write(Path(args.stats_file))
 
 
 async def run(args: argparse.Namespace) -> None:
-    """Load the export, skip already-scraped posts, and scrape the rest."""
-    start_time = time.time()
-    output_file = Path(args.output_dir) / "post_data.json"
+    """Load the export, skip already-scraped posts, and scrape the rest.
 
-    urls, favorite_video_ids = load_urls_and_favorites_from_json(args.input, args.limit)
-    log.info(f"{len(urls)} liked posts in export (limit {args.limit})")
+    With ``--queue`` the URLs are claimed from the shared job queue instead, as
+    ``--worker-id``, and marked done there as they are checkpointed. With
+    ``--incremental`` only likes newer than the last completed run's watermark
+    are read, plus failed posts due for a retry.
+    """
+    start_time = time.time()
+    output_dir = Path(args.output_dir)
+    store = open_store(args.storage, output_dir, resume=args.resume)
+    ledger = FailureLedger(output_dir / OUTPUT_FAILURES)
+    sync = SyncState(output_dir / OUTPUT_SYNC_STATE) if args.incremental else None
+    newest_like = None
+
+    job_queue = open_job_queue(args) if args.queue else None
+    urls: Iterator[str]
+    if job_queue is not None:
+        favorites = job_queue.favorite_ids()
+        urls = job_queue.iter_claims(args.worker_id)
+    else:
+        newest_like = newest_like_date(args.input)
+        favorites = load_favorite_ids(args.input, newest_like)
+        watermark = sync.watermark if sync is not None else None
+        urls = iter_liked_urls(args.input, args.limit, newer_than=watermark)
+        if sync is not None:
+            favorites = sync.merge_favorites(favorites)
+            # Likes older than the watermark are never re-read, so failed posts
+            # among them come back from the ledger instead.
+            retry = ledger.due(everything=args.recheck_failures)
+            urls = itertools.chain(urls, retry)
+            log.info(f"Incremental: likes after {watermark or 'the beginning'} from {args.input}")
+        else:
+            log.info(f"Streaming up to {args.limit} liked posts from {args.input}")
+    favorite_video_ids = IdIndex.from_ids(favorites) if favorites is not None else None
 
-    base_data: list[dict] = []
     if args.resume:
-        base_data = load_existing(output_file)
-        done = {post.get("id") for post in base_data}
-        before = len(urls)
-        urls = [url for url in urls if video_id_from_url(url) not in done]
-        log.info(f"Resuming: {len(base_data)} already saved, {before - len(urls)} skipped")
+        done = store.saved_ids()
+        skip_failed = None if args.recheck_failures else ledger
+        urls = _skip_known(urls, done, skip_failed, job_queue, args.worker_id)
+        log.info(f"Resuming: {len(done)} already saved; skipping those")
+        if skip_failed is not None and len(ledger):
+            counts = ", ".join(f"{n} {name}" for name, n in ledger.counts().most_common())
+            log.info(
+                f"Failure ledger: {counts}; skipping permanent ones and those still "
+                "backing off (--recheck-failures to try them all)"
+            )
 
-    if not urls:
+    first = next(urls, None)
+    if first is None:
+        store.close()
+        if job_queue is not None:
+            job_queue.close()
+        if sync is not None:
+            _advance_watermark(sync, args, newest_like)
         log.success("Nothing new to scrape.")
         return
+    urls = itertools.chain([first], urls)
 
-    client = build_client()
+    history = StatsHistory(output_dir / OUTPUT_STATS_HISTORY)
+    on_checkpoint = functools.partial(
+        _record_results, ledger=ledger, history=history, job_queue=job_queue, owner=args.worker_id
+    )
+    heartbeat = None
+    if job_queue is not None:
+        heartbeat = asyncio.create_task(_heartbeat(job_queue, args.worker_id))
     try:
-        await scrape_posts(
-            client,
-            urls,
-            favorite_video_ids,
-            output_file,
-            base_data=base_data,
-            batch_size=args.batch_size,
-            batch_delay=args.batch_delay,
-            retries=args.retries,
-        )
+        await _scrape(args, urls, favorite_video_ids, store, on_checkpoint)
     finally:
-        await client.aclose()
+        history.close()
+        if job_queue is not None:
+            if heartbeat is not None:
+                heartbeat.cancel()
+            # Whatever was claimed but never finished goes straight back to the
+            # other workers rather than waiting out its lease.
+            job_queue.release(args.worker_id)
+            log.info(f"Queue {args.queue}: {job_queue.counts()}")
+            job_queue.close()
+
+    if sync is not None:
+        _advance_watermark(sync, args, newest_like)
+    log.info(f"The entire program took {time.time() - start_time:.2f} seconds")
+
 
+def post_url(post: dict) -> str:
+    """The canonical page URL of a saved post."""
+    unique_id = (post.get("author") or {}).get("uniqueId", "")
+    return f"https://www.tiktok.com/@{unique_id}/video/{post['id']}"
+
+
+def refresh_priority(post: dict, history: StatsHistory, now: float) -> float:
+    """How much a post's stats are likely to have moved: plays per day over its last
+    two snapshots, or, with fewer, over its whole life so far (recent posts win)."""
+    growth = history.growth(post["id"])
+    if growth is not None:
+        return growth
+    plays = (post.get("stats") or {}).get("playCount")
+    created = str(post.get("createTime", ""))
+    if not isinstance(plays, int) or not created.isdigit():
+        return 0.0
+    return plays / max((now - int(created)) / 86400, 1.0)
+
+
+def stale_posts(posts: Iterable[dict], history: StatsHistory, ttl: float, now: float) -> list[dict]:
+    """Saved posts whose stats are more than ``ttl`` seconds old (or were never
+    recorded), highest ``refresh_priority`` first."""
+    stale = [
+        post
+        for post in posts
+        if post.get("id") and now - (history.last_seen(post["id"]) or 0) > ttl
+    ]
+    stale.sort(key=lambda post: refresh_priority(post, history, now), reverse=True)
+    return stale
+
+
+async def refresh(args: argparse.Namespace) -> None:
+    """Re-scrape saved posts whose stats are older than ``--refresh-ttl`` hours,
+    fastest-growing first, replacing them in the store and adding a stats snapshot."""
+    start_time = time.time()
+    output_dir = Path(args.output_dir)
+    store = open_store(args.storage, output_dir)
+    ledger = FailureLedger(output_dir / OUTPUT_FAILURES)
+    history = StatsHistory(output_dir / OUTPUT_STATS_HISTORY)
+    posts = list(store.iter_posts())
+    stale = stale_posts(posts, history, args.refresh_ttl * 3600, start_time)
+    if not args.recheck_failures:
+        stale = [post for post in stale if not ledger.skip(post["id"], start_time)]
+    stale = stale[: args.limit]
+    log.info(f"{len(stale)} of {len(posts)} saved posts are older than {args.refresh_ttl}h")
+    if not stale:
+        store.close()
+        history.close()
+        log.success("Nothing to refresh.")
+        return
+
+    # Keep the favorite flags the posts were saved with.
+    flagged = any("isFavorite" in post for post in posts)
+    favorite_video_ids = (
+        IdIndex.from_ids(post["id"] for post in posts if post.get("isFavorite"))
+        if flagged
+        else None
+    )
+    del posts
+    on_checkpoint = functools.partial(
+        _record_results, ledger=ledger, history=history, job_queue=None, owner=args.worker_id
+    )
+    try:
+        await _scrape(args, map(post_url, stale), favorite_video_ids, store, on_checkpoint)
+    finally:
+        history.close()
+    log.info(f"refresh took {time.time() - start_time:.2f} seconds")
+
+
+def _account_names(paths: Sequence[str]) -> list[str]:
+    # One output directory per export, named after its file; repeats get a suffix.
+    names: list[str] = []
+    for path in paths:
+        name = stem = Path(path).stem
+        suffix = 2
+        while name in names:
+            name, suffix = f"{stem}-{suffix}", suffix + 1
+        names.append(name)
+    return names
+
+
+def plan_accounts(
+    paths: Sequence[str], limit: int
+) -> tuple[dict[str, str], dict[str, list[str]], dict[str, IdIndex]]:
+    """Read several exports into one deduplicated fetch set.
+
+    Returns (video ID -> URL to fetch, account -> its video IDs in Like List order
+    followed by favorites that aren't liked, account -> its favorite IDs). Each
+    account contributes up to ``limit`` likes and all of its favorites.
+    """
+    to_fetch: dict[str, str] = {}
+    account_posts: dict[str, list[str]] = {}
+    account_favorites: dict[str, IdIndex] = {}
+    for name, path in zip(_account_names(paths), paths, strict=True):
+        favorite_urls = list(iter_favorite_urls(path))
+        video_ids: dict[str, None] = {}
+        for url in itertools.chain(iter_liked_urls(path, limit), favorite_urls):
+            video_id = video_id_from_url(url)
+            if video_id:
+                to_fetch.setdefault(video_id, url)
+                video_ids[video_id] = None
+        account_posts[name] = list(video_ids)
+        account_favorites[name] = IdIndex.from_ids(map(video_id_from_url, favorite_urls))
+        log.info(f"{name}: {len(video_ids)} posts, {len(account_favorites[name])} favorites")
+    return to_fetch, account_posts, account_favorites
+
+
+def write_account_outputs(
+    posts: Iterable[dict],
+    account_posts: dict[str, list[str]],
+    account_favorites: dict[str, IdIndex],
+    output_dir: Path,
+) -> None:
+    """Write ``<output_dir>/<account>/post_data.json`` for each account: its own posts,
+    in its own order, with ``isFavorite`` from its own favorites."""
+    by_id = {post["id"]: post for post in posts if post.get("id")}
+    for name, video_ids in account_posts.items():
+        favorites = account_favorites[name]
+        account = [
+            {**by_id[video_id], "isFavorite": video_id in favorites}
+            for video_id in video_ids
+            if video_id in by_id
+        ]
+        _write_output(output_dir / name / OUTPUT_JSON, account)
+        log.success(f"Wrote {len(account)} of {len(video_ids)} posts for {name}")
+
+
+async def run_accounts(args: argparse.Namespace) -> None:
+    """Scrape several exports (``--input`` given more than once) in one pass.
+
+    Every video any account liked or favorited is fetched once, into the shared
+    store under ``--output-dir``; each account then gets its own
+    ``post_data.json`` in a subdirectory named after its export.
+    """
+    start_time = time.time()
+    output_dir = Path(args.output_dir)
+    to_fetch, account_posts, account_favorites = plan_accounts(args.inputs, args.limit)
+    total = sum(map(len, account_posts.values()))
+    log.info(f"{len(args.inputs)} exports list {total} posts; {len(to_fetch)} distinct to fetch")
+
+    store = open_store(args.storage, output_dir, resume=args.resume)
+    ledger = FailureLedger(output_dir / OUTPUT_FAILURES)
+    urls: Iterator[str] = iter(to_fetch.values())
+    if args.resume:
+        skip_failed = None if args.recheck_failures else ledger
+        urls = _skip_known(urls, store.saved_ids(), skip_failed, None, args.worker_id)
+    history = StatsHistory(output_dir / OUTPUT_STATS_HISTORY)
+    on_checkpoint = functools.partial(
+        _record_results, ledger=ledger, history=history, job_queue=None, owner=args.worker_id
+    )
+    try:
+        # isFavorite differs per account, so it's set when the outputs are split.
+        await _scrape(args, urls, None, store, on_checkpoint)
+    finally:
+        history.close()
+
+    store = open_store(args.storage, output_dir)
+    try:
+        write_account_outputs(store.iter_posts(), account_posts, account_favorites, output_dir)
+    finally:
+        store.close()
     log.info(f"The entire program took {time.time() - start_time:.2f} seconds")
 
 
@@ -301,16 +1383,59 @@ async def scrape_single(args: argparse.Namespace, url: str) -> None:
     """Scrape one live URL and print the parsed post (no file writes)."""
     client = build_client()
     try:
-        post = await fetch_and_parse(client, url, None, args.retries)
+        post = await fetch_and_parse(
+            client, url, None, args.retries, extractor=args.extractor, stream=args.stream
+        )
     finally:
         await client.aclose()
     print(json.dumps(post, indent=2, ensure_ascii=False))
 
 
-def parse_local_html(path: str) -> None:
+def reparse_cache(args: argparse.Namespace) -> None:
+    """Rebuild the post output from the HTML cache, parsing in parallel. No network.
+
+    Uses the newest cached page per video. If the export is around, favorites are
+    flagged and posts come out in Like List order; otherwise in video ID order.
+    """
+    start_time = time.time()
+    cache_dir = Path(args.cache_dir or DEFAULT_CACHE_DIR)
+    pages = HtmlCache(cache_dir).latest()
+    if not pages:
+        log.error(f"No cached pages in {cache_dir}")
+        return
+
+    favorite_video_ids = None
+    liked_ids: list[str] = []
+    if Path(args.input).exists():
+        urls, favorites = load_urls_and_favorites_from_json(args.input, args.limit)
+        favorite_video_ids = IdIndex.from_ids(favorites) if favorites is not None else None
+        liked_ids = [video_id_from_url(url) for url in urls]
+    ordered = [video_id for video_id in dict.fromkeys(liked_ids) if video_id in pages]
+    ordered += sorted(pages.keys() - set(ordered))
+
+    store = open_store(args.storage, Path(args.output_dir), resume=False)
+    parsed = 0
+    workers = args.parse_workers or os.cpu_count() or 1
+    try:
+        with build_parse_pool(workers, favorite_video_ids, args.extractor) as pool:
+            results = pool.map(
+                _parse_cached_in_worker, [pages[video_id] for video_id in ordered], chunksize=16
+            )
+            for post in tqdm(results, total=len(ordered), desc="re-parsing", unit="page"):
+                if post:
+                    store.add(post)
+                    parsed += 1
+    finally:
+        store.close()
+
+    log.success(f"Re-parsed {parsed} of {len(ordered)} cached pages into {store.path}")
+    log.info(f"reparse_cache took {time.time() - start_time:.2f} seconds")
+
+
+def parse_local_html(path: str, extractor: str = DEFAULT_EXTRACTOR) -> None:
     """Parse a saved post page from disk and print the result. No network."""
     html = Path(path).read_text(encoding="utf-8")
-    post = parse_post(html, None)
+    post = parse_post(html, None, extractor)
     print(json.dumps(post, indent=2, ensure_ascii=False))
 
 
@@ -326,23 +1451,78 @@ def _positive_int(value: str) -> int:
     return number
 
 
+def _non_negative_int(value: str) -> int:
+    number = int(value)
+    if number < 0:
+        raise argparse.ArgumentTypeError(f"must be zero or a positive integer, got {value!r}")
+    return number
+
+
+def _positive_float(value: str) -> float:
+    number = float(value)
+    if number <= 0:
+        raise argparse.ArgumentTypeError(f"must be a positive number, got {value!r}")
+    return number
+
+
 def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
     parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
-    parser.add_argument("--input", default=DEFAULT_INPUT, help="TikTok data export JSON")
+    parser.add_argument(
+        "--input",
+        action="append",
+        help="TikTok data export JSON (default: user_data_tiktok.json); repeat to scrape "
+        "several accounts' exports at once, each video fetched once",
+    )
     parser.add_argument(
         "--output-dir", default=str(DEFAULT_OUTPUT_DIR), help="where to write post_data.json"
     )
+    parser.add_argument(
+        "--storage",
+        choices=("json", "jsonl", "sqlite"),
+        default="json",
+        help="rewrite post_data.json on each checkpoint, append to post_data.jsonl, "
+        "or upsert into post_data.db",
+    )
+    parser.add_argument(
+        "--compact",
+        action="store_true",
+        help="write post_data.json from the --storage jsonl/sqlite output and exit",
+    )
     parser.add_argument(
         "--limit", type=_positive_int, default=DEFAULT_LIMIT, help="max liked posts to scrape"
     )
     parser.add_argument(
-        "--batch-size",
+        "--concurrency",
+        "--batch-size",  # old name, from when posts were fetched in fixed batches
+        dest="concurrency",
         type=_positive_int,
-        default=DEFAULT_BATCH_SIZE,
-        help="posts fetched concurrently",
+        default=DEFAULT_CONCURRENCY,
+        help="requests kept in flight at once",
     )
     parser.add_argument(
-        "--batch-delay", type=float, default=DEFAULT_BATCH_DELAY, help="seconds between batches"
+        "--delay",
+        "--batch-delay",
+        dest="delay",
+        type=float,
+        default=DEFAULT_DELAY,
+        help="seconds each worker waits between requests",
+    )
+    parser.add_argument(
+        "--adaptive",
+        action="store_true",
+        help="find the fastest sustainable rate from 403/429 feedback (ignores --delay)",
+    )
+    parser.add_argument(
+        "--initial-rate",
+        type=_positive_float,
+        default=DEFAULT_INITIAL_RATE,
+        help="starting requests/second for --adaptive",
+    )
+    parser.add_argument(
+        "--max-rate",
+        type=_positive_float,
+        default=DEFAULT_MAX_RATE,
+        help="ceiling in requests/second for --adaptive",
     )
     parser.add_argument(
         "--retries",
@@ -356,22 +1536,145 @@ def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
         action="store_false",
         help="re-scrape everything instead of skipping saved posts",
     )
+    parser.add_argument(
+        "--refresh",
+        action="store_true",
+        help="re-scrape saved posts whose stats are older than --refresh-ttl, "
+        "fastest-growing first, instead of scraping the export",
+    )
+    parser.add_argument(
+        "--refresh-ttl",
+        type=_positive_float,
+        default=DEFAULT_REFRESH_TTL_HOURS,
+        metavar="HOURS",
+        help="how old a post's stats may get before --refresh re-scrapes it",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="only read likes newer than the last completed run (and merge favorites "
+        "across exports), tracked in sync_state.json",
+    )
+    parser.add_argument(
+        "--recheck-failures",
+        action="store_true",
+        help="on resume, retry every post in the failure ledger, even ones marked gone",
+    )
     parser.add_argument("--url", help="scrape a single live URL and print it")
     parser.add_argument(
         "--parse-html", metavar="FILE", help="parse a saved post page offline and print it"
     )
+    parser.add_argument(
+        "--extractor",
+        choices=EXTRACTORS,
+        default=DEFAULT_EXTRACTOR,
+        help="find the post JSON by raw string scan (falls back to XPath) or full XPath parse",
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="stop downloading each page once the post JSON has arrived",
+    )
+    parser.add_argument(
+        "--parse-workers",
+        type=_non_negative_int,
+        default=0,
+        metavar="N",
+        help="parse pages in N worker processes instead of on the event loop",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        help=f"save every fetched page here, compressed (--reparse-cache: {DEFAULT_CACHE_DIR})",
+    )
+    parser.add_argument(
+        "--reparse-cache",
+        action="store_true",
+        help="rebuild the output from cached pages instead of fetching",
+    )
+    parser.add_argument(
+        "--proxy",
+        action="append",
+        default=[],
+        metavar="URL",
+        help="send requests through this proxy; repeat to pool several egress clients",
+    )
+    parser.add_argument(
+        "--source-address",
+        action="append",
+        default=[],
+        metavar="IP",
+        help="add a client bound to this local IP to the pool; repeatable",
+    )
+    parser.add_argument(
+        "--pool-strategy",
+        choices=STRATEGIES,
+        default=DEFAULT_STRATEGY,
+        help="how requests are spread over pooled clients; a client that keeps getting "
+        "403/429 is benched either way",
+    )
+    parser.add_argument(
+        "--queue",
+        metavar="DB",
+        help="claim URLs from this shared job queue file (seeded from --input when present), "
+        "so several processes or machines can split one export",
+    )
+    parser.add_argument(
+        "--worker-id",
+        default=f"{socket.gethostname()}-{os.getpid()}",
+        help="this process's name in the --queue (default: host-pid)",
+    )
+    parser.add_argument(
+        "--stats-file",
+        metavar="PATH",
+        help="write request/parse metrics as JSON here every 10s and at the end",
+    )
+    parser.add_argument(
+        "--metrics-port",
+        type=_positive_int,
+        metavar="PORT",
+        help="serve Prometheus metrics on http://127.0.0.1:PORT/metrics while scraping",
+    )
     parser.add_argument("--verbose", action="store_true", help="debug logging")
-    return parser.parse_args(argv)
+    args = parser.parse_args(argv)
+    # args.inputs is every export given; args.input the first, for the single-export paths.
+    args.inputs = args.input or [DEFAULT_INPUT]
+    args.input = args.inputs[0]
+    if len(args.inputs) > 1 and (args.queue or args.incremental or args.refresh):
+        parser.error(
+            "several --input exports can't be combined with --queue/--incremental/--refresh"
+        )
+    if args.incremental and args.queue:
+        parser.error(
+            "--incremental can't be combined with --queue (seeding is incremental already)"
+        )
+    return args
 
 
 def main(argv: list[str] | None = None) -> None:
     args = parse_args(argv)
     _configure_logging(args.verbose)
 
-    if args.parse_html:
-        parse_local_html(args.parse_html)
+    if args.compact:
+        output_dir = Path(args.output_dir)
+        if args.storage == "sqlite":
+            store = SqliteStore(output_dir / OUTPUT_DB)
+            posts = list(store.iter_posts())
+            store.close()
+            _write_output(output_dir / OUTPUT_JSON, posts)
+            count = len(posts)
+        else:
+            count = compact_log(output_dir / OUTPUT_LOG, output_dir / OUTPUT_JSON)
+        log.success(f"Compacted {count} posts into {output_dir / OUTPUT_JSON}")
+    elif args.reparse_cache:
+        reparse_cache(args)
+    elif args.parse_html:
+        parse_local_html(args.parse_html, args.extractor)
     elif args.url:
         asyncio.run(scrape_single(args, args.url))
+    elif args.refresh:
+        asyncio.run(refresh(args))
+    elif len(args.inputs) > 1:
+        asyncio.run(run_accounts(args))
     else:
         asyncio.run(run(args))
 